@@ -43,9 +43,11 @@ constant_table_list = [
    at_cascade/add_log_entry.py
    at_cascade/avgint_parent_grid.py
    at_cascade/bilinear.py
+   at_cascade/cascade_report.py
    at_cascade/cascade_root_node.py
    at_cascade/check_cascade_node.py
    at_cascade/check_log.py
+   at_cascade/check_timing.py
    at_cascade/clear_shared.py
    at_cascade/com_cov_reference.py
    at_cascade/continue_cascade.py
@@ -55,13 +57,16 @@ constant_table_list = [
    at_cascade/create_job_table.py
    at_cascade/create_shift_db.py
    at_cascade/data_include.py
+   at_cascade/delta_cascade.py
    at_cascade/empty_avgint_table.py
    at_cascade/empty_directory.py
    at_cascade/extract_avgint.py
+   at_cascade/fit_cache_class.py
    at_cascade/fit_one_job.py
    at_cascade/fit_one_process.py
    at_cascade/fit_or_root_class.py
    at_cascade/fit_parallel.py
+   at_cascade/fit_pool.py
    at_cascade/get_cov_info.py
    at_cascade/get_database_dir.py
    at_cascade/get_fit_children.py
@@ -70,10 +75,23 @@ constant_table_list = [
    at_cascade/get_parent_node.py
    at_cascade/get_var_id.py
    at_cascade/job_descendent.py
+   at_cascade/job_history_class.py
+   at_cascade/job_journal_class.py
+   at_cascade/job_lease_class.py
+   at_cascade/job_priority.py
+   at_cascade/job_profiler_class.py
+   at_cascade/lease_worker.py
    at_cascade/map_shared.py
+   at_cascade/materialize_shift_db.py
+   at_cascade/merge_profile.py
    at_cascade/move_table.py
    at_cascade/no_ode_fit.py
    at_cascade/omega_constraint.py
+   at_cascade/perturb_var.py
+   at_cascade/shared_job_class.py
+   at_cascade/stage_timer_class.py
+   at_cascade/status_server_class.py
+   at_cascade/status_writer_class.py
    at_cascade/table_exists.py
    at_cascade/table_name2id.py
 }
@@ -90,9 +108,11 @@ from .                      import csv
 from .add_log_entry         import add_log_entry
 from .avgint_parent_grid    import avgint_parent_grid
 from .bilinear              import bilinear
+from .cascade_report        import cascade_report
 from .cascade_root_node     import cascade_root_node
 from .check_cascade_node    import check_cascade_node
 from .check_log             import check_log
+from .check_timing          import check_timing
 from .clear_shared          import clear_shared
 from .com_cov_reference     import com_cov_reference
 from .continue_cascade      import continue_cascade
@@ -102,13 +122,16 @@ from .create_all_node_db    import create_all_node_db
 from .create_job_table      import create_job_table
 from .create_shift_db       import create_shift_db
 from .data_include          import data_include
+from .delta_cascade         import delta_cascade
 from .empty_avgint_table    import empty_avgint_table
 from .empty_directory       import empty_directory
 from .extract_avgint        import extract_avgint
+from .fit_cache_class       import fit_cache_class
 from .fit_one_job           import fit_one_job
 from .fit_one_process       import fit_one_process
 from .fit_or_root_class     import fit_or_root_class
 from .fit_parallel          import fit_parallel
+from .fit_pool              import fit_pool
 from .get_cov_info          import get_cov_info
 from .get_database_dir      import get_database_dir
 from .get_fit_children      import get_fit_children
@@ -117,10 +140,23 @@ from .get_freeze_dict       import get_freeze_dict
 from .get_parent_node       import get_parent_node
 from .get_var_id            import get_var_id
 from .job_descendent        import job_descendent
+from .job_history_class     import job_history_class
+from .job_journal_class     import job_journal_class
+from .job_lease_class       import job_lease_class
+from .job_priority          import job_priority
+from .job_profiler_class    import job_profiler_class
+from .lease_worker          import lease_worker
 from .map_shared            import map_shared
+from .materialize_shift_db  import materialize_shift_db
+from .merge_profile         import merge_profile
 from .move_table            import move_table
 from .no_ode_fit            import no_ode_fit
 from .omega_constraint      import omega_constraint
+from .perturb_var           import perturb_var
+from .shared_job_class      import shared_job_class
+from .stage_timer_class     import stage_timer_class
+from .status_server_class   import status_server_class
+from .status_writer_class   import status_writer_class
 from .table_exists          import table_exists
 from .table_name2id         import table_name2id
 # END_SORT_THIS_LINE_MINUS_1
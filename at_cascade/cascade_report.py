@@ -0,0 +1,461 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+{xrst_begin cascade_report}
+{xrst_spell
+  gantt
+  html
+  json
+  svg
+}
+
+Performance Report For a Cascade
+################################
+
+Prototype
+*********
+{xrst_literal ,
+   # BEGIN_DEF, # END_DEF
+   # BEGIN_RETURN, # END_RETURN
+}
+
+Purpose
+*******
+Reconstruct the time line for a cascade that has been run and
+report where the time went.
+The fit databases are not modified (are opened in a read only fashion).
+
+all_node_database
+*****************
+specifies the location of the
+:ref:`all_node_db-name`
+relative to the current working directory.
+The :ref:`option_all_table@root_database` ,
+:ref:`option_all_table@result_dir` , and
+:ref:`option_all_table@max_number_cpu` options are used.
+
+job_table
+*********
+This is the :ref:`create_job_table@job_table` for the cascade.
+Only jobs for which :ref:`create_job_table@job_table@prior_only` is false
+are included; i.e., only jobs that correspond to fits.
+
+start_job_id
+************
+This is the first job included in the report.
+If this is None, the first job in the job table is the start job.
+
+max_job_depth
+*************
+This is the number of generations below the start job that are included;
+see :ref:`check_log@max_job_depth` .
+
+Job Times
+*********
+The start and end time for a job come from its
+:ref:`stage_timer_class@at_cascade_timing` table.
+If this table does not exist, the smallest and largest
+unix_time in its log table are used (these have one second resolution).
+Jobs that do not have a fit database are not included.
+
+report
+******
+The return value *report* is a ``dict`` with the following keys:
+
+elapsed_seconds
+===============
+the wall time from the first job start to the last job end.
+
+max_number_cpu
+==============
+is the maximum number of processors for the cascade.
+
+utilization
+===========
+is the sum of the job seconds divided by
+*max_number_cpu* times *elapsed_seconds* .
+
+job
+===
+is a ``list`` of ``dict`` , one for each job, in order of start time.
+Each ``dict`` has the keys
+job_name, start (seconds since the first job start), seconds (wall time),
+fit_type (the last fit type tried), stage_seconds
+(a ``dict`` with the wall seconds for each
+:ref:`fit_one_job@Stage Timing` stage), and
+fit_iterations (the number of Ipopt iterations in the
+``fit_one_job: fit iterations =`` line of the job's ``trace.out`` file
+or None if there is no such line).
+Stages for each child shift database are summed into the ``shift`` stage.
+
+timeline
+========
+is a ``list`` of [ *time* , *number_running* ] pairs
+where *number_running* is the number of jobs running from *time*
+until the next pair.
+
+ready_idle
+==========
+is a ``list`` of [ *start* , *end* , *number_idle* ] where
+*number_idle* is the number of processors that were not in use
+from *start* to *end* while that many (or more) jobs were ready to run;
+i.e., their parent job had finished.
+This is time spent waiting for the scheduler;
+e.g. waiting for the shared_event in :ref:`fit_one_process-name` .
+
+ready_idle_seconds
+==================
+is the sum of *number_idle* times the interval length for the
+*ready_idle* intervals.
+
+critical_path
+=============
+is a ``list`` of job names from a root job to the job where the sum of
+the job seconds along the path is largest.
+The job tree can't finish in less time than this path takes.
+
+critical_path_seconds
+=====================
+is the sum of the job seconds along the *critical_path* .
+
+slowest_stage
+=============
+is a ``list`` of [ *stage* , *seconds* ] pairs with the total
+seconds for each stage, for all the jobs, in decreasing order.
+
+slowest_job
+===========
+is a ``list`` of [ *job_name* , *seconds* ] pairs for the ten jobs
+that took the most time, in decreasing order.
+
+Output Files
+************
+The following files are written to the *result_dir* directory:
+
+cascade_report.json
+===================
+contains *report* in json format.
+
+cascade_report.html
+===================
+contains a Gantt chart for the jobs (with the critical path in red)
+and a plot of the number of jobs running versus time, as an SVG image.
+
+{xrst_end cascade_report}
+'''
+# ----------------------------------------------------------------------------
+import os
+import html
+import json
+import dismod_at
+import at_cascade
+from at_cascade.check_log import job_fit_database
+# ----------------------------------------------------------------------------
+# get_job_time
+# Returns None, if there is no timing information for this fit_database.
+# Otherwise returns a dict with the keys start, end, fit_type, stage_seconds.
+def get_job_time(fit_database) :
+   if not os.path.exists(fit_database) :
+      return None
+   connection = dismod_at.create_connection(
+      fit_database, new = False, readonly = True
+   )
+   #
+   # job_time
+   job_time = None
+   if at_cascade.table_exists(connection, 'at_cascade_timing') :
+      timing_table = dismod_at.get_table_dict(connection, 'at_cascade_timing')
+      if len(timing_table) > 0 :
+         first = timing_table[0]
+         job_time = {
+            'start'         : first['unix_time'] - first['wall_seconds'] ,
+            'end'           : timing_table[-1]['unix_time'] ,
+            'fit_type'      : timing_table[-1]['fit_type'] ,
+            'stage_seconds' : dict() ,
+         }
+         stage_seconds = job_time['stage_seconds']
+         for row in timing_table :
+            stage = row['stage']
+            if stage.startswith('shift ') :
+               stage = 'shift'
+            stage_seconds[stage] = \
+               stage_seconds.get(stage, 0.0) + row['wall_seconds']
+   if job_time == None and at_cascade.table_exists(connection, 'log') :
+      command = 'SELECT min(unix_time), max(unix_time) FROM log'
+      (start, end) = dismod_at.sql_command(connection, command)[0]
+      if start != None :
+         job_time = {
+            'start'         : float(start) ,
+            'end'           : float(end) ,
+            'fit_type'      : None ,
+            'stage_seconds' : dict() ,
+         }
+   connection.close()
+   return job_time
+# ----------------------------------------------------------------------------
+# get_fit_iterations
+def get_fit_iterations(trace_file) :
+   fit_iterations = None
+   if os.path.exists(trace_file) :
+      prefix = 'fit_one_job: fit iterations = '
+      with open(trace_file, 'r') as file_obj :
+         for line in file_obj :
+            if line.startswith(prefix) :
+               value = line[ len(prefix) : ].split(',')[0].strip()
+               if value != 'None' :
+                  fit_iterations = int( value )
+   return fit_iterations
+# ----------------------------------------------------------------------------
+# write_html
+def write_html(html_file, report) :
+   #
+   # job_list, elapsed, n_cpu
+   job_list = report['job']
+   elapsed  = max( report['elapsed_seconds'], 1e-6 )
+   n_cpu    = report['max_number_cpu']
+   #
+   # width, bar_height, label_width, scale
+   width       = 800
+   bar_height  = 12
+   label_width = 160
+   scale       = (width - label_width) / elapsed
+   #
+   # gantt
+   critical_set = set( report['critical_path'] )
+   gantt_height = bar_height * ( len(job_list) + 1 )
+   gantt = list()
+   for (i, job) in enumerate( job_list ) :
+      name  = html.escape( job['job_name'] )
+      x     = label_width + job['start'] * scale
+      w     = max( job['seconds'] * scale, 1.0 )
+      y     = i * bar_height
+      color = 'red' if job['job_name'] in critical_set else 'steelblue'
+      gantt.append(
+         f'<text x="0" y="{y + bar_height - 2}" font-size="10">{name}</text>'
+      )
+      gantt.append(
+         f'<rect x="{x:.1f}" y="{y + 1}" width="{w:.1f}" '
+         f'height="{bar_height - 2}" fill="{color}">'
+         f'<title>{name}: {job["seconds"]:.1f} seconds</title></rect>'
+      )
+   #
+   # utilization
+   plot_height = 100
+   point_list  = list()
+   previous    = plot_height
+   for (t, number_running) in report['timeline'] :
+      x = label_width + t * scale
+      y = plot_height * ( 1.0 - number_running / max(n_cpu, 1) )
+      point_list.append( f'{x:.1f},{previous:.1f}' )
+      point_list.append( f'{x:.1f},{y:.1f}' )
+      previous = y
+   points = ' '.join( point_list )
+   #
+   # file_obj
+   title = 'cascade_report'
+   with open(html_file, 'w') as file_obj :
+      file_obj.write(
+         f'<!DOCTYPE html>\n<html><head><title>{title}</title></head>\n'
+         '<body>\n'
+         f'<h3>elapsed = {report["elapsed_seconds"]:.1f} seconds, '
+         f'utilization = {report["utilization"]:.2f}, '
+         f'critical path = {report["critical_path_seconds"]:.1f} seconds, '
+         f'ready idle = {report["ready_idle_seconds"]:.1f} cpu seconds'
+         '</h3>\n'
+         f'<svg width="{width}" height="{gantt_height}">\n'
+         + '\n'.join(gantt) +
+         '\n</svg>\n'
+         f'<h3>jobs running (maximum {n_cpu})</h3>\n'
+         f'<svg width="{width}" height="{plot_height + 1}">\n'
+         f'<polyline points="{points}" fill="none" stroke="black"/>\n'
+         '</svg>\n</body></html>\n'
+      )
+# ----------------------------------------------------------------------------
+# BEGIN_DEF
+# at_cascade.cascade_report
+def cascade_report(
+   all_node_database             ,
+   job_table                     ,
+   start_job_id           = None ,
+   max_job_depth          = None ,
+) :
+   assert type(all_node_database) == str
+   assert type(job_table) == list
+   if start_job_id == None :
+      start_job_id = 0
+   assert max_job_depth == None or type(max_job_depth) == int
+   # END_DEF
+   #
+   # option_all_dict
+   connection = dismod_at.create_connection(
+      all_node_database, new = False, readonly = True
+   )
+   option_all_table = dismod_at.get_table_dict(connection, 'option_all')
+   connection.close()
+   option_all_dict = dict()
+   for row in option_all_table :
+      option_all_dict[ row['option_name'] ] = row['option_value']
+   #
+   # root_database, result_dir, max_number_cpu
+   root_database  = option_all_dict['root_database']
+   result_dir     = option_all_dict['result_dir']
+   max_number_cpu = int( option_all_dict.get('max_number_cpu', '1') )
+   #
+   # job_time
+   job_time = dict()
+   for (job_name, fit_database) in job_fit_database(
+      all_node_database, root_database, job_table, start_job_id, max_job_depth
+   ) :
+      this_time = get_job_time(fit_database)
+      if this_time != None :
+         trace_file = os.path.dirname(fit_database) + '/trace.out'
+         this_time['fit_iterations'] = get_fit_iterations(trace_file)
+         job_time[job_name] = this_time
+   #
+   # time_zero, elapsed_seconds
+   if len(job_time) == 0 :
+      time_zero       = 0.0
+      elapsed_seconds = 0.0
+   else :
+      time_zero = min( job_time[name]['start'] for name in job_time )
+      time_end  = max( job_time[name]['end'] for name in job_time )
+      elapsed_seconds = time_end - time_zero
+   #
+   # job
+   job = list()
+   for job_name in job_time :
+      this_time = job_time[job_name]
+      job.append( {
+         'job_name'       : job_name ,
+         'start'          : this_time['start'] - time_zero ,
+         'seconds'        : this_time['end'] - this_time['start'] ,
+         'fit_type'       : this_time['fit_type'] ,
+         'stage_seconds'  : this_time['stage_seconds'] ,
+         'fit_iterations' : this_time['fit_iterations'] ,
+      } )
+   job = sorted(job, key = lambda row : row['start'] )
+   #
+   # utilization
+   job_seconds = sum( row['seconds'] for row in job )
+   if elapsed_seconds == 0.0 :
+      utilization = 0.0
+   else :
+      utilization = job_seconds / ( max_number_cpu * elapsed_seconds )
+   #
+   # ready_time
+   # time at which each job could start; i.e., when its parent ended
+   ready_time = dict()
+   for row in job_table :
+      job_name      = row['job_name']
+      parent_job_id = row['parent_job_id']
+      if job_name in job_time and parent_job_id != None :
+         parent_name = job_table[parent_job_id]['job_name']
+         if parent_name in job_time :
+            ready_time[job_name] = job_time[parent_name]['end'] - time_zero
+   #
+   # event_list
+   # (time, change in number running, change in number ready)
+   event_list = list()
+   for row in job :
+      job_name = row['job_name']
+      event_list.append( (row['start'], 1, 0) )
+      event_list.append( (row['start'] + row['seconds'], -1, 0) )
+      if job_name in ready_time :
+         start = min( ready_time[job_name], row['start'] )
+         event_list.append( (start, 0, 1) )
+         event_list.append( (row['start'], 0, -1) )
+   event_list = sorted(event_list)
+   #
+   # timeline, ready_idle, ready_idle_seconds
+   timeline           = list()
+   ready_idle         = list()
+   ready_idle_seconds = 0.0
+   number_running     = 0
+   number_ready       = 0
+   for (i, event) in enumerate( event_list ) :
+      (t, d_running, d_ready) = event
+      number_running += d_running
+      number_ready   += d_ready
+      if i + 1 < len(event_list) and event_list[i+1][0] == t :
+         continue
+      if len(timeline) == 0 or timeline[-1][1] != number_running :
+         timeline.append( [ t, number_running ] )
+      number_idle = min( number_ready, max_number_cpu - number_running )
+      if number_idle > 0 and i + 1 < len(event_list) :
+         t_next = event_list[i+1][0]
+         ready_idle.append( [ t, t_next, number_idle ] )
+         ready_idle_seconds += number_idle * (t_next - t)
+   #
+   # path_seconds
+   # sum of the job seconds from a root job to each job
+   seconds      = { row['job_name'] : row['seconds'] for row in job }
+   path_seconds = dict()
+   for row in job_table :
+      job_name      = row['job_name']
+      parent_job_id = row['parent_job_id']
+      parent_name   = None
+      if parent_job_id != None :
+         parent_name = job_table[parent_job_id]['job_name']
+      path_seconds[job_name] = seconds.get(job_name, 0.0)
+      if parent_name in path_seconds :
+         path_seconds[job_name] += path_seconds[parent_name]
+   #
+   # critical_path, critical_path_seconds
+   critical_path         = list()
+   critical_path_seconds = 0.0
+   if len(job) > 0 :
+      job_name = max( seconds, key = lambda name : path_seconds[name] )
+      critical_path_seconds = path_seconds[job_name]
+      job_id   = at_cascade.table_name2id(job_table, 'job', job_name)
+      while job_id != None :
+         job_name = job_table[job_id]['job_name']
+         if job_name in seconds :
+            critical_path.insert(0, job_name)
+         job_id = job_table[job_id]['parent_job_id']
+   #
+   # slowest_stage
+   stage_seconds = dict()
+   for row in job :
+      for stage in row['stage_seconds'] :
+         stage_seconds[stage] = \
+            stage_seconds.get(stage, 0.0) + row['stage_seconds'][stage]
+   slowest_stage = sorted(
+      stage_seconds.items(), key = lambda pair : pair[1], reverse = True
+   )
+   slowest_stage = [ list(pair) for pair in slowest_stage ]
+   #
+   # slowest_job
+   slowest_job = sorted(
+      seconds.items(), key = lambda pair : pair[1], reverse = True
+   )
+   slowest_job = [ list(pair) for pair in slowest_job[: 10] ]
+   #
+   # report
+   report = {
+      'elapsed_seconds'       : elapsed_seconds ,
+      'max_number_cpu'        : max_number_cpu ,
+      'utilization'           : utilization ,
+      'job'                   : job ,
+      'timeline'              : timeline ,
+      'ready_idle'            : ready_idle ,
+      'ready_idle_seconds'    : ready_idle_seconds ,
+      'critical_path'         : critical_path ,
+      'critical_path_seconds' : critical_path_seconds ,
+      'slowest_stage'         : slowest_stage ,
+      'slowest_job'           : slowest_job ,
+   }
+   #
+   # cascade_report.json
+   with open(f'{result_dir}/cascade_report.json', 'w') as file_obj :
+      json.dump(report, file_obj, indent = 1)
+   #
+   # cascade_report.html
+   write_html(f'{result_dir}/cascade_report.html', report)
+   #
+   # BEGIN_RETURN
+   # ...
+   assert type(report) == dict
+   return report
+   # END_RETURN
@@ -47,6 +47,14 @@ For each job, the first type of fit is attempted.
 If it fails, and there is a second type of fit, it is attempted.
 If it also fails, the corresponding job fails.
 
+resume
+******
+If this is true, the previous call to cascade_root_node with the same
+arguments did not complete; e.g., because the system crashed.
+If the *root_fit_database* exists, it is not re-initialized,
+and the jobs that completed during the previous call are not run again;
+see :ref:`fit_parallel@resume` .
+
 root_fit_database
 *****************
 This database is located at
@@ -121,12 +129,14 @@ def cascade_root_node(
    all_node_database       ,
    fit_goal_set            ,
    no_ode_fit              = False,
-   fit_type_list           = [ 'both', 'fixed' ]
+   fit_type_list           = [ 'both', 'fixed' ],
+   resume                  = False,
 ) :
    assert type(all_node_database)  == str
    assert type(fit_goal_set)       == set
    assert type(no_ode_fit)         == bool
    assert type(fit_type_list)      == list
+   assert type(resume)             == bool
    # END_DEF
    #
    # split_reference_table, option_all_table
@@ -163,10 +173,13 @@ def cascade_root_node(
    root_fit_database = f'{result_dir}/{root_node_name}/dismod.db'
    if not os.path.exists( f'{result_dir}/{root_node_name}' ) :
       os.makedirs( f'{result_dir}/{root_node_name}' )
-   if not no_ode_fit :
+   #
+   # initialize_root
+   initialize_root = not ( resume and os.path.exists(root_fit_database) )
+   if initialize_root and not no_ode_fit :
       at_cascade.copy_root_db(root_database, root_fit_database)
       at_cascade.omega_constraint(all_node_database, root_fit_database)
-   else :
+   elif initialize_root :
       at_cascade.no_ode_fit(
          all_node_database  = all_node_database,
          root_database      = root_database,
@@ -187,12 +200,13 @@ def cascade_root_node(
    at_cascade_version = 'at_cascade-' + at_cascade.version
    #
    # log table
-   connection  = dismod_at.create_connection(
-      root_fit_database, new = False, readonly = False
-   )
-   at_cascade.add_log_entry(connection, dismod_at_version)
-   at_cascade.add_log_entry(connection, at_cascade_version)
-   connection.close()
+   if initialize_root :
+      connection  = dismod_at.create_connection(
+         root_fit_database, new = False, readonly = False
+      )
+      at_cascade.add_log_entry(connection, dismod_at_version)
+      at_cascade.add_log_entry(connection, at_cascade_version)
+      connection.close()
    #
    # node_table, covariate_table, fit_integrand
    fit_or_root = at_cascade.fit_or_root_class(
@@ -245,4 +259,5 @@ def cascade_root_node(
       max_number_cpu    = max_number_cpu,
       fit_type_list     = fit_type_list,
       shared_unique     = '',
+      resume            = resume,
    )
@@ -79,25 +79,14 @@ import multiprocessing
 import dismod_at
 import at_cascade
 # ----------------------------------------------------------------------------
-# BEGIN_DEF
-# at_cascade.check_log
-def check_log(
-   message_type                  ,
-   all_node_database             ,
-   root_database            ,
-   job_table                     ,
-   start_job_id           = None ,
-   max_job_depth          = None ,
+# job_fit_database
+# Return a list of (job_name, fit_database) pairs for the fit jobs in
+# job_table that are descendants of start_job_id (with job depth less than
+# or equal max_job_depth when it is not None). This is used by check_log
+# and check_timing.
+def job_fit_database(
+   all_node_database, root_database, job_table, start_job_id, max_job_depth
 ) :
-   assert type(message_type)        == str
-   assert type(all_node_database)   == str
-   assert type(root_database)  == str
-   if start_job_id == None :
-      start_job_id = 0
-   assert max_job_depth == None or type(max_job_depth) == int
-   # END_DEF
-   #
-   assert message_type in [ 'error', 'warning', 'at_cascade' ]
    #
    # node_table, covariate_table
    connection      = dismod_at.create_connection(
@@ -152,8 +141,8 @@ def check_log(
    for row in node_split_table :
       node_split_set.add( row['node_id'] )
    #
-   # message_dict
-   message_dict = dict()
+   # fit_database_list
+   fit_database_list = list()
    #
    # job_id
    for job_id in range( len(job_table) ) :
@@ -190,27 +179,57 @@ def check_log(
             fit_split_reference_id  = fit_split_reference_id,
          )
          fit_database      = f'{result_dir}/{database_dir}/dismod.db'
+         fit_database_list.append( (job_name, fit_database) )
+   return fit_database_list
+# ----------------------------------------------------------------------------
+# BEGIN_DEF
+# at_cascade.check_log
+def check_log(
+   message_type                  ,
+   all_node_database             ,
+   root_database            ,
+   job_table                     ,
+   start_job_id           = None ,
+   max_job_depth          = None ,
+) :
+   assert type(message_type)        == str
+   assert type(all_node_database)   == str
+   assert type(root_database)  == str
+   if start_job_id == None :
+      start_job_id = 0
+   assert max_job_depth == None or type(max_job_depth) == int
+   # END_DEF
+   #
+   assert message_type in [ 'error', 'warning', 'at_cascade' ]
+   #
+   # message_dict
+   message_dict = dict()
+   #
+   # job_name, fit_database
+   for (job_name, fit_database) in job_fit_database(
+      all_node_database, root_database, job_table, start_job_id, max_job_depth
+   ) :
+      #
+      # log_table
+      if not os.path.exists(fit_database) :
+         message = f'Missing fit_database {fit_database}'
+         message_dict[job_name] = [ message ]
+      else :
+         connection = dismod_at.create_connection(
+                  fit_database, new = False, readonly = True
+         )
+         log_table  = dismod_at.get_table_dict(connection, 'log')
+         connection.close()
          #
-         # log_table
-         if not os.path.exists(fit_database) :
-            message = f'Missing fit_database {fit_database}'
-            message_dict[job_name] = [ message ]
-         else :
-            connection = dismod_at.create_connection(
-                     fit_database, new = False, readonly = True
-            )
-            log_table  = dismod_at.get_table_dict(connection, 'log')
-            connection.close()
+         # row
+         for row in log_table :
             #
-            # row
-            for row in log_table :
+            if row['message_type'] == message_type :
                #
-               if row['message_type'] == message_type :
-                  #
-                  # message_dict
-                  if job_name not in message_dict :
-                     message_dict[job_name] = list()
-                  message_dict[job_name].append( row['message'] )
+               # message_dict
+               if job_name not in message_dict :
+                  message_dict[job_name] = list()
+               message_dict[job_name].append( row['message'] )
    #
    # BEGIN_RETURN
    # ...
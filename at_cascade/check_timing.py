@@ -0,0 +1,113 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+{xrst_begin check_timing}
+
+Get the Stage Timing For Each Job in a Cascade
+##############################################
+
+Prototype
+*********
+{xrst_literal ,
+   # BEGIN_DEF, # END_DEF
+   # BEGIN_RETURN, # END_RETURN
+}
+
+Purpose
+*******
+Read the at_cascade_timing tables for a cascade; see
+:ref:`stage_timer_class@at_cascade_timing` .
+The databases are not modified (are opened in a read only fashion).
+
+all_node_database
+*****************
+specifies the location of the
+:ref:`all_node_db-name`
+relative to the current working directory.
+
+root_database
+*************
+specifies the location of the dismod_at
+:ref:`glossary@root_database`.
+
+job_table
+*********
+This is the :ref:`create_job_table@job_table` that we are getting
+the timing for.
+Only jobs for which :ref:`create_job_table@job_table@prior_only` is false
+are included; i.e., only jobs that correspond to fits.
+
+start_job_id
+************
+This is the job that the timing should start at.
+If this is None, the first job in the job table is the start job.
+
+max_job_depth
+*************
+This is the number of generations below the start job that are included;
+see :ref:`check_log@max_job_depth` .
+
+timing_dict
+***********
+For each :ref:`create_job_table@job_table@job_name` in the job table
+that is a key in *timing_dict*, the corresponding value
+
+| *timing_dict* [ *job_name* ]
+
+is a non-empty ``list`` of ``dict`` containing the rows of the
+at_cascade_timing table for that job (in the order they were written).
+The keys in each ``dict`` are the column names in the at_cascade_timing
+table; e.g., ``stage`` and ``wall_seconds`` .
+If a *job_name* is not a key in *timing_dict*,
+its fit database or at_cascade_timing table does not exist.
+
+{xrst_end check_timing}
+'''
+# ----------------------------------------------------------------------------
+import os
+import dismod_at
+import at_cascade
+from at_cascade.check_log import job_fit_database
+# ----------------------------------------------------------------------------
+# BEGIN_DEF
+# at_cascade.check_timing
+def check_timing(
+   all_node_database             ,
+   root_database                 ,
+   job_table                     ,
+   start_job_id           = None ,
+   max_job_depth          = None ,
+) :
+   assert type(all_node_database)   == str
+   assert type(root_database)       == str
+   if start_job_id == None :
+      start_job_id = 0
+   assert max_job_depth == None or type(max_job_depth) == int
+   # END_DEF
+   #
+   # timing_dict
+   timing_dict = dict()
+   #
+   # job_name, fit_database
+   for (job_name, fit_database) in job_fit_database(
+      all_node_database, root_database, job_table, start_job_id, max_job_depth
+   ) :
+      if os.path.exists(fit_database) :
+         connection = dismod_at.create_connection(
+            fit_database, new = False, readonly = True
+         )
+         if at_cascade.table_exists(connection, 'at_cascade_timing') :
+            timing_table = dismod_at.get_table_dict(
+               connection, 'at_cascade_timing'
+            )
+            if len(timing_table) > 0 :
+               timing_dict[job_name] = timing_table
+         connection.close()
+   #
+   # BEGIN_RETURN
+   # ...
+   assert type(timing_dict) == dict
+   return timing_dict
+   # END_RETURN
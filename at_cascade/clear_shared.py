@@ -6,7 +6,6 @@
 {xrst_begin clear_shared}
 {xrst_spell
   errno
-  inuse
 }
 
 Clear at_cascade Shared Memory
@@ -28,7 +27,8 @@ to run the cascade:
 
    FileExistsError: [Errno 17] File exists: *name*
 
-where *name* ends with ``_number_cpu_inuse`` or ``_job_status``.
+where *name* ends with one of the
+:ref:`shared_job_class@shared_job_class@suffix_list` values.
 This may happen if the previous :ref:`fit_parallel-name`
 did not terminate cleanly; e.g., if the system crashed.
 
@@ -72,7 +72,7 @@ def clear_shared(all_node_database, job_name) :
    shared_memory_prefix_plus = f'{shared_memory_prefix}_{job_name}'
    #
    # name
-   for name in  [ '_number_cpu_inuse', '_job_status' ] :
+   for name in at_cascade.shared_job_class.suffix_list :
       #
       # shared_memory_name
       shared_memory_name = shared_memory_prefix_plus + name
@@ -76,6 +76,13 @@ for this parameter.
    of the splitting covariate in *shared_unique*  .
    (The splitting covariate is sex in the :ref:`csv.fit-name` case.)
 
+resume
+******
+If this is true, the previous call to continue_cascade with the same
+arguments did not complete; e.g., because the system crashed.
+The jobs that completed during the previous call are not run again;
+see :ref:`fit_parallel@resume` .
+
 {xrst_end   continue_cascade}
 '''
 import time
@@ -92,12 +99,14 @@ def continue_cascade(
    fit_goal_set      = None,
    fit_type_list     = [ 'both', 'fixed' ],
    shared_unique     = '',
+   resume            = False,
 ) :
    assert type(all_node_database) == str
    assert type(fit_database) == str
    assert type(fit_goal_set)      == set
    assert type(fit_type_list)     == list
    assert type(shared_unique)     == str
+   assert type(resume)            == bool
    # END_DEF
    #
    # split_reference_table, option_all, node_split_table, fit_goal
@@ -201,4 +210,5 @@ def continue_cascade(
       max_number_cpu    = max_number_cpu,
       fit_type_list     = fit_type_list,
       shared_unique     = shared_unique,
+      resume            = resume,
    )
@@ -149,7 +149,31 @@ end_child_job_id
 This is the job_id plus one for the last job that can run as soon as
 this job is completed. If end_child_job_id is equal to start_child_job_id,
 there are no jobs that require the results of this job.
-Note that this job is the parent of each job between the start and end,
+Note that this job is the parent of each job between the start and end.
+
+The start_child_job_id and end_child_job_id keys are not present when
+*prior_only* is true.
+
+job_depth
+=========
+This ``int`` is the number of generations between the first job in the
+job table and this job; i.e., the first job has depth zero,
+its children have depth one, and so on.
+
+preorder_id
+===========
+This ``int`` is the index of this job in a depth first (preorder) traversal
+of the job table, where the children of each job are visited in job_id order.
+
+end_preorder_id
+===============
+This ``int`` is one plus the maximum *preorder_id* for this job and all
+its descendants. It follows that job *j* is a descendant of job *i*
+(or equal to job *i* ) if and only if
+
+|  *job_table* [ *i* ] [ ``'preorder_id'`` ]
+   <= *job_table* [ *j* ] [ ``'preorder_id'`` ]
+   < *job_table* [ *i* ] [ ``'end_preorder_id'`` ]
 
 
 {xrst_end create_job_table}
@@ -412,6 +436,40 @@ def create_job_table(
       # job_id
       job_id += 1
    #
+   # job_table: job_depth
+   # parents come before children in the job table
+   for row in job_table :
+      parent_job_id = row['parent_job_id']
+      if parent_job_id == None :
+         row['job_depth'] = 0
+      else :
+         row['job_depth'] = job_table[parent_job_id]['job_depth'] + 1
+   #
+   # job_table: preorder_id
+   # job_stack is the jobs that have not yet been visited
+   preorder_id = 0
+   job_stack   = [ 0 ]
+   while len(job_stack) > 0 :
+      job_id = job_stack.pop()
+      row    = job_table[job_id]
+      row['preorder_id'] = preorder_id
+      preorder_id       += 1
+      if not row['prior_only'] :
+         child_range = range(row['start_child_job_id'], row['end_child_job_id'])
+         job_stack  += reversed(child_range)
+   #
+   # job_table: end_preorder_id
+   # children come after parents in the job table
+   for row in job_table :
+      row['end_preorder_id'] = row['preorder_id'] + 1
+   for job_id in reversed( range( len(job_table) ) ) :
+      parent_job_id = job_table[job_id]['parent_job_id']
+      if parent_job_id != None :
+         parent_row = job_table[parent_job_id]
+         parent_row['end_preorder_id'] = max(
+            parent_row['end_preorder_id'], job_table[job_id]['end_preorder_id']
+         )
+   #
    # BEGIN_RETURN
    # ...
    assert type(job_table)      == list
@@ -111,9 +111,32 @@ The mean of the dage and dtime priors
 are replaced using the corresponding difference in the
 predict tables in the *fit_database*.
 
-Log Table
-=========
-There is no log table in the shifted databases.
+Tables
+======
+Each shift database only contains dismod_at input tables
+(the result tables are created by the dismod_at init command).
+A template database, ``shift_template.db`` in the same directory as
+*fit_database* , is created once, in one transaction,
+using the schema of the input tables in *fit_database* .
+Only the following data is copied to the template:
+
+#. The input tables that are in *fit_database* and are not changed by the
+   shift; e.g., the constant tables when *fit_database* contains them.
+#. The covariate, mulcov, nslist, nslist_pair, option, prior, rate,
+   smooth, and smooth_grid tables for the shift.
+   The structure of these tables is the same for all the shift databases.
+
+Each shift database is a copy of the template followed by one transaction
+that sets the values that depend on the shift node; i.e.,
+the covariate references, the parent_node_name and other_database options,
+and the mean and std for the priors that depend on the fit.
+The avgint table is empty.
+There is no log table, no at_cascade_timing table
+(see :ref:`stage_timer_class-name` ), and none of the
+fit_var, sample, or c_shift tables in the shifted databases.
+The template database is removed before create_shift_db returns
+unless *lazy_shift* is not empty; see
+:ref:`create_shift_db@lazy_shift@Template` .
 
 no_ode_fit
 **********
@@ -131,6 +154,87 @@ job_table
 If *no_ode_fit* is true this argument must be None.
 Otherwise it is the :ref:`create_job_table@job_table` for this cascade.
 
+stage_timer
+***********
+If this argument is not None, it is a :ref:`stage_timer_class-name` object.
+The ``stop`` method is called with *stage* equal to
+``shift`` *shift_name* after each shift database is created.
+Because the shift databases may be created at the same time,
+this is the time since the previous shift database was completed.
+
+extra_cpu
+*********
+If this argument is not None, it has the same meaning as
+:ref:`fit_one_job@extra_cpu` and the cpus it reserves are used to
+create the shift databases at the same time.
+The process that calls create_shift_db creates one shift database at a time
+while a pool, with one process for each reserved cpu,
+creates the others.
+(Threads are not used because they cannot run python code at the same time.)
+The pool processes are started using fork,
+so the values used to create the shift databases are not copied.
+A cpu is returned as soon as there are fewer shift databases left to create
+than processes.
+If it is None, or no cpus are available,
+the shift databases are created one at a time by the calling process.
+
+shift_done
+**********
+If this argument is not None,
+*shift_done* ( *shift_name* ) is called, in the thread that called
+create_shift_db, as soon as *shift_databases* [ *shift_name* ] is complete.
+This can be used to start fitting a child before its siblings
+shift databases are created.
+
+lazy_shift
+**********
+If this argument is not None, it is a ``set`` of shift names
+(keys in *shift_databases* ).
+The shift databases for these names are not created by create_shift_db.
+Instead, the values that depend on the shift node are stored in the
+c_shift_summary table (see below), the template database is not removed,
+and *shift_database* [ *shift_name* ] is removed if it exists
+(it would correspond to a previous fit of this node).
+The shift database is created when it is needed by
+:ref:`materialize_shift_db-name` .
+For these names, *shift_done* is called after the
+c_shift_summary table is complete and the other shift databases
+have been created (because the template may be removed as soon as
+all the deferred shift databases have been created).
+
+c_shift_summary Table
+=====================
+This table is in *fit_database* .
+It has one row for each value that is changed,
+when a copy of the template database is converted to a deferred
+shift database.
+Each call to create_shift_db replaces the rows for the databases in
+*shift_databases* and does not change the other rows.
+The rows for a shift database are removed when it is created by
+:ref:`materialize_shift_db-name` .
+It has the following columns:
+
+.. csv-table::
+   :header-rows: 1
+
+   Column,          Type,    Meaning
+   shift_database,  text,    normalized path for this shift database
+   table_name,      text,    table that is changed
+   row_id,          integer, primary key for the row that is changed
+   col_name,        text,    column that is changed
+   value,           any,     new value for this row and column
+
+Template
+========
+The template database is removed when the last row is removed from
+the c_shift_summary table; i.e., when all the deferred shift databases
+have been created.
+If the table has rows for shift databases that are not in
+*shift_databases* , they were deferred by a previous fit of *fit_database* .
+These databases are created, using the previous template,
+before the template is replaced; e.g., when :ref:`delta_cascade-name`
+only refits some of the children.
+
 {xrst_end create_shift_db}
 '''
 # ----------------------------------------------------------------------------
@@ -138,10 +242,233 @@ import os
 import math
 import copy
 import shutil
+import tempfile
 import numpy
+import multiprocessing
+import concurrent.futures
 import dismod_at
 import at_cascade
 # ----------------------------------------------------------------------------
+# input_table_list
+# dismod_at input tables; i.e., the tables that are copied to a shift database
+input_table_list = [
+   'age',
+   'avgint',
+   'covariate',
+   'data',
+   'density',
+   'integrand',
+   'mulcov',
+   'node',
+   'nslist',
+   'nslist_pair',
+   'option',
+   'prior',
+   'rate',
+   'rate_eff_cov',
+   'smooth',
+   'smooth_grid',
+   'subgroup',
+   'time',
+   'weight',
+   'weight_grid',
+]
+# ----------------------------------------------------------------------------
+# schema_template = get_schema_template(fit_database)
+# schema_template[table_name] is the command that creates table_name;
+# table_name is in input_table_list and fit_database.
+def get_schema_template(fit_database) :
+   connection = dismod_at.create_connection(
+      fit_database, new = False, readonly = True
+   )
+   command  = "SELECT name, sql FROM sqlite_master WHERE type = 'table'"
+   schema_template = dict()
+   for (table_name, sql) in connection.cursor().execute(command) :
+      if table_name in input_table_list :
+         schema_template[table_name] = sql
+   connection.close()
+   return schema_template
+# ----------------------------------------------------------------------------
+# create_lean_db(connection, fit_database, schema_template, shift_table)
+# write the tables to the empty database corresponding to connection in one
+# transaction. The tables in schema_template that are not in shift_table,
+# except for avgint, are copied from fit_database.
+# The rows for the tables in shift_table are shift_table[table_name].
+# The avgint table is empty and has one column for each covariate.
+def create_lean_db(connection, fit_database, schema_template, shift_table) :
+   for table_name in shift_table :
+      assert table_name in schema_template
+   #
+   # cursor
+   cursor = connection.cursor()
+   cursor.execute('ATTACH DATABASE ? AS fit', (fit_database,) )
+   cursor.execute('BEGIN')
+   #
+   for table_name in schema_template :
+      if table_name != 'avgint' :
+         cursor.execute( schema_template[table_name] )
+         if table_name not in shift_table :
+            command  = f'INSERT INTO main.{table_name} '
+            command += f'SELECT * FROM fit.{table_name}'
+            cursor.execute(command)
+         else :
+            command   = f'PRAGMA main.table_info({table_name})'
+            col_name  = [ row[1] for row in cursor.execute(command) ]
+            question  = ', '.join( len(col_name) * ['?'] )
+            command   = f'INSERT INTO main.{table_name} '
+            command  += f'({", ".join(col_name)}) VALUES ({question})'
+            row_list  = list()
+            for (row_id, row) in enumerate( shift_table[table_name] ) :
+               value = [ row_id ] + [ row[name] for name in col_name[1:] ]
+               row_list.append( value )
+            cursor.executemany(command, row_list)
+   #
+   # avgint
+   n_covariate = len( shift_table['covariate'] )
+   col_list    = [ 'avgint_id integer primary key' ]
+   for name in [ 'integrand_id', 'node_id', 'subgroup_id', 'weight_id' ] :
+      col_list.append( f'{name} integer' )
+   for name in [ 'age_lower', 'age_upper', 'time_lower', 'time_upper' ] :
+      col_list.append( f'{name} real' )
+   for covariate_id in range(n_covariate) :
+      col_list.append( f'x_{covariate_id} real' )
+   cursor.execute( f'CREATE TABLE avgint({", ".join(col_list)})' )
+   #
+   connection.commit()
+   cursor.execute('DETACH DATABASE fit')
+# ----------------------------------------------------------------------------
+# shift_update_col
+# shift_update_col[table_name] is the list of columns in table_name that
+# are changed when a copy of the template is converted to a shift database.
+shift_update_col = {
+   'option'    : [ 'option_value' ],
+   'covariate' : [ 'reference' ],
+   'prior'     : [ 'mean', 'std' ],
+}
+# ----------------------------------------------------------------------------
+# update_rows(connection, table_name, col_list, row_dict)
+# for each row_id in row_dict, set the columns in col_list for that row of
+# table_name to the corresponding values in row_dict[row_id].
+# This uses the current transaction for connection; i.e., it does not commit.
+def update_rows(connection, table_name, col_list, row_dict) :
+   set_text  = ', '.join( [ f'{col} = ?' for col in col_list ] )
+   command   = f'UPDATE {table_name} SET {set_text} '
+   command  += f'WHERE {table_name}_id = ?'
+   row_list  = list()
+   for row_id in row_dict :
+      row   = row_dict[row_id]
+      value = [ row[col] for col in col_list ] + [ row_id ]
+      row_list.append( value )
+   connection.cursor().executemany(command, row_list)
+# ----------------------------------------------------------------------------
+# update2shift_db(
+#  all_node_database, template_database, shift_database, update_dict
+# )
+# create shift_database by copying template_database to a temporary file,
+# changing the values in shift_update_col to the values in update_dict
+# in one transaction, running omega_constraint, and then moving the
+# temporary file to shift_database. This is a module level function so
+# that it can be run in another process.
+def update2shift_db(
+   all_node_database, template_database, shift_database, update_dict
+) :
+   (fd, temp_database) = tempfile.mkstemp(
+      suffix = '.db', dir = os.path.dirname(shift_database)
+   )
+   os.close(fd)
+   try :
+      shutil.copyfile(template_database, temp_database)
+      connection = dismod_at.create_connection(
+         temp_database, new = False, readonly = False
+      )
+      for table_name in shift_update_col :
+         col_list = shift_update_col[table_name]
+         update_rows(connection, table_name, col_list, update_dict[table_name])
+      connection.commit()
+      connection.close()
+      at_cascade.omega_constraint(all_node_database, temp_database)
+      os.replace(temp_database, shift_database)
+   finally :
+      if os.path.exists(temp_database) :
+         os.remove(temp_database)
+# ----------------------------------------------------------------------------
+# fork_create_shift
+# fork_create_shift['create_one_shift'] is set by create_shift_db before it
+# forks the processes that run create_forked_shift, so that the values used
+# to compute the shift databases are not pickled.
+fork_create_shift = dict()
+def create_forked_shift(shift_name) :
+   fork_create_shift['create_one_shift'](shift_name)
+# ----------------------------------------------------------------------------
+# shift_database = summary2shift_db(
+#  all_node_database, fit_database, shift_database
+# )
+# If the c_shift_summary table in fit_database has rows for shift_database,
+# create shift_database from the shift_template.db in the same directory as
+# fit_database and these rows. Then remove these rows, and remove the
+# template if no rows remain. If there are no rows for shift_database,
+# nothing is done and None is returned.
+def summary2shift_db(all_node_database, fit_database, shift_database) :
+   #
+   # summary_list
+   # other processes may be changing c_shift_summary; see below
+   connection = dismod_at.create_connection(
+      fit_database, new = False, readonly = True
+   )
+   dismod_at.sql_command(connection, 'PRAGMA busy_timeout = 60000')
+   summary_list = list()
+   if at_cascade.table_exists(connection, 'c_shift_summary') :
+      command  = 'SELECT table_name, row_id, col_name, value '
+      command += 'FROM c_shift_summary WHERE shift_database = ?'
+      key      = os.path.normpath(shift_database)
+      summary_list = connection.cursor().execute(command, (key,) ).fetchall()
+   connection.close()
+   if len(summary_list) == 0 :
+      return None
+   #
+   # update_dict
+   update_dict = dict()
+   for table_name in shift_update_col :
+      update_dict[table_name] = dict()
+   for (table_name, row_id, col_name, value) in summary_list :
+      row_dict = update_dict[table_name]
+      if row_id not in row_dict :
+         row_dict[row_id] = dict()
+      row_dict[row_id][col_name] = value
+   #
+   # template_database
+   fit_dir           = os.path.dirname(fit_database)
+   template_database = os.path.join(fit_dir, 'shift_template.db')
+   if not os.path.exists(template_database) :
+      msg  = f'create_shift_db: {template_database} is missing; '
+      msg += f'it is needed to create {shift_database}'
+      assert False, msg
+   #
+   # shift_database
+   update2shift_db(
+      all_node_database, template_database, shift_database, update_dict
+   )
+   #
+   # c_shift_summary, n_summary
+   # other processes may be doing the same thing for other shift databases
+   connection = dismod_at.create_connection(
+      fit_database, new = False, readonly = False
+   )
+   dismod_at.sql_command(connection, 'PRAGMA busy_timeout = 60000')
+   cursor = connection.cursor()
+   cursor.execute('BEGIN IMMEDIATE')
+   command = 'DELETE FROM c_shift_summary WHERE shift_database = ?'
+   cursor.execute(command, (key,) )
+   command   = 'SELECT count(*) FROM c_shift_summary'
+   n_summary = cursor.execute(command).fetchall()[0][0]
+   connection.commit()
+   connection.close()
+   #
+   # template_database
+   if n_summary == 0 and os.path.exists(template_database) :
+      os.remove(template_database)
+   return shift_database
+# ----------------------------------------------------------------------------
 # cov_reference_list =
 def get_cov_reference_list(
    n_covariate, cov_reference_table, node_id, split_reference_id
@@ -240,18 +567,59 @@ def get_time_id_next_list(smooth_table, smooth_grid_table, time_table ) :
       time_id_next_list.append( time_id_dict )
    return time_id_next_list
 # ----------------------------------------------------------------------------
-# The smoothing for the new shift_table['smooth_grid'] row is the most
-# recent smoothing added to shift_table['smooth']; i.e., its smoothing_id
-# is len( shift_table['smooth'] ) - 1.
+# std = sample_std(sample, mean, eta)
+# sample[i, j] is the i-th sample of the j-th variable and std[j] is the
+# standard deviation of the samples for the j-th variable about mean[j].
+# If eta[j] is not nan, there is a log transformation of this variable before
+# passing it to cppad_mixed. Hence its values are gaussian in log space and
+# std[j] is the inverse log transformation of the standard deviation in log
+# space.
+def sample_std(sample, mean, eta) :
+   std = numpy.sqrt( numpy.mean( (sample - mean) ** 2, axis = 0 ) )
+   #
+   # log_index
+   log_index = numpy.logical_not( numpy.isnan(eta) )
+   if numpy.any(log_index) :
+      sample = sample[:, log_index]
+      mean   = mean[log_index]
+      eta    = eta[log_index]
+      #
+      # log_std
+      log_sample = numpy.log( numpy.maximum(sample, - eta / 5.0) + eta )
+      log_mean   = numpy.log(mean + eta)
+      log_std    = numpy.sqrt(
+         numpy.mean( (log_sample - log_mean) ** 2, axis = 0 )
+      )
+      #
+      # inverse log transformation
+      std[log_index] = (numpy.exp(log_std) - 1) * (mean + eta)
+   return std
+# ----------------------------------------------------------------------------
+# mean = difference_mean(prior_row, mean)
+# mean for a dage or dtime prior corresponding to the difference mean.
+def difference_mean(prior_row, mean) :
+   if prior_row['lower'] != None :
+      if mean < prior_row['lower']  :
+         mean = prior_row['lower']
+   if prior_row['upper'] != None :
+      if prior_row['lower'] < mean :
+         mean = prior_row['upper']
+   return mean
+# ----------------------------------------------------------------------------
+# The smoothing for the new template_table['smooth_grid'] row is the most
+# recent smoothing added to template_table['smooth']; i.e., its smoothing_id
+# is len( template_table['smooth'] ) - 1.
+#
+# If the priors for this grid point depend on the fit, a fill dict is
+# appended to fill_list. It identifies the value, dage, and dtime priors
+# in template_table['prior'] that are set by fill_prior.
 def add_shift_grid_row(
    fit_fit_var,
-   fit_sample,
    fit_table,
-   shift_table,
+   template_table,
+   fill_list,
    fit_grid_row,
    integrand_id,
-   shift_node_id,
-   shift_split_reference_id,
    shift_prior_std_factor,
    freeze,
    copy_row,
@@ -265,9 +633,6 @@ def add_shift_grid_row(
    # value_prior
    # -----------------------------------------------------------------------
    #
-   # split_id
-   split_id = shift_split_reference_id
-   #
    # fit_prior_id
    fit_prior_id    = fit_grid_row['value_prior_id']
    #
@@ -275,20 +640,20 @@ def add_shift_grid_row(
    # shift_value_prior_id
    shift_const_value     = fit_grid_row['const_value']
    shift_value_prior_id  = None
-   dage_fit_var          = None
-   dtime_fit_var         = None
+   fill                  = None
    if shift_const_value is None :
       #
       # fit_prior_row
       fit_prior_row = fit_table['prior'][fit_prior_id]
       #
-      # key
+      # age_id, time_id
       age_id    = fit_grid_row['age_id']
       time_id   = fit_grid_row['time_id']
-      key       = (integrand_id, shift_node_id, split_id, age_id, time_id)
       #
       # lower, upper
+      # freeze is only 'mean' for a mulcov so node_id and split_id are None
       if freeze == 'mean' :
+         key   = (integrand_id, None, None, age_id, time_id)
          lower = fit_fit_var[key]
          upper = fit_fit_var[key]
       else :
@@ -299,70 +664,36 @@ def add_shift_grid_row(
       if upper is None :
          upper = + math.inf
       #
-      # shift_const_value, shift_value_prior_id, shift_table['prior']
+      # shift_const_value, shift_value_prior_id, template_table['prior']
       if lower == upper :
          shift_const_value  = lower
          assert shift_value_prior_id is None
       else :
          assert shift_const_value is None
          #
-         # shift_value_prior_id, shift_prior_row
-         shift_value_prior_id  = len( shift_table['prior'] )
+         # shift_value_prior_id, template_table['prior']
+         shift_value_prior_id  = len( template_table['prior'] )
          shift_prior_row = copy.copy( fit_prior_row )
-         if not copy_row :
-            #
-            # fit_var, dage_fit_var, dtime_fit_var
-            fit_var = fit_fit_var[key]
-            if age_id_next[age_id] != None :
-               next_age_id = age_id_next[age_id]
-               key = (
-                  integrand_id, shift_node_id, split_id, next_age_id, time_id
-               )
-               dage_fit_var = fit_fit_var[key] - fit_var
-            if time_id_next[time_id] != None :
-               next_time_id = time_id_next[time_id]
-               key = (
-                  integrand_id, shift_node_id, split_id, age_id, next_time_id
-               )
-               dtime_fit_var = fit_fit_var[key] - fit_var
-            #
-            # shift_prior_row['mean']
-            mean                     = fit_var
-            mean                     = min(mean, upper)
-            mean                     = max(mean, lower)
-            shift_prior_row['mean']  = mean
-            #
-            # if no_ode_fit then len(fit_sample) is zero
-            if len(fit_sample) > 0 :
-               #
-               # std
-               eta        = fit_prior_row['eta']
-               if eta is None :
-                  std  = numpy.std(fit_sample[key], mean=mean)
-               else:
-                  # There is a log trasnformation of this variable before
-                  # passing it to cppad_mixed. Hence its value are gaussian
-                  # in log space.
-                  #
-                  # log_sample
-                  log_sample = list()
-                  for sample in fit_sample[key] :
-                     sample = max( - eta / 5.0 , sample )
-                     log_sample.append( math.log( sample + eta ) )
-                  #
-                  # log_std
-                  log_mean = math.log(mean + eta)
-                  log_std  = numpy.std(log_sample, mean = log_mean, ddof = 0)
-                  #
-                  # inverse log transformation
-                  std      = (math.exp(log_std) - 1) * (mean + eta)
-               #
-               # shift_prior_row['std']
-               shift_prior_row['std']         = shift_prior_std_factor * std
+         template_table['prior'].append( shift_prior_row )
+         add_index_to_name( template_table['prior'], 'prior_name' )
          #
-         # shift_table['prior']
-         shift_table['prior'].append( shift_prior_row )
-         add_index_to_name( shift_table['prior'], 'prior_name' )
+         # fill_list
+         if not copy_row :
+            fill = {
+               'integrand_id'   : integrand_id              ,
+               'age_id'         : age_id                    ,
+               'time_id'        : time_id                   ,
+               'next_age_id'    : age_id_next[age_id]       ,
+               'next_time_id'   : time_id_next[time_id]     ,
+               'lower'          : lower                     ,
+               'upper'          : upper                     ,
+               'eta'            : fit_prior_row['eta']      ,
+               'std_factor'     : shift_prior_std_factor    ,
+               'value_prior_id' : shift_value_prior_id      ,
+               'dage_prior_id'  : None                      ,
+               'dtime_prior_id' : None                      ,
+            }
+            fill_list.append( fill )
    # -----------------------------------------------------------------------
    # dage_prior
    # -----------------------------------------------------------------------
@@ -372,18 +703,11 @@ def add_shift_grid_row(
    else :
       fit_prior_row      = fit_table['prior'][fit_prior_id]
       shift_prior_row    = copy.copy( fit_prior_row )
-      if dage_fit_var is not None :
-         mean = dage_fit_var
-         if shift_prior_row['lower'] != None :
-            if mean < shift_prior_row['lower']  :
-               mean = shift_prior_row['lower']
-         if shift_prior_row['upper'] != None :
-            if shift_prior_row['lower'] < mean :
-               mean = shift_prior_row['upper']
-         shift_prior_row['mean'] = mean
-      shift_dage_prior_id  = len( shift_table['prior'] )
-      shift_table['prior'].append( shift_prior_row )
-      add_index_to_name( shift_table['prior'], 'prior_name' )
+      shift_dage_prior_id  = len( template_table['prior'] )
+      template_table['prior'].append( shift_prior_row )
+      add_index_to_name( template_table['prior'], 'prior_name' )
+      if fill is not None and fill['next_age_id'] is not None :
+         fill['dage_prior_id'] = shift_dage_prior_id
    # -----------------------------------------------------------------------
    # dtime_prior
    # -----------------------------------------------------------------------
@@ -391,20 +715,13 @@ def add_shift_grid_row(
    if fit_prior_id == None :
       shift_dtime_prior_id= None
    else :
-      fit_prior_row       = fit_table['prior'][fit_prior_id]
+      fit_prior_row         = fit_table['prior'][fit_prior_id]
       shift_prior_row       = copy.copy( fit_prior_row )
-      shift_dtime_prior_id  = len( shift_table['prior'] )
-      if dtime_fit_var is not None :
-         mean = dtime_fit_var
-         if shift_prior_row['lower'] != None :
-            if mean < shift_prior_row['lower']  :
-               mean = shift_prior_row['lower']
-         if shift_prior_row['upper'] != None :
-            if shift_prior_row['lower'] < mean :
-               mean = shift_prior_row['upper']
-         shift_prior_row['mean'] = mean
-      shift_table['prior'].append( shift_prior_row )
-      add_index_to_name( shift_table['prior'], 'prior_name' )
+      shift_dtime_prior_id  = len( template_table['prior'] )
+      template_table['prior'].append( shift_prior_row )
+      add_index_to_name( template_table['prior'], 'prior_name' )
+      if fill is not None and fill['next_time_id'] is not None :
+         fill['dtime_prior_id'] = shift_dtime_prior_id
    # -----------------------------------------------------------------------
    # shift_grid_row
    shift_grid_row = copy.copy( fit_grid_row )
@@ -413,9 +730,107 @@ def add_shift_grid_row(
    shift_grid_row['dage_prior_id']   = shift_dage_prior_id
    shift_grid_row['dtime_prior_id']  = shift_dtime_prior_id
    #
-   # shift_table['smooth_grid']
-   shift_grid_row['smooth_id']  = len( shift_table['smooth'] ) - 1
-   shift_table['smooth_grid'].append( shift_grid_row )
+   # template_table['smooth_grid']
+   shift_grid_row['smooth_id']  = len( template_table['smooth'] ) - 1
+   template_table['smooth_grid'].append( shift_grid_row )
+# ----------------------------------------------------------------------------
+# prior_dict = fill_prior(
+#  template_prior, fill_list, node_id, split_id,
+#  avgint_column, fit_var_array, sample_array
+# )
+# prior_dict[prior_id] is the prior row that replaces template_prior[prior_id]
+# for the node corresponding to node_id and split_id. The prior_id values
+# in prior_dict are the ones in fill_list; i.e., the ones that depend on
+# the fit. The means, and standard deviations if sample_array is not None,
+# are computed using vector operations over all the elements of fill_list.
+def fill_prior(
+   template_prior,
+   fill_list,
+   node_id,
+   split_id,
+   avgint_column,
+   fit_var_array,
+   sample_array,
+) :
+   prior_dict = dict()
+   if len(fill_list) == 0 :
+      return prior_dict
+   #
+   # column, age_column, time_column, sample_column
+   # avgint_id for each fill, for its next age, and for its next time
+   # (the next age and time columns are only used when they exist).
+   # The standard deviation uses the samples for the next time if it exists,
+   # otherwise the next age if it exists, otherwise this grid point.
+   column        = list()
+   age_column    = list()
+   time_column   = list()
+   sample_column = list()
+   for fill in fill_list :
+      integrand_id = fill['integrand_id']
+      age_id       = fill['age_id']
+      time_id      = fill['time_id']
+      key = (integrand_id, node_id, split_id, age_id, time_id)
+      column.append( avgint_column[key] )
+      #
+      next_age_id  = fill['next_age_id']
+      if next_age_id is None :
+         age_column.append( column[-1] )
+      else :
+         key = (integrand_id, node_id, split_id, next_age_id, time_id)
+         age_column.append( avgint_column[key] )
+      #
+      next_time_id = fill['next_time_id']
+      if next_time_id is None :
+         time_column.append( column[-1] )
+      else :
+         key = (integrand_id, node_id, split_id, age_id, next_time_id)
+         time_column.append( avgint_column[key] )
+      #
+      if next_time_id is not None :
+         sample_column.append( time_column[-1] )
+      else :
+         sample_column.append( age_column[-1] )
+   #
+   # fit_var, mean
+   fit_var = fit_var_array[column]
+   lower   = numpy.array( [ fill['lower'] for fill in fill_list ] )
+   upper   = numpy.array( [ fill['upper'] for fill in fill_list ] )
+   mean    = numpy.maximum( numpy.minimum(fit_var, upper), lower )
+   #
+   # dage_fit_var, dtime_fit_var
+   dage_fit_var  = fit_var_array[age_column]  - fit_var
+   dtime_fit_var = fit_var_array[time_column] - fit_var
+   #
+   # std
+   if sample_array is not None :
+      eta = numpy.array( [
+         numpy.nan if fill['eta'] is None else fill['eta']
+         for fill in fill_list
+      ] )
+      std_factor = numpy.array( [ fill['std_factor'] for fill in fill_list ] )
+      sample = sample_array[:, sample_column]
+      std    = std_factor * sample_std(sample, mean, eta)
+   #
+   # prior_dict
+   for (i, fill) in enumerate( fill_list ) :
+      prior_id  = fill['value_prior_id']
+      prior_row = copy.copy( template_prior[prior_id] )
+      prior_row['mean'] = float( mean[i] )
+      if sample_array is not None :
+         prior_row['std'] = float( std[i] )
+      prior_dict[prior_id] = prior_row
+      #
+      for (name, difference) in [
+         ('dage_prior_id', dage_fit_var), ('dtime_prior_id', dtime_fit_var)
+      ] :
+         prior_id = fill[name]
+         if prior_id is not None :
+            prior_row = copy.copy( template_prior[prior_id] )
+            prior_row['mean'] = difference_mean(
+               prior_row, float( difference[i] )
+            )
+            prior_dict[prior_id] = prior_row
+   return prior_dict
 # ----------------------------------------------------------------------------
 # BEGIN_DEF
 # at_cascade.create_shift_db
@@ -425,6 +840,10 @@ def create_shift_db(
    shift_databases      ,
    no_ode_fit           = False,
    job_table            = None,
+   stage_timer          = None,
+   extra_cpu            = None,
+   shift_done           = None,
+   lazy_shift           = None,
 ) :
    assert type(all_node_database) == str
    assert type(fit_database) == str
@@ -434,6 +853,10 @@ def create_shift_db(
       assert job_table == None
    else :
       assert type(job_table) == list
+   assert stage_timer == None or hasattr(stage_timer, 'stop')
+   assert extra_cpu == None or hasattr(extra_cpu, 'acquire')
+   assert shift_done == None or callable(shift_done)
+   assert lazy_shift == None or type(lazy_shift) == set
    # END_DEF
    #
    # predict_sample
@@ -512,9 +935,25 @@ def create_shift_db(
       'var',
    ] :
       fit_table[name] = fit_or_root.get_table(name)
+   #
+   # sample_array
+   # sample_array[sample_index, avgint_id] is the avg_integrand in the
+   # c_shift_predict_sample table. It is None if there are no samples;
+   # e.g., if no_ode_fit is true.
+   n_avgint     = len( fit_table['c_shift_avgint'] )
+   sample_array = None
    if predict_sample :
-      for name in [ 'c_shift_predict_sample', 'sample' ] :
-         fit_table[name] = fit_or_root.get_table(name)
+      command  = 'SELECT sample_index, avgint_id, avg_integrand '
+      command += 'FROM c_shift_predict_sample'
+      cursor   = fit_or_root.fit_connection.cursor()
+      value    = cursor.execute(command).fetchall()
+      if len(value) > 0 :
+         value        = numpy.array(value, dtype = float)
+         sample_index = value[:, 0].astype(int)
+         avgint_id    = value[:, 1].astype(int)
+         n_sample     = int( sample_index.max() ) + 1
+         sample_array = numpy.full( (n_sample, n_avgint), numpy.nan )
+         sample_array[sample_index, avgint_id] = value[:, 2]
    fit_or_root.close()
    #
    # age_id_next_list
@@ -548,35 +987,31 @@ def create_shift_db(
       fit_split_reference_id = cov_info['split_reference_id']
       split_covariate_id     = cov_info['split_covariate_id']
    #
-   # fit_fit_var
-   fit_fit_var = dict()
-   for predict_row in fit_table['c_shift_predict_fit_var'] :
-      avgint_id          = predict_row['avgint_id']
-      avgint_row         = fit_table['c_shift_avgint'][avgint_id]
+   # avgint_column
+   # avgint_column[key] is the avgint_id in c_shift_avgint corresponding to
+   # key = (integrand_id, node_id, split_id, age_id, time_id)
+   avgint_column = dict()
+   for (avgint_id, avgint_row) in enumerate(fit_table['c_shift_avgint']) :
       integrand_id       = avgint_row['integrand_id']
       node_id            = avgint_row['node_id']
       age_id             = avgint_row['c_age_id']
       time_id            = avgint_row['c_time_id']
       split_id           = avgint_row['c_split_reference_id']
       key           = (integrand_id, node_id, split_id, age_id, time_id)
-      assert not key in fit_fit_var
-      fit_fit_var[key] = predict_row['avg_integrand']
+      assert not key in avgint_column
+      avgint_column[key] = avgint_id
    #
-   # fit_sample
-   fit_sample = dict()
-   if predict_sample :
-      for predict_row in fit_table['c_shift_predict_sample'] :
-         avgint_id          = predict_row['avgint_id']
-         avgint_row         = fit_table['c_shift_avgint'][avgint_id]
-         integrand_id       = avgint_row['integrand_id']
-         node_id            = avgint_row['node_id']
-         age_id             = avgint_row['c_age_id']
-         time_id            = avgint_row['c_time_id']
-         split_id           = avgint_row['c_split_reference_id']
-         key           = (integrand_id, node_id, split_id, age_id, time_id)
-         if not key in fit_sample :
-            fit_sample[key] = list()
-         fit_sample[key].append( predict_row['avg_integrand'] )
+   # fit_var_array
+   # fit_var_array[avgint_id] is the avg_integrand in c_shift_predict_fit_var
+   fit_var_array = numpy.full(n_avgint, numpy.nan)
+   for predict_row in fit_table['c_shift_predict_fit_var'] :
+      avgint_id                = predict_row['avgint_id']
+      fit_var_array[avgint_id] = predict_row['avg_integrand']
+   #
+   # fit_fit_var
+   fit_fit_var = dict()
+   for key in avgint_column :
+      fit_fit_var[key] = fit_var_array[ avgint_column[key] ]
    #
    # fit_node_name
    fit_node_name = None
@@ -590,26 +1025,305 @@ def create_shift_db(
    fit_node_id = at_cascade.table_name2id(
       fit_table['node'], 'node', fit_node_name
    )
-   for shift_name in shift_databases :
-      # ---------------------------------------------------------------------
-      # create shift_databases[shift_name]
-      # ---------------------------------------------------------------------
+   #
+   # mulcov_freeze_dict
+   if no_ode_fit :
+      mulcov_freeze_dict = dict()
+   else :
+      mulcov_freeze_dict = at_cascade.get_freeze_dict(
+         fit_table['node'],
+         fit_node_id,
+         fit_split_reference_id,
+         all_table['mulcov_freeze'],
+      )
+   # ------------------------------------------------------------------------
+   # template_table, mulcov_fill_list, rate_fill_list
+   # The shift databases have the same tables except for the values in
+   # the following: the covariate reference column, the parent_node_name
+   # and other_database rows of the option table, and the prior rows
+   # in rate_fill_list.
+   # ------------------------------------------------------------------------
+   #
+   # template_table
+   template_table = dict()
+   for name in [
+      'covariate',
+      'mulcov',
+      'option',
+      'rate',
+   ] :
+      if name not in at_cascade.constant_table_list :
+         template_table[name] = copy.deepcopy(fit_table[name])
+   template_table['prior']       = list()
+   template_table['smooth']      = list()
+   template_table['smooth_grid'] = list()
+   template_table['nslist']      = list()
+   template_table['nslist_pair'] = list()
+   #
+   # smooth_grid_list
+   # smooth_grid_list[smooth_id] is the list of rows in the fit smooth_grid
+   # table that have this smooth_id
+   smooth_grid_list = [ list() for row in fit_table['smooth'] ]
+   for fit_grid_row in fit_table['smooth_grid'] :
+      smooth_grid_list[ fit_grid_row['smooth_id'] ].append( fit_grid_row )
+   # --------------------------------------------------------------------
+   # template_table['mulcov']
+   # and corresponding entries in
+   # smooth, smooth_grid, and prior
+   mulcov_fill_list = list()
+   for (mulcov_id, shift_mulcov_row) in enumerate(template_table['mulcov']) :
+      assert shift_mulcov_row['subgroup_smooth_id'] is None
       #
-      # shift_table
-      shift_table = dict()
-      for name in [
-         'covariate',
-         'mulcov',
-         'option',
-         'rate',
-      ] :
-         if name not in at_cascade.constant_table_list :
-            shift_table[name] = copy.deepcopy(fit_table[name])
-      shift_table['prior']       = list()
-      shift_table['smooth']      = list()
-      shift_table['smooth_grid'] = list()
-      shift_table['nslist']      = list()
-      shift_table['nslist_pair'] = list()
+      # fit_smooth_id
+      fit_smooth_id = shift_mulcov_row['group_smooth_id']
+      if not fit_smooth_id is None :
+         #
+         # integrand_id
+         # This is the integrand_id corresponding to this mulcov value.
+         # The integrand_id that is affected by the mulcov is called
+         # affected_id below.
+         name         = 'mulcov_' + str(mulcov_id)
+         integrand_id = at_cascade.table_name2id(
+            fit_table['integrand'], 'integrand', name
+         )
+         #
+         # smooth_row
+         smooth_row = fit_table['smooth'][fit_smooth_id]
+         smooth_row = copy.copy(smooth_row)
+         assert smooth_row['mulstd_value_prior_id'] is None
+         assert smooth_row['mulstd_dage_prior_id']  is None
+         assert smooth_row['mulstd_dtime_prior_id'] is None
+         #
+         # template_table['smooth'], shift_smooth_id
+         shift_smooth_id = len(template_table['smooth'])
+         smooth_row['smooth_name'] += f'_{shift_smooth_id}'
+         template_table['smooth'].append(smooth_row)
+         #
+         # change template_table['mulcov'] to use the new smoothing
+         shift_mulcov_row['group_smooth_id'] = shift_smooth_id
+         #
+         # freeze
+         assert len(mulcov_freeze_dict) == 0 or not no_ode_fit
+         if mulcov_id in mulcov_freeze_dict :
+            if freeze_type == 'mean' :
+               freeze = 'mean'
+            elif mulcov_freeze_dict[mulcov_id] == 'posterior' :
+               freeze = 'no'
+            else :
+               assert mulcov_freeze_dict[mulcov_id] == 'prior'
+               freeze = 'prior'
+         else :
+            freeze = 'no'
+         #
+         # copy_row
+         copy_row = freeze == 'prior'
+         if no_ode_fit :
+            mulcov_type = shift_mulcov_row['mulcov_type']
+            if mulcov_type == 'rate_value' :
+               rate_id   = shift_mulcov_row['rate_id']
+               rate_name = template_table['rate'][rate_id]['rate_name']
+               if rate_name in no_ode_ignore.split() :
+                  copy_row = True
+            if mulcov_type == 'meas_value' :
+               affected_id    = shift_mulcov_row['integrand_id']
+               integrand_row  = fit_table['integrand'][affected_id]
+               integrand_name = integrand_row['integrand_name']
+               if integrand_name in no_ode_ignore.split() :
+                  copy_row = True
+         #
+         # template_table['smooth_grid']
+         # add rows for this smoothing
+         for fit_grid_row in smooth_grid_list[fit_smooth_id] :
+            add_shift_grid_row(
+               fit_fit_var,
+               fit_table,
+               template_table,
+               mulcov_fill_list,
+               fit_grid_row,
+               integrand_id,
+               shift_prior_std_factor_mulcov,
+               freeze,
+               copy_row,
+               age_id_next_list[fit_smooth_id],
+               time_id_next_list[fit_smooth_id],
+            )
+   #
+   # template_table['prior']
+   # the mulcov priors do not depend on the shift node
+   node_id    = None
+   split_id   = None
+   prior_dict = fill_prior(
+      template_table['prior'],
+      mulcov_fill_list,
+      node_id,
+      split_id,
+      avgint_column,
+      fit_var_array,
+      sample_array,
+   )
+   for prior_id in prior_dict :
+      template_table['prior'][prior_id] = prior_dict[prior_id]
+   # --------------------------------------------------------------------
+   # template_table['rate']
+   # and corresponding entries in the following child tables:
+   # smooth, smooth_grid, and prior
+   rate_fill_list = list()
+   for shift_rate_row in template_table['rate'] :
+      # rate_name
+      rate_name        = shift_rate_row['rate_name']
+      # ----------------------------------------------------------------
+      # fit_smooth_id
+      fit_smooth_id = None
+      if rate_name in name_rate2integrand :
+         assert shift_rate_row['child_nslist_id'] is None
+         fit_smooth_id = shift_rate_row['parent_smooth_id']
+      else :
+         # proper priors for omega are set by omega_constraint routine
+         assert rate_name == 'omega'
+         shift_rate_row['parent_smooth_id'] = None
+         shift_rate_row['child_smooth_id']  = None
+         shift_rate_row['child_nslist_id']  = None
+      if not fit_smooth_id is None :
+         #
+         # integrand_id
+         # only check for integrands that are used
+         integrand_name  = name_rate2integrand[rate_name]
+         integrand_id = at_cascade.table_name2id(
+            fit_table['integrand'], 'integrand', integrand_name
+         )
+         #
+         # smooth_row
+         smooth_row = fit_table['smooth'][fit_smooth_id]
+         smooth_row = copy.copy(smooth_row)
+         assert smooth_row['mulstd_value_prior_id'] is None
+         assert smooth_row['mulstd_dage_prior_id']  is None
+         assert smooth_row['mulstd_dtime_prior_id'] is None
+         #
+         # : template_table['smooth'], shift_smooth_id
+         shift_smooth_id = len(template_table['smooth'])
+         smooth_row['smooth_name'] += f'_{shift_smooth_id}'
+         template_table['smooth'].append(smooth_row)
+         #
+         # template_table['rate']
+         # use the new smoothing for this rate
+         shift_rate_row['parent_smooth_id'] = shift_smooth_id
+         #
+         # freeze
+         freeze = 'no'
+         #
+         # copy_row
+         copy_row = False
+         if no_ode_fit :
+            if rate_name in no_ode_ignore.split() :
+               copy_row = True
+         #
+         # template_table['smooth_grid']
+         # add rows for this smoothing
+         for fit_grid_row in smooth_grid_list[fit_smooth_id] :
+            add_shift_grid_row(
+               fit_fit_var,
+               fit_table,
+               template_table,
+               rate_fill_list,
+               fit_grid_row,
+               integrand_id,
+               shift_prior_std_factor,
+               freeze,
+               copy_row,
+               age_id_next_list[fit_smooth_id],
+               time_id_next_list[fit_smooth_id],
+            )
+      # ----------------------------------------------------------------
+      # fit_smooth_id
+      fit_smooth_id = None
+      if rate_name in name_rate2integrand :
+         fit_smooth_id = shift_rate_row['child_smooth_id']
+      if not fit_smooth_id is None :
+         #
+         smooth_row = fit_table['smooth'][fit_smooth_id]
+         smooth_row = copy.copy(smooth_row)
+         #
+         assert smooth_row['mulstd_value_prior_id'] is None
+         assert smooth_row['mulstd_dage_prior_id']  is None
+         assert smooth_row['mulstd_dtime_prior_id'] is None
+         if rate_name == 'pini' :
+            assert smooth_row['n_age'] == 1
+         #
+         # update: template_table['smooth']
+         # for case where its is the parent
+         shift_smooth_id = len(template_table['smooth'])
+         smooth_row['smooth_name'] += f'_{shift_smooth_id}'
+         template_table['smooth'].append(smooth_row)
+         #
+         # change template_table['rate'] to use the new smoothing
+         shift_rate_row['child_smooth_id'] = shift_smooth_id
+         #
+         # add rows for this smoothing to template_table['smooth_grid']
+         for fit_grid_row in smooth_grid_list[fit_smooth_id] :
+            #
+            # update: template_table['smooth_grid']
+            shift_grid_row = copy.copy( fit_grid_row )
+            #
+            for ty in [
+               'value_prior_id', 'dage_prior_id', 'dtime_prior_id'
+                   ] :
+               prior_id  = fit_grid_row[ty]
+               if prior_id is None :
+                  shift_grid_row[ty] = None
+               else :
+                  prior_row = fit_table['prior'][prior_id]
+                  prior_row = copy.copy(prior_row)
+                  prior_id  = len( template_table['prior'] )
+                  template_table['prior'].append( prior_row )
+                  add_index_to_name(
+                     template_table['prior'], 'prior_name'
+                  )
+                  shift_grid_row[ty] = prior_id
+            shift_grid_row['smooth_id']      = shift_smooth_id
+            template_table['smooth_grid'].append( shift_grid_row )
+   #
+   # pending_list
+   # shift databases that a previous call deferred and are not replaced by
+   # this call (e.g. a delta_cascade that only refits some children).
+   # They are created now because they depend on the previous template.
+   normpath_set = set()
+   for shift_name in shift_databases :
+      normpath_set.add( os.path.normpath( shift_databases[shift_name] ) )
+   pending_list = list()
+   connection   = dismod_at.create_connection(
+      fit_database, new = False, readonly = True
+   )
+   dismod_at.sql_command(connection, 'PRAGMA busy_timeout = 60000')
+   if at_cascade.table_exists(connection, 'c_shift_summary') :
+      command  = 'SELECT DISTINCT shift_database FROM c_shift_summary'
+      for (shift_database,) in connection.cursor().execute(command) :
+         if shift_database not in normpath_set :
+            pending_list.append(shift_database)
+   connection.close()
+   for shift_database in pending_list :
+      summary2shift_db(all_node_database, fit_database, shift_database)
+   #
+   # template_database
+   # a database that is copied to each of the shift databases
+   fit_dir           = os.path.dirname(fit_database)
+   template_database = os.path.join(fit_dir, 'shift_template.db')
+   if os.path.exists(template_database) :
+      os.remove(template_database)
+   schema_template     = get_schema_template(fit_database)
+   template_connection = dismod_at.create_connection(
+      template_database, new = True, readonly = False
+   )
+   create_lean_db(
+      template_connection, fit_database, schema_template, template_table
+   )
+   template_connection.close()
+   # ------------------------------------------------------------------------
+   # update_dict = shift_update(shift_name)
+   # update_dict[table_name][row_id][col_name] is the value that converts
+   # the template to shift_databases[shift_name] where col_name is in
+   # shift_update_col[table_name]. This may run at the same time
+   # as other calls, so it only reads the variables above.
+   def shift_update(shift_name) :
       #
       # shift_node_name, shift_split_reference_name
       shift_node_name            = None
@@ -644,34 +1358,24 @@ def create_shift_db(
          fit_table['node'], 'node', shift_node_name
       )
       #
-      # mulcov_freeze_dict
-      if no_ode_fit :
-         mulcov_freeze_dict = dict()
-      else :
-         mulcov_freeze_dict = at_cascade.get_freeze_dict(
-            fit_table['node'],
-            fit_node_id,
-            fit_split_reference_id,
-            all_table['mulcov_freeze'],
-         )
-      #
       # shift_database     = fit_database
       shift_database = shift_databases[shift_name]
-      shutil.copyfile(fit_database, shift_database)
       #
-      # shift_table['option']
+      # option_dict
       # Set value for parent_node_name and other_database
-      for row in shift_table['option'] :
+      option_dict = dict()
+      for (option_id, row) in enumerate( template_table['option'] ) :
          if row['option_name'] == 'parent_node_name' :
-            row['option_value'] = shift_node_name
+            option_dict[option_id] = { 'option_value' : shift_node_name }
          if row['option_name'] == 'other_database' :
             if os.path.isabs( root_database ) :
-               row['option_value'] = root_database
+               option_value = root_database
             else :
                dirname       = os.path.dirname( shift_database )
                relative_path = os.path.relpath( root_database, dirname)
-               row['option_value'] = str( relative_path )
-         #
+               option_value  = str( relative_path )
+            option_dict[option_id] = { 'option_value' : option_value }
+      #
       # cov_reference_list
       node_id = fit_table['node'][shift_node_id]['parent']
       assert shift_node_id == fit_node_id or node_id == fit_node_id
@@ -683,252 +1387,180 @@ def create_shift_db(
          shift_split_reference_id
       )
       #
-      # shift_table['covariate']
-      # set relative covariate values so correspond to shift node
-      for (covariate_id, shift_row) in enumerate(shift_table['covariate']) :
-            shift_row['reference'] =  cov_reference_list[covariate_id]
-
-      #
-      # shift_table['covariate']
+      # cov_reference_list
       # set shift covaraite value
       if shift_split_reference_id is not None :
          split_row  = all_table['split_reference'][shift_split_reference_id]
          reference  = split_row['split_reference_value']
-         shift_row  = shift_table['covariate'][split_covariate_id]
-         shift_row['reference'] = reference
+         cov_reference_list[split_covariate_id] = reference
       #
-      # --------------------------------------------------------------------
-      # shift_table['mulcov']
-      # and corresponding entries in
-      # smooth, smooth_grid, and prior
-      for (mulcov_id, shift_mulcov_row) in enumerate(shift_table['mulcov']) :
-         assert shift_mulcov_row['subgroup_smooth_id'] is None
-         #
-         # fit_smooth_id
-         fit_smooth_id = shift_mulcov_row['group_smooth_id']
-         if not fit_smooth_id is None :
-            #
-            # integrand_id
-            # This is the integrand_id corresponding to this mulcov value.
-            # The integrand_id that is affected by the mulcov is called
-            # affected_id below.
-            name         = 'mulcov_' + str(mulcov_id)
-            integrand_id = at_cascade.table_name2id(
-               fit_table['integrand'], 'integrand', name
-            )
-            #
-            # smooth_row
-            smooth_row = fit_table['smooth'][fit_smooth_id]
-            smooth_row = copy.copy(smooth_row)
-            assert smooth_row['mulstd_value_prior_id'] is None
-            assert smooth_row['mulstd_dage_prior_id']  is None
-            assert smooth_row['mulstd_dtime_prior_id'] is None
-            #
-            # shift_table['smooth'], shift_smooth_id
-            shift_smooth_id = len(shift_table['smooth'])
-            smooth_row['smooth_name'] += f'_{shift_smooth_id}'
-            shift_table['smooth'].append(smooth_row)
-            #
-            # change shift_table['mulcov'] to use the new smoothing
-            shift_mulcov_row['group_smooth_id'] = shift_smooth_id
-            #
-            # freeze
-            assert len(mulcov_freeze_dict) == 0 or not no_ode_fit
-            if mulcov_id in mulcov_freeze_dict :
-               if freeze_type == 'mean' :
-                  freeze = 'mean'
-               elif mulcov_freeze_dict[mulcov_id] == 'posterior' :
-                  freeze = 'no'
-               else :
-                  assert mulcov_freeze_dict[mulcov_id] == 'prior'
-                  freeze = 'prior'
-            else :
-               freeze = 'no'
-            #
-            # copy_row
-            copy_row = freeze == 'prior'
-            if no_ode_fit :
-               mulcov_type = shift_mulcov_row['mulcov_type']
-               if mulcov_type == 'rate_value' :
-                  rate_id   = shift_mulcov_row['rate_id']
-                  rate_name = shift_table['rate'][rate_id]['rate_name']
-                  if rate_name in no_ode_ignore.split() :
-                     copy_row = True
-               if mulcov_type == 'meas_value' :
-                  affected_id    = shift_mulcov_row['integrand_id']
-                  integrand_row  = fit_table['integrand'][affected_id]
-                  integrand_name = integrand_row['integrand_name']
-                  if integrand_name in no_ode_ignore.split() :
-                     copy_row = True
-            #
-            # shift_table['smooth_grid']
-            # add rows for this smoothing
-            node_id  = None
-            split_id = None
-            for fit_grid_row in fit_table['smooth_grid'] :
-               if fit_grid_row['smooth_id'] == fit_smooth_id :
-                  add_shift_grid_row(
-                     fit_fit_var,
-                     fit_sample,
-                     fit_table,
-                     shift_table,
-                     fit_grid_row,
-                     integrand_id,
-                     node_id,
-                     split_id,
-                     shift_prior_std_factor_mulcov,
-                     freeze,
-                     copy_row,
-                     age_id_next_list[fit_smooth_id],
-                     time_id_next_list[fit_smooth_id],
-                  )
-
-      # --------------------------------------------------------------------
-      # shift_table['rate']
-      # and corresponding entries in the following child tables:
-      # smooth, smooth_grid, and prior
-      for shift_rate_row in shift_table['rate'] :
-         # rate_name
-         rate_name        = shift_rate_row['rate_name']
-         # ----------------------------------------------------------------
-         # fit_smooth_id
-         fit_smooth_id = None
-         if rate_name in name_rate2integrand :
-            assert shift_rate_row['child_nslist_id'] is None
-            fit_smooth_id = shift_rate_row['parent_smooth_id']
-         else :
-            # proper priors for omega are set by omega_constraint routine
-            assert rate_name == 'omega'
-            shift_rate_row['parent_smooth_id'] = None
-            shift_rate_row['child_smooth_id']  = None
-            shift_rate_row['child_nslist_id']  = None
-         if not fit_smooth_id is None :
-            #
-            # integrand_id
-            # only check for integrands that are used
-            integrand_name  = name_rate2integrand[rate_name]
-            integrand_id = at_cascade.table_name2id(
-               fit_table['integrand'], 'integrand', integrand_name
-            )
-            #
-            # smooth_row
-            smooth_row = fit_table['smooth'][fit_smooth_id]
-            smooth_row = copy.copy(smooth_row)
-            assert smooth_row['mulstd_value_prior_id'] is None
-            assert smooth_row['mulstd_dage_prior_id']  is None
-            assert smooth_row['mulstd_dtime_prior_id'] is None
-            #
-            # : shift_table['smooth'], shift_smooth_id
-            shift_smooth_id = len(shift_table['smooth'])
-            smooth_row['smooth_name'] += f'_{shift_smooth_id}'
-            shift_table['smooth'].append(smooth_row)
-            #
-            # shift_table['rate']
-            # use the new smoothing for this rate
-            shift_rate_row['parent_smooth_id'] = shift_smooth_id
-            #
-            # freeze
-            freeze = 'no'
-            #
-            # copy_row
-            copy_row = False
-            if no_ode_fit :
-               if rate_name in no_ode_ignore.split() :
-                  copy_row = True
-            #
-            # shift_table['smooth_grid']
-            # add rows for this smoothing
-            for fit_grid_row in fit_table['smooth_grid'] :
-               if fit_grid_row['smooth_id'] == fit_smooth_id :
-                  add_shift_grid_row(
-                     fit_fit_var,
-                     fit_sample,
-                     fit_table,
-                     shift_table,
-                     fit_grid_row,
-                     integrand_id,
-                     shift_node_id,
-                     shift_split_reference_id,
-                     shift_prior_std_factor,
-                     freeze,
-                     copy_row,
-                     age_id_next_list[fit_smooth_id],
-                     time_id_next_list[fit_smooth_id],
-                  )
-         # ----------------------------------------------------------------
-         # fit_smooth_id
-         fit_smooth_id = None
-         if rate_name in name_rate2integrand :
-            fit_smooth_id = shift_rate_row['child_smooth_id']
-         if not fit_smooth_id is None :
-            #
-            smooth_row = fit_table['smooth'][fit_smooth_id]
-            smooth_row = copy.copy(smooth_row)
-            #
-            assert smooth_row['mulstd_value_prior_id'] is None
-            assert smooth_row['mulstd_dage_prior_id']  is None
-            assert smooth_row['mulstd_dtime_prior_id'] is None
-            if rate_name == 'pini' :
-               assert smooth_row['n_age'] == 1
-            #
-            # update: shift_table['smooth']
-            # for case where its is the parent
-            shift_smooth_id = len(shift_table['smooth'])
-            smooth_row['smooth_name'] += f'_{shift_smooth_id}'
-            shift_table['smooth'].append(smooth_row)
-            #
-            # change shift_table['rate'] to use the new smoothing
-            shift_rate_row['child_smooth_id'] = shift_smooth_id
-            #
-            # add rows for this smoothing to shift_table['smooth_grid']
-            for fit_grid_row in fit_table['smooth_grid'] :
-               if fit_grid_row['smooth_id'] == fit_smooth_id :
-                  #
-                  # update: shift_table['smooth_grid']
-                  shift_grid_row = copy.copy( fit_grid_row )
-                  #
-                  for ty in [
-                     'value_prior_id', 'dage_prior_id', 'dtime_prior_id'
-                         ] :
-                     prior_id  = fit_grid_row[ty]
-                     if prior_id is None :
-                        shift_grid_row[ty] = None
-                     else :
-                        prior_row = fit_table['prior'][prior_id]
-                        prior_row = copy.copy(prior_row)
-                        prior_id  = len( shift_table['prior'] )
-                        shift_table['prior'].append( prior_row )
-                        add_index_to_name(
-                           shift_table['prior'], 'prior_name'
-                        )
-                        shift_grid_row[ty] = prior_id
-                  shift_grid_row['smooth_id']      = shift_smooth_id
-                  shift_table['smooth_grid'].append( shift_grid_row )
-      #
-      # shift_connection
-      new        = False
-      shift_connection = dismod_at.create_connection(shift_database, new)
-      #
-      # replace shift_table
-      for name in shift_table :
-         dismod_at.replace_table(
-            shift_connection, name, shift_table[name]
-         )
-      #
-      # empty_avgint_table
-      at_cascade.empty_avgint_table(shift_connection)
-      #
-      # drop the following tables:
-      # log, c_shift_avgint, c_shift_predict_sample, c_shift_predict_fit_var
-      drop_list = [ 'log', 'c_shift_avgint' , 'c_shift_predict_fit_var' ]
-      if predict_sample :
-         drop_list.append(  'c_shift_predict_sample' )
-      for table_name in drop_list :
-         command  = f'DROP TABLE {table_name}'
-         dismod_at.sql_command(shift_connection, command)
+      # covariate_dict
+      # set relative covariate values so correspond to shift node
+      covariate_dict = dict()
+      for covariate_id in range(n_covariate) :
+         reference = cov_reference_list[covariate_id]
+         covariate_dict[covariate_id] = { 'reference' : reference }
       #
-      # shift_connection
-      shift_connection.close()
+      # prior_dict
+      prior_dict = fill_prior(
+         template_table['prior'],
+         rate_fill_list,
+         shift_node_id,
+         shift_split_reference_id,
+         avgint_column,
+         fit_var_array,
+         sample_array,
+      )
       #
-      # shift_database
-      at_cascade.omega_constraint(all_node_database, shift_database)
+      update_dict = {
+         'option'    : option_dict    ,
+         'covariate' : covariate_dict ,
+         'prior'     : prior_dict     ,
+      }
+      return update_dict
+   # ------------------------------------------------------------------------
+   #
+   # lazy_list, eager_list
+   lazy_list  = list()
+   eager_list = list()
+   for shift_name in shift_databases :
+      if lazy_shift is not None and shift_name in lazy_shift :
+         lazy_list.append(shift_name)
+      else :
+         eager_list.append(shift_name)
+   #
+   # c_shift_summary
+   summary_list = list()
+   for shift_name in lazy_list :
+      shift_database = shift_databases[shift_name]
+      if os.path.exists(shift_database) :
+         os.remove(shift_database)
+      update_dict    = shift_update(shift_name)
+      shift_database = os.path.normpath(shift_database)
+      for table_name in shift_update_col :
+         row_dict = update_dict[table_name]
+         for row_id in row_dict :
+            for col_name in shift_update_col[table_name] :
+               value = row_dict[row_id][col_name]
+               summary_list.append(
+                  (shift_database, table_name, row_id, col_name, value)
+               )
+   # children of a previous fit may be using this table; see summary2shift_db
+   connection = dismod_at.create_connection(
+      fit_database, new = False, readonly = False
+   )
+   dismod_at.sql_command(connection, 'PRAGMA busy_timeout = 60000')
+   cursor     = connection.cursor()
+   cursor.execute('BEGIN IMMEDIATE')
+   command  = 'CREATE TABLE IF NOT EXISTS c_shift_summary ('
+   command += 'c_shift_summary_id integer primary key, '
+   command += 'shift_database text, table_name text, row_id integer, '
+   command += 'col_name text, value)'
+   cursor.execute(command)
+   command  = 'DELETE FROM c_shift_summary WHERE shift_database = ?'
+   cursor.executemany(command, [ (name,) for name in normpath_set ] )
+   command  = 'INSERT INTO c_shift_summary '
+   command += '(shift_database, table_name, row_id, col_name, value) '
+   command += 'VALUES (?, ?, ?, ?, ?)'
+   cursor.executemany(command, summary_list)
+   connection.commit()
+   connection.close()
+   #
+   # n_extra
+   n_shift = len(eager_list)
+   n_extra = 0
+   if extra_cpu is not None and n_shift > 1 :
+      n_extra = extra_cpu.acquire(n_shift - 1)
+   #
+   # create_one_shift(shift_name)
+   # create shift_databases[shift_name]
+   def create_one_shift(shift_name) :
+      update2shift_db(
+         all_node_database,
+         template_database,
+         shift_databases[shift_name],
+         shift_update(shift_name),
+      )
+   #
+   # executor
+   # n_extra processes that run create_one_shift
+   # (threads would not run the python code at the same time).
+   executor = None
+   if n_extra > 0 :
+      fork_create_shift['create_one_shift'] = create_one_shift
+      executor = concurrent.futures.ProcessPoolExecutor(
+         max_workers = n_extra,
+         mp_context  = multiprocessing.get_context('fork'),
+      )
+   #
+   # shift_name in complete_shift()
+   # creates the shift databases in eager_list and yields each shift_name
+   # when shift_databases[shift_name] is complete. This process creates
+   # one shift database at a time while the executor processes create
+   # at most n_extra others.
+   def complete_shift() :
+      todo_list   = list( reversed(eager_list) )
+      future_dict = dict()
+      while len(todo_list) > 0 or len(future_dict) > 0 :
+         #
+         # future_dict
+         while len(todo_list) > 0 and len(future_dict) < n_extra :
+            shift_name = todo_list.pop()
+            future     = executor.submit(create_forked_shift, shift_name)
+            future_dict[future] = shift_name
+         #
+         # create one shift database in this process
+         if len(todo_list) > 0 :
+            shift_name = todo_list.pop()
+            create_one_shift(shift_name)
+            yield shift_name
+         #
+         # shift databases created by the executor processes
+         if len(future_dict) > 0 :
+            timeout = 0.0 if len(todo_list) > 0 else None
+            (done_set, not_done_set) = concurrent.futures.wait(
+               future_dict,
+               timeout     = timeout,
+               return_when = concurrent.futures.FIRST_COMPLETED,
+            )
+            for future in done_set :
+               future.result()
+               yield future_dict.pop(future)
+   #
+   # shift_databases
+   try :
+      n_done = 0
+      for shift_name in complete_shift() :
+         n_done    += 1
+         #
+         # stage_timer
+         if stage_timer != None :
+            stage_timer.stop(f'shift {shift_name}')
+         #
+         # shift_done
+         if shift_done != None :
+            shift_done(shift_name)
+         #
+         # n_extra
+         # return the cpus that are no longer needed
+         n_need = max(0, n_shift - n_done - 1)
+         if extra_cpu is not None and n_need < n_extra :
+            extra_cpu.release(n_extra - n_need)
+            n_extra = n_need
+   finally :
+      if executor is not None :
+         executor.shutdown()
+         fork_create_shift.clear()
+      if extra_cpu is not None :
+         extra_cpu.release(n_extra)
+      if len(lazy_list) == 0 :
+         os.remove(template_database)
+   #
+   # lazy shift_done
+   # This is done after the eager shift databases are created because a
+   # child that is started may remove the template; see summary2shift_db.
+   for shift_name in lazy_list :
+      if stage_timer != None :
+         stage_timer.stop(f'shift {shift_name}')
+      if shift_done != None :
+         shift_done(shift_name)
@@ -103,6 +103,19 @@ shared_lock
 This lock must be acquired during the time that
 a process reads or changes *shared_job_status* .
 
+Profile
+*******
+If this job is selected by the :ref:`option_all_table@profile_job` option,
+the python code for the job is profiled and the result is written to
+``pre_profile.prof`` in the job's directory; see
+:ref:`job_profiler_class-name` .
+
+Status File
+***********
+The start and end of each prediction is recorded in the
+:ref:`job_journal_class-name` with *journal_name* equal to ``pre_journal`` ;
+see :ref:`csv.pre_parallel@Status` .
+
 Csv Output Files
 ****************
 see :ref:`csv.pre_one_job@Csv Output Files`
@@ -299,6 +312,14 @@ def pre_one_process(
    # float_precision
    float_precision = option_predict['float_precision']
    #
+   # job_journal
+   # the lock should not be aquired during journal operations
+   job_journal = at_cascade.job_journal_class(
+      all_node_database,
+      journal_name   = 'pre_journal',
+      max_number_cpu = option_predict['max_number_cpu'],
+   )
+   #
    # n_skip
    n_skip = None
    #
@@ -317,6 +338,7 @@ def pre_one_process(
       if n_ready == 0 :
          shared_lock.release()
          shm_job_status.close()
+         job_journal.close()
          return
       #
       if n_skip == None :
@@ -336,6 +358,9 @@ def pre_one_process(
       predict_node_id         = predict_job_row['fit_node_id']
       predict_sex_id          = predict_job_row['split_reference_id']
       #
+      # job_journal
+      job_journal.set_status( [ predict_job_name ], 'run' )
+      #
       # print_begin
       print_begin(job_name = predict_job_name)
       #
@@ -373,6 +398,14 @@ def pre_one_process(
             if os.path.exists( output_file ) :
                os.remove( output_file )
       #
+      # job_profiler
+      job_profiler = at_cascade.job_profiler_class(
+         all_node_database,
+         predict_job_name,
+         f'{predict_directory}/pre_profile.prof',
+      )
+      job_profiler.start()
+      #
       # predict_job_error
       predict_job_error = None
       if ancestor_job_dir == predict_job_dir :
@@ -455,6 +488,9 @@ def pre_one_process(
          elif prior_job_error != None :
             predict_job_error = f'{prior_job_error}: {predict_job_error}'
       #
+      # job_profiler
+      job_profiler.stop()
+      #
       # Begin Lock
       acquire_lock(shared_lock)
       #
@@ -475,4 +511,10 @@ def pre_one_process(
       #
       # End Lock
       shared_lock.release()
+      #
+      # job_journal
+      if predict_job_error == None :
+         job_journal.set_status( [ predict_job_name ], 'done' )
+      else :
+         job_journal.set_status( [ predict_job_name ], 'error' )
       # -------------------------------------------------------------------
@@ -54,6 +54,16 @@ option_predict
 This is an in memory representation of
 :ref:`csv.predict@Input Files@option_predict.csv` .
 
+Status
+******
+The :ref:`job_journal_class@Status File` ``pre_journal.json``
+in the *fit_dir* directory
+is updated every ten seconds, and when this routine returns,
+by a :ref:`status_writer_class-name` .
+If the :ref:`option_all_table@status_port` option appears,
+this file is also served by a :ref:`status_server_class-name`
+while this routine is running.
+
 {xrst_end csv.pre_parallel}
 r'''
 # ----------------------------------------------------------------------------
@@ -62,19 +72,30 @@ import dismod_at
 import multiprocessing
 import numpy
 # ----------------------------------------------------------------------------
-# shared_memory_prefix = get_shared_memory_prefix(all_node_database)
-def get_shared_memory_prefix(all_node_database) :
+# option_value = get_option_all_value(all_node_database, option_name)
+# is None if option_name is not in the option_all table
+def get_option_all_value(all_node_database, option_name) :
    assert type(all_node_database) == str
+   assert type(option_name) == str
    #
    connection           = dismod_at.create_connection(
       all_node_database, new = False, readonly = True
    )
    option_all_table     = dismod_at.get_table_dict(connection, 'option_all')
    connection.close()
-   shared_memory_prefix = ""
+   option_value = None
    for row in option_all_table :
-      if row['option_name'] == 'shared_memory_prefix' :
-         shared_memory_prefix = row['option_value']
+      if row['option_name'] == option_name :
+         option_value = row['option_value']
+   return option_value
+# ----------------------------------------------------------------------------
+# shared_memory_prefix = get_shared_memory_prefix(all_node_database)
+def get_shared_memory_prefix(all_node_database) :
+   shared_memory_prefix = get_option_all_value(
+      all_node_database, 'shared_memory_prefix'
+   )
+   if shared_memory_prefix == None :
+      shared_memory_prefix = ""
    return shared_memory_prefix
 # ----------------------------------------------------------------------------
 # BEGIN_DEF
@@ -184,10 +205,8 @@ def pre_parallel(
    log_start_job_id = 0
    if max_job_depth == None :
       log_max_job_depth = None
-   elif start_job_id == None :
-      log_max_job_depth = max_job_depts
    else :
-      log_max_job_depth = max_job_depth + start_job_id
+      log_max_job_depth = max_job_depth + job_table[start_job_id]['job_depth']
    at_cascade_log_dict = at_cascade.check_log(
       message_type       = 'at_cascade'         ,
       all_node_database  = all_node_db          ,
@@ -248,6 +267,33 @@ def pre_parallel(
    # shared_lock
    shared_lock = multiprocessing.Lock()
    #
+   # job_journal
+   # only contains the jobs for this call
+   job_journal = at_cascade.job_journal_class(
+      all_node_db,
+      journal_name   = 'pre_journal',
+      max_number_cpu = max_number_cpu,
+   )
+   job_journal.clear()
+   job_journal.set_status( [
+      job_table[job_id]['job_name'] for job_id in predict_job_id_list
+   ], 'wait' )
+   status_file = job_journal.status_file
+   job_journal.close()
+   #
+   # status_writer
+   status_writer = at_cascade.status_writer_class(
+      all_node_db, 'pre_journal', max_number_cpu, 10.0
+   )
+   #
+   # status_server
+   status_server = None
+   status_port   = get_option_all_value(all_node_db, 'status_port')
+   if status_port != None :
+      port          = int( status_port )
+      status_server = at_cascade.status_server_class(status_file, port)
+      print( f'status: http://localhost:{port}' )
+   #
    # -------------------------------------------------------------------------
    #
    # process_list
@@ -317,3 +363,10 @@ def pre_parallel(
    print(f'remove: {shared_job_status_name} shared memory')
    shm_job_status.close()
    shm_job_status.unlink()
+   #
+   # status_writer
+   status_writer.close()
+   #
+   # status_server
+   if status_server != None :
+      status_server.close()
@@ -0,0 +1,501 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+{xrst_begin delta_cascade}
+
+Refit the Jobs Whose Data Changed
+#################################
+
+Prototype
+*********
+{xrst_literal
+   # BEGIN_DEF
+   # END_DEF
+}
+
+Purpose
+*******
+Sometimes a cascade is run again after a change to a few rows of the
+data table in the :ref:`glossary@root_database` ; e.g.,
+a monthly data refresh that touches a few countries.
+This routine determines which jobs have a data subset that changed,
+and refits those jobs (and the jobs below them) using the results
+from the previous cascade for all the other jobs.
+It is like :ref:`continue_cascade-name` except that the restart points
+are determined automatically.
+
+all_node_database
+*****************
+is a python string specifying the location of the
+:ref:`all_node_db-name`
+relative to the current working directory.
+Its :ref:`option_all_table@root_database` is the new root database
+and its :ref:`cov_reference_table-name` must correspond to the new
+root database; e.g., the all node database was created again using
+the new root database.
+The results for the previous cascade must be in the
+:ref:`option_all_table@result_dir` .
+
+old_root_database
+*****************
+is a python string specifying the location of the root database
+that was used for the previous cascade.
+
+fit_goal_set
+************
+This is the :ref:`glossary@fit_goal_set` for the previous cascade,
+a ``set`` with elements of type ``int`` (``str``)
+specifying the node_id (node_name) for each element of the set.
+
+fit_type_list
+*************
+This is a list with one or two elements
+and its possible elements are ``both`` and ``fixed``; see
+:ref:`cascade_root_node@fit_type_list` .
+
+max_changed_fraction
+********************
+This non-negative ``float`` determines when the data for a job has changed.
+
+#. The data subset for a job is the rows of the data table that have a
+   node that is the fit node for the job, or a descendant of the fit node,
+   and that are within the covariate max_difference of the
+   covariate references for the job.
+   The references for the root job are in the root database
+   covariate table.
+   The references for the other jobs are in the
+   :ref:`cov_reference_table-name` (as in the databases created by
+   :ref:`create_shift_db-name` ).
+#. A changed row is a row in the old data table that is not in the
+   new data table, or a row in the new data table that is not in the
+   old data table (two rows are the same if all their values,
+   except for data_id, are the same).
+   It follows that a row that is modified counts as two changed rows.
+#. The data for a job has changed if the number of changed rows in its
+   data subset is greater than *max_changed_fraction* times the
+   number of rows in its new data subset.
+
+The data for a node is also in the data subset for all its ancestors.
+If *max_changed_fraction* is zero (the default),
+any change to the data for a node changes all its ancestor jobs
+including the root job,
+so the entire cascade is fit again.
+A positive value; e.g., 0.01, treats an ancestor job as unchanged
+if a small fraction of its data changed.
+
+shared_unique
+*************
+see :ref:`continue_cascade@shared_unique` .
+
+dry_run
+*******
+If this ``bool`` is true, the jobs are not fit; i.e.,
+only *refit_list* and the restart messages are computed.
+
+Changed Jobs
+************
+A job is changed if its data has changed or its parent job is changed.
+A :ref:`create_job_table@job_table@prior_only` job
+is changed if its parent job is changed.
+If one of the tables (other than the data table) in the old and new
+root databases are different, all the jobs are changed.
+
+Restart
+*******
+If the root job is changed, the entire cascade is fit using
+:ref:`cascade_root_node-name` .
+Otherwise, for each job that is not changed and has children that are
+changed, a line of the form
+
+|  ``delta_cascade: restart at`` *job_name*
+
+is printed and:
+
+#. The job's predictions at the child covariate references and its
+   child databases are created again from its previous fit;
+   see :ref:`fit_one_job@fit_stage` equal to ``children`` .
+   Only the changed children are included;
+   the databases for the other children are not modified.
+#. The changed jobs below this job are fit using :ref:`fit_parallel-name`
+   with a reduced job table that only contains this job
+   and the changed jobs below it.
+
+refit_list
+**********
+The return value *refit_list* is a ``list`` of ``str`` containing the
+job names for the changed jobs that are not prior only; i.e.,
+the jobs that are (or would be if *dry_run* were false) fit.
+
+{xrst_end delta_cascade}
+'''
+import math
+import collections
+import dismod_at
+import at_cascade
+from at_cascade.create_shift_db import get_cov_reference_list
+# ----------------------------------------------------------------------------
+# compare_table_list
+# root database tables, other than data, that are compared
+compare_table_list = [
+   'age',
+   'avgint',
+   'covariate',
+   'density',
+   'integrand',
+   'mulcov',
+   'node',
+   'nslist',
+   'nslist_pair',
+   'option',
+   'prior',
+   'rate',
+   'rate_eff_cov',
+   'smooth',
+   'smooth_grid',
+   'subgroup',
+   'time',
+   'weight',
+   'weight_grid',
+]
+# ----------------------------------------------------------------------------
+# reduced_job_table = reduce_job_table(job_table, keep_list)
+# keep_list is a sorted list of job_id, keep_list[0] is an ancestor of all
+# the other jobs in the list, and the parent of each job in the list
+# (except the first) is in the list.
+def reduce_job_table(job_table, keep_list) :
+   #
+   # new_id
+   new_id = dict()
+   for (job_id, old_id) in enumerate(keep_list) :
+      new_id[old_id] = job_id
+   #
+   # reduced_job_table
+   start_depth       = job_table[ keep_list[0] ]['job_depth']
+   n_job             = len(keep_list)
+   reduced_job_table = list()
+   for old_id in keep_list :
+      old_row = job_table[old_id]
+      row     = dict()
+      for key in [
+         'job_name', 'prior_only', 'fit_node_id', 'split_reference_id'
+      ] :
+         row[key] = old_row[key]
+      row['parent_job_id'] = new_id.get( old_row['parent_job_id'], None )
+      if not row['prior_only'] :
+         child_list = [
+            new_id[job_id] for job_id in
+            range( old_row['start_child_job_id'], old_row['end_child_job_id'] )
+            if job_id in new_id
+         ]
+         if len(child_list) == 0 :
+            row['start_child_job_id'] = n_job
+            row['end_child_job_id']   = n_job
+         else :
+            row['start_child_job_id'] = child_list[0]
+            row['end_child_job_id']   = child_list[-1] + 1
+      row['job_depth'] = old_row['job_depth'] - start_depth
+      reduced_job_table.append(row)
+   #
+   # reduced_job_table: preorder_id
+   preorder_id = 0
+   job_stack   = [ 0 ]
+   while len(job_stack) > 0 :
+      job_id = job_stack.pop()
+      row    = reduced_job_table[job_id]
+      row['preorder_id'] = preorder_id
+      preorder_id       += 1
+      if not row['prior_only'] :
+         child_range = range(
+            row['start_child_job_id'], row['end_child_job_id']
+         )
+         job_stack  += reversed(child_range)
+   #
+   # reduced_job_table: end_preorder_id
+   # children come after parents in the job table
+   for row in reduced_job_table :
+      row['end_preorder_id'] = row['preorder_id'] + 1
+   for row in reversed(reduced_job_table) :
+      parent_job_id = row['parent_job_id']
+      if parent_job_id != None :
+         parent_row = reduced_job_table[parent_job_id]
+         parent_row['end_preorder_id'] = max(
+            parent_row['end_preorder_id'], row['end_preorder_id']
+         )
+   return reduced_job_table
+# ----------------------------------------------------------------------------
+# BEGIN_DEF
+# at_cascade.delta_cascade
+def delta_cascade(
+   all_node_database                         ,
+   old_root_database                         ,
+   fit_goal_set                              ,
+   fit_type_list        = [ 'both', 'fixed' ],
+   max_changed_fraction = 0.0                ,
+   shared_unique        = ''                 ,
+   dry_run              = False              ,
+) :
+   assert type(all_node_database) == str
+   assert type(old_root_database) == str
+   assert type(fit_goal_set) == set
+   assert type(fit_type_list) == list
+   assert type(max_changed_fraction) == float
+   assert max_changed_fraction >= 0.0
+   assert type(shared_unique) == str
+   assert type(dry_run) == bool
+   # END_DEF
+   #
+   # option_all_table, split_reference_table, cov_reference_table
+   connection = dismod_at.create_connection(
+      all_node_database, new = False, readonly = True
+   )
+   option_all_table      = dismod_at.get_table_dict(connection, 'option_all')
+   split_reference_table = \
+      dismod_at.get_table_dict(connection, 'split_reference')
+   cov_reference_table   = \
+      dismod_at.get_table_dict(connection, 'cov_reference')
+   connection.close()
+   #
+   # option_all_dict
+   option_all_dict = dict()
+   for row in option_all_table :
+      option_all_dict[ row['option_name'] ] = row['option_value']
+   #
+   # root_database, result_dir, root_node_name, max_number_cpu
+   root_database  = option_all_dict['root_database']
+   result_dir     = option_all_dict['result_dir']
+   root_node_name = option_all_dict['root_node_name']
+   max_number_cpu = int( option_all_dict.get('max_number_cpu', '1') )
+   #
+   # old_table, new_table, full_refit
+   full_refit = False
+   old_table  = dict()
+   new_table  = dict()
+   for (root_table, database) in [
+      (old_table, old_root_database), (new_table, root_database)
+   ] :
+      connection = dismod_at.create_connection(
+         database, new = False, readonly = True
+      )
+      for table_name in compare_table_list + [ 'data' ] :
+         if at_cascade.table_exists(connection, table_name) :
+            root_table[table_name] = \
+               dismod_at.get_table_dict(connection, table_name)
+         else :
+            root_table[table_name] = None
+      connection.close()
+   for table_name in compare_table_list :
+      if old_table[table_name] != new_table[table_name] :
+         full_refit = True
+   #
+   # node_table, covariate_table
+   node_table      = new_table['node']
+   covariate_table = new_table['covariate']
+   #
+   # root_node_id
+   root_node_id = at_cascade.table_name2id(node_table, 'node', root_node_name)
+   #
+   # cov_info, root_split_reference_id, split_covariate_id
+   cov_info = at_cascade.get_cov_info(
+      option_all_table, covariate_table, split_reference_table
+   )
+   root_split_reference_id = None
+   split_covariate_id      = None
+   if len(split_reference_table) > 0 :
+      split_covariate_id = cov_info['split_covariate_id']
+      if 'root_split_reference_name' in option_all_dict :
+         root_split_reference_id = at_cascade.table_name2id(
+            split_reference_table,
+            'split_reference',
+            option_all_dict['root_split_reference_name'],
+         )
+   #
+   # job_table
+   job_table = at_cascade.create_job_table(
+      all_node_database          = all_node_database,
+      node_table                 = node_table,
+      start_node_id              = root_node_id,
+      start_split_reference_id   = root_split_reference_id,
+      fit_goal_set               = fit_goal_set,
+   )
+   #
+   # split_id_set
+   split_id_set = { row['split_reference_id'] for row in job_table }
+   #
+   # job_reference
+   # job_reference[ (node_id, split_reference_id) ] is the list of
+   # covariate references in the fit database for the corresponding job.
+   n_covariate   = len(covariate_table)
+   job_reference = dict()
+   for row in job_table :
+      key = ( row['fit_node_id'], row['split_reference_id'] )
+      if key == (root_node_id, root_split_reference_id) :
+         reference_list = [
+            covariate_row['reference'] for covariate_row in covariate_table
+         ]
+      else :
+         reference_list = get_cov_reference_list(
+            n_covariate, cov_reference_table, key[0], key[1]
+         )
+      if split_covariate_id != None and key[1] != None :
+         split_row = split_reference_table[ key[1] ]
+         reference_list[split_covariate_id] = \
+            split_row['split_reference_value']
+      job_reference[key] = reference_list
+   #
+   # in_bnd
+   # is this data row in the data subset for the covariate references
+   def in_bnd(data_row, reference_list) :
+      for (covariate_id, covariate_row) in enumerate(covariate_table) :
+         reference      = reference_list[covariate_id]
+         max_difference = covariate_row['max_difference']
+         value = data_row[ f'x_{covariate_id}' ]
+         skip  = value is None
+         skip  = skip or max_difference is None
+         skip  = skip or max_difference == math.inf
+         if not skip and abs(value - reference) > max_difference :
+            return False
+      return True
+   #
+   # ancestor_list
+   ancestor_list = dict()
+   def get_ancestor_list(node_id) :
+      if node_id not in ancestor_list :
+         result = [ node_id ]
+         while node_table[ result[-1] ]['parent'] != None :
+            result.append( node_table[ result[-1] ]['parent'] )
+         ancestor_list[node_id] = result
+      return ancestor_list[node_id]
+   #
+   # count_rows
+   # number of rows in each (node_id, split_reference_id) data subset
+   def count_rows(row_list) :
+      count = collections.Counter()
+      for data_row in row_list :
+         for node_id in get_ancestor_list( data_row['node_id'] ) :
+            for split_reference_id in split_id_set :
+               key = (node_id, split_reference_id)
+               if key in job_reference :
+                  if in_bnd(data_row, job_reference[key]) :
+                     count[key] += 1
+      return count
+   #
+   # changed_row_list
+   old_rows = collections.Counter(
+      tuple( sorted( row.items() ) ) for row in old_table['data']
+   )
+   new_rows = collections.Counter(
+      tuple( sorted( row.items() ) ) for row in new_table['data']
+   )
+   changed_rows     = (old_rows - new_rows) + (new_rows - old_rows)
+   changed_row_list = list()
+   for (key, count) in changed_rows.items() :
+      changed_row_list += count * [ dict(key) ]
+   #
+   # subset_count, changed_count
+   subset_count  = count_rows( new_table['data'] )
+   changed_count = count_rows( changed_row_list )
+   #
+   # changed_set
+   changed_set = set()
+   for (job_id, row) in enumerate(job_table) :
+      key           = ( row['fit_node_id'], row['split_reference_id'] )
+      n_changed     = changed_count.get(key, 0)
+      data_changed  = n_changed > max_changed_fraction * subset_count[key]
+      data_changed  = data_changed and n_changed > 0
+      data_changed  = data_changed and not row['prior_only']
+      parent_job_id = row['parent_job_id']
+      if full_refit or data_changed or parent_job_id in changed_set :
+         changed_set.add(job_id)
+   #
+   # refit_list
+   refit_list = [
+      job_table[job_id]['job_name'] for job_id in sorted(changed_set)
+      if not job_table[job_id]['prior_only']
+   ]
+   #
+   # root job changed
+   if 0 in changed_set :
+      print( 'delta_cascade: restart at ' + job_table[0]['job_name'] )
+      if not dry_run :
+         at_cascade.cascade_root_node(
+            all_node_database = all_node_database,
+            fit_goal_set      = fit_goal_set,
+            fit_type_list     = fit_type_list,
+         )
+      return refit_list
+   #
+   # restart_dict
+   # restart_dict[restart_job_id] is the list of changed jobs below it
+   restart_dict = dict()
+   for job_id in sorted(changed_set) :
+      restart_job_id = job_table[job_id]['parent_job_id']
+      while restart_job_id in changed_set :
+         restart_job_id = job_table[restart_job_id]['parent_job_id']
+      if restart_job_id not in restart_dict :
+         restart_dict[restart_job_id] = list()
+      restart_dict[restart_job_id].append(job_id)
+   #
+   # node_split_set
+   connection = dismod_at.create_connection(
+      all_node_database, new = False, readonly = True
+   )
+   node_split_table = dismod_at.get_table_dict(connection, 'node_split')
+   connection.close()
+   node_split_set = { row['node_id'] for row in node_split_table }
+   #
+   for restart_job_id in sorted( restart_dict.keys() ) :
+      #
+      # reduced_job_table
+      keep_list = [ restart_job_id ] + restart_dict[restart_job_id]
+      reduced_job_table = reduce_job_table(job_table, keep_list)
+      job_name = reduced_job_table[0]['job_name']
+      print( f'delta_cascade: restart at {job_name}' )
+      if not dry_run :
+         #
+         # fit_database
+         row          = reduced_job_table[0]
+         database_dir = at_cascade.get_database_dir(
+            node_table              = node_table,
+            split_reference_table   = split_reference_table,
+            node_split_set          = node_split_set,
+            root_node_id            = root_node_id,
+            root_split_reference_id = root_split_reference_id,
+            fit_node_id             = row['fit_node_id'],
+            fit_split_reference_id  = row['split_reference_id'],
+         )
+         fit_database = f'{result_dir}/{database_dir}/dismod.db'
+         #
+         # fit_integrand
+         fit_or_root   = at_cascade.fit_or_root_class(
+            fit_database, root_database
+         )
+         fit_integrand = at_cascade.get_fit_integrand(fit_or_root)
+         fit_or_root.close()
+         #
+         # predictions and child databases for the changed children
+         at_cascade.fit_one_job(
+            job_table         = reduced_job_table,
+            run_job_id        = 0,
+            all_node_database = all_node_database,
+            node_table        = node_table,
+            fit_integrand     = fit_integrand,
+            fit_type          = fit_type_list[0],
+            first_fit         = False,
+            fit_stage         = 'children',
+         )
+         #
+         # fit the changed jobs
+         at_cascade.fit_parallel(
+            job_table         = reduced_job_table,
+            start_job_id      = 0,
+            all_node_database = all_node_database,
+            node_table        = node_table,
+            fit_integrand     = fit_integrand,
+            skip_start_job    = True,
+            max_number_cpu    = max_number_cpu,
+            fit_type_list     = fit_type_list,
+            shared_unique     = shared_unique,
+         )
+   return refit_list
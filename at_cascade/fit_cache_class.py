@@ -0,0 +1,424 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+{xrst_begin fit_cache_class}
+{xrst_spell
+  lru
+  sqlite
+  var
+}
+
+Cache of Fit Results Indexed by a Hash of the Fit Inputs
+########################################################
+This is a directory of databases that contain the results of fits
+that have completed.
+When a cascade is run again, after a small change to its inputs,
+:ref:`fit_one_job-name` uses this cache to skip the fits
+that have the same inputs as a previous fit; see
+:ref:`option_all_table@fit_cache_dir` .
+Because the priors for a job come from the results for its parent job,
+the jobs below a job that did not change are also found in the cache.
+
+fit_cache_class
+***************
+{xrst_code py}
+fit_cache = fit_cache_class(cache_dir, max_bytes)
+{xrst_code}
+
+cache_dir
+=========
+This ``str`` is the name of the cache directory.
+If it does not exist, it is created.
+The results for each fit are stored in *cache_dir* / *input_hash* ``.db``
+and the sqlite database *cache_dir* ``/fit_cache.db`` is an index
+of these results.
+More than one process (or host) can use the same cache directory
+at the same time.
+
+max_bytes
+=========
+This ``int`` is the maximum number of bytes in the cached results.
+If it is zero, there is no limit.
+When a result is added and the total size is greater than *max_bytes* ,
+the least recently used results are removed (LRU eviction).
+
+cascade_hash
+************
+{xrst_code py}
+cascade_hash = fit_cache_class.cascade_hash(all_node_database)
+{xrst_code}
+This static method returns a ``str`` that is a hash of the inputs
+that are the same for every job in a cascade:
+
+#. The tables in the :ref:`all_node_db-name` .
+   The options in the option_all table that do not change the
+   fit results are not included; e.g., *max_number_cpu* .
+#. The :ref:`constant tables <module@at_cascade.constant_table_list>`
+   in the root database, except for the data table.
+
+It reads all of these tables, so it should be computed once per cascade;
+e.g., :ref:`fit_parallel-name` computes it and passes it to
+:ref:`fit_one_job@cascade_hash` .
+
+input_hash
+**********
+{xrst_code py}
+input_hash = fit_cache_class.input_hash(
+   cascade_hash, root_database, fit_database, job_table, run_job_id, fit_type
+)
+{xrst_code}
+This static method returns a ``str`` that identifies the inputs
+for the fit of job *run_job_id* in *job_table* using *fit_type* .
+It is a hash of the following values:
+
+#. The *cascade_hash* returned by ``cascade_hash`` for this cascade.
+#. The dismod_at input tables in *fit_database* that are not
+   :ref:`constant tables <module@at_cascade.constant_table_list>` ;
+   e.g., the priors set by :ref:`create_shift_db-name` .
+#. The data_subset and bnd_mulcov tables in *fit_database* ; i.e.,
+   the dismod_at init, hold_out, and bnd_mulcov commands
+   must have been run on *fit_database* .
+#. The rows of the data table in *root_database* that are
+   in the data_subset table.
+#. *fit_type* and the names of the child jobs for this job.
+
+Only the tables for this job are read, so the cost of this hash does not
+depend on the size of the all node database or on the number of rows in
+the root database data table that are not used by this job.
+
+get
+***
+{xrst_code py}
+found = fit_cache.get(input_hash, fit_database)
+{xrst_code}
+If there are results for *input_hash* in the cache,
+the cached tables are copied to *fit_database*
+(replacing any previous version of these tables)
+and *found* is true.
+Otherwise *fit_database* is not changed and *found* is false.
+
+put
+***
+{xrst_code py}
+fit_cache.put(input_hash, fit_database)
+{xrst_code}
+This copies the result tables in *fit_database* to the cache
+and then removes least recently used results if necessary.
+The following tables are cached (if they exist in *fit_database* ):
+{xrst_code py}'''
+cache_table_list = [
+   'c_shift_avgint',
+   'c_shift_predict_fit_var',
+   'c_shift_predict_sample',
+   'fit_data_subset',
+   'fit_var',
+   'sample',
+   'trace_fixed',
+]
+'''{xrst_code}
+
+n_bytes
+*******
+{xrst_code py}
+n_bytes = fit_cache.n_bytes()
+{xrst_code}
+is the total number of bytes in the cached results.
+
+close
+*****
+{xrst_code py}
+fit_cache.close()
+{xrst_code}
+This closes the database connection held by *fit_cache* .
+
+{xrst_end fit_cache_class}
+'''
+import os
+import hashlib
+import dismod_at
+import at_cascade
+# ----------------------------------------------------------------------------
+# run_option_list
+# options in the option_all table that do not change the result of a fit
+run_option_list = [
+   'fit_cache_dir',
+   'fit_engine',
+   'job_history_database',
+   'job_priority',
+   'lazy_shift_db',
+   'lease_seconds',
+   'max_fit_cache_gb',
+   'max_fit_seconds',
+   'max_memory_gb',
+   'max_number_cpu',
+   'max_sample_seconds',
+   'profile_job',
+   'result_dir',
+   'root_database',
+   'shared_memory_prefix',
+   'speculative_fit',
+   'status_port',
+   'timeout_action',
+]
+#
+# fit_input_table_list
+# dismod_at input tables that are in a fit_database, avgint is not included
+# because it is replaced by avgint_parent_grid.
+fit_input_table_list = [
+   'covariate',
+   'mulcov',
+   'nslist',
+   'nslist_pair',
+   'option',
+   'prior',
+   'rate',
+   'smooth',
+   'smooth_grid',
+]
+# ----------------------------------------------------------------------------
+# hash_table(hash_obj, connection, schema, table_name, command)
+# add the table to the hash. If command is None, all the rows are used.
+def hash_table(hash_obj, connection, schema, table_name, command = None) :
+   hash_obj.update( f'{table_name}\n'.encode() )
+   sql     = f"SELECT name FROM {schema}.sqlite_master WHERE name = ?"
+   cursor  = connection.cursor()
+   if len( cursor.execute(sql, (table_name,) ).fetchall() ) == 0 :
+      return
+   if command is None :
+      command = f'SELECT * FROM {schema}.{table_name} ORDER BY rowid'
+   for row in cursor.execute(command) :
+      hash_obj.update( f'{row}\n'.encode() )
+# ----------------------------------------------------------------------------
+# copy_table(connection, schema, table_name)
+# copy a table from the attached schema to the main schema for connection
+def copy_table(connection, schema, table_name) :
+   cursor  = connection.cursor()
+   command = f'SELECT sql FROM {schema}.sqlite_master WHERE name = ?'
+   result  = cursor.execute(command, (table_name,) ).fetchall()
+   if len(result) == 0 :
+      return
+   cursor.execute( f'DROP TABLE IF EXISTS main.{table_name}' )
+   cursor.execute( result[0][0] )
+   command  = f'INSERT INTO main.{table_name} '
+   command += f'SELECT * FROM {schema}.{table_name}'
+   cursor.execute(command)
+# ----------------------------------------------------------------------------
+class fit_cache_class :
+   #
+   # __init__
+   def __init__(self, cache_dir, max_bytes) :
+      assert type(cache_dir) == str
+      assert type(max_bytes) == int
+      assert max_bytes >= 0
+      #
+      self.cache_dir = cache_dir
+      self.max_bytes = max_bytes
+      os.makedirs(cache_dir, exist_ok = True)
+      #
+      # connection
+      index_database = f'{cache_dir}/fit_cache.db'
+      new = not os.path.exists(index_database)
+      self.connection = dismod_at.create_connection(
+         index_database, new = new, readonly = False
+      )
+      dismod_at.sql_command(self.connection, 'PRAGMA busy_timeout = 60000')
+      #
+      # fit_cache table
+      command  = 'CREATE TABLE IF NOT EXISTS fit_cache('
+      command += 'fit_cache_id integer primary key, '
+      command += 'input_hash text unique, n_bytes integer, last_used real)'
+      dismod_at.sql_command(self.connection, command)
+   #
+   # cascade_hash
+   @staticmethod
+   def cascade_hash(all_node_database) :
+      assert type(all_node_database) == str
+      #
+      # hash_obj
+      hash_obj = hashlib.sha1()
+      #
+      # all_node_database
+      connection = dismod_at.create_connection(
+         all_node_database, new = False, readonly = True
+      )
+      option_all_table = dismod_at.get_table_dict(connection, 'option_all')
+      option_all_dict  = dict()
+      for row in option_all_table :
+         if row['option_name'] not in run_option_list :
+            option_all_dict[ row['option_name'] ] = row['option_value']
+      hash_obj.update( str( sorted( option_all_dict.items() ) ).encode() )
+      command    = "SELECT name FROM sqlite_master WHERE type = 'table' "
+      command   += "AND name != 'option_all' ORDER BY name"
+      table_list = dismod_at.sql_command(connection, command)
+      for (table_name,) in table_list :
+         hash_table(hash_obj, connection, 'main', table_name)
+      connection.close()
+      #
+      # root_database
+      root_database = None
+      for row in option_all_table :
+         if row['option_name'] == 'root_database' :
+            root_database = row['option_value']
+      assert root_database != None
+      #
+      # root_database
+      # the data table is hashed by input_hash using only the rows for a job
+      connection = dismod_at.create_connection(
+         root_database, new = False, readonly = True
+      )
+      for table_name in at_cascade.constant_table_list :
+         if table_name != 'data' :
+            hash_table(hash_obj, connection, 'main', table_name)
+      connection.close()
+      #
+      return hash_obj.hexdigest()
+   #
+   # input_hash
+   @staticmethod
+   def input_hash(
+      cascade_hash,
+      root_database,
+      fit_database,
+      job_table,
+      run_job_id,
+      fit_type,
+   ) :
+      assert type(cascade_hash) == str
+      assert type(root_database) == str
+      assert type(fit_database) == str
+      assert type(job_table) == list
+      assert type(run_job_id) == int
+      assert fit_type in [ 'both', 'fixed' ]
+      #
+      # hash_obj
+      hash_obj = hashlib.sha1()
+      hash_obj.update( f'{cascade_hash}\n'.encode() )
+      #
+      # fit_type, child job names
+      job_row  = job_table[run_job_id]
+      text     = f'{fit_type}\n'
+      start_id = job_row['start_child_job_id']
+      end_id   = job_row['end_child_job_id']
+      for job_id in range(start_id, end_id) :
+         text += job_table[job_id]['job_name'] + '\n'
+      hash_obj.update( text.encode() )
+      #
+      # fit_database
+      connection = dismod_at.create_connection(
+         fit_database, new = False, readonly = True
+      )
+      for table_name in fit_input_table_list :
+         assert table_name not in at_cascade.constant_table_list
+         hash_table(hash_obj, connection, 'main', table_name)
+      for table_name in [ 'data_subset', 'bnd_mulcov' ] :
+         hash_table(hash_obj, connection, 'main', table_name)
+      #
+      # root_database: data
+      command = 'ATTACH DATABASE ? AS root'
+      connection.cursor().execute(command, (root_database,) )
+      command  = 'SELECT * FROM root.data WHERE data_id IN '
+      command += '(SELECT data_id FROM main.data_subset) '
+      command += 'ORDER BY data_id'
+      hash_table(hash_obj, connection, 'root', 'data', command)
+      connection.close()
+      #
+      return hash_obj.hexdigest()
+   #
+   # get
+   def get(self, input_hash, fit_database) :
+      assert type(input_hash) == str
+      assert type(fit_database) == str
+      #
+      # cache_database
+      cache_database = f'{self.cache_dir}/{input_hash}.db'
+      command = 'SELECT fit_cache_id FROM fit_cache WHERE input_hash = ?'
+      cursor  = self.connection.cursor()
+      result  = cursor.execute(command, (input_hash,) ).fetchall()
+      if len(result) == 0 :
+         return False
+      if not os.path.exists(cache_database) :
+         command = 'DELETE FROM fit_cache WHERE input_hash = ?'
+         cursor.execute(command, (input_hash,) )
+         self.connection.commit()
+         return False
+      #
+      # fit_database
+      connection = dismod_at.create_connection(
+         fit_database, new = False, readonly = False
+      )
+      command = 'ATTACH DATABASE ? AS cache'
+      connection.cursor().execute(command, (cache_database,) )
+      for table_name in cache_table_list :
+         copy_table(connection, 'cache', table_name)
+      connection.commit()
+      connection.close()
+      #
+      # last_used
+      command = 'UPDATE fit_cache SET last_used = julianday() '
+      command += 'WHERE input_hash = ?'
+      cursor.execute(command, (input_hash,) )
+      self.connection.commit()
+      return True
+   #
+   # put
+   def put(self, input_hash, fit_database) :
+      assert type(input_hash) == str
+      assert type(fit_database) == str
+      #
+      # cache_database
+      # write a temporary file so other processes never see part of it
+      cache_database = f'{self.cache_dir}/{input_hash}.db'
+      temp_database  = f'{cache_database}.{os.getpid()}'
+      connection     = dismod_at.create_connection(
+         temp_database, new = True, readonly = False
+      )
+      command = 'ATTACH DATABASE ? AS fit'
+      connection.cursor().execute(command, (fit_database,) )
+      for table_name in cache_table_list :
+         copy_table(connection, 'fit', table_name)
+      connection.commit()
+      connection.close()
+      os.replace(temp_database, cache_database)
+      n_bytes = os.path.getsize(cache_database)
+      #
+      # fit_cache table
+      cursor = self.connection.cursor()
+      cursor.execute('BEGIN IMMEDIATE')
+      command  = 'INSERT OR REPLACE INTO fit_cache '
+      command += '(input_hash, n_bytes, last_used) VALUES (?, ?, julianday())'
+      cursor.execute(command, (input_hash, n_bytes) )
+      #
+      # LRU eviction
+      if self.max_bytes > 0 :
+         command = 'SELECT sum(n_bytes) FROM fit_cache'
+         total   = cursor.execute(command).fetchall()[0][0]
+         command  = 'SELECT input_hash, n_bytes FROM fit_cache '
+         command += 'ORDER BY last_used, fit_cache_id'
+         evict    = list()
+         for (old_hash, old_bytes) in cursor.execute(command).fetchall() :
+            if total <= self.max_bytes or old_hash == input_hash :
+               break
+            evict.append(old_hash)
+            total -= old_bytes
+         for old_hash in evict :
+            command = 'DELETE FROM fit_cache WHERE input_hash = ?'
+            cursor.execute(command, (old_hash,) )
+            try :
+               os.remove( f'{self.cache_dir}/{old_hash}.db' )
+            except FileNotFoundError :
+               pass
+      self.connection.commit()
+   #
+   # n_bytes
+   def n_bytes(self) :
+      command = 'SELECT sum(n_bytes) FROM fit_cache'
+      result  = dismod_at.sql_command(self.connection, command)
+      if result[0][0] is None :
+         return 0
+      return result[0][0]
+   #
+   # close
+   def close(self) :
+      self.connection.close()
@@ -5,6 +5,8 @@
 r'''
 {xrst_begin fit_one_job}
 {xrst_spell
+  ipopt
+  iter
   obj
   var
 }
@@ -21,7 +23,9 @@ Prototype
 
 Default Value
 *************
-The only argument that can be None is *trace_file_obj*.
+The only arguments that can be None are
+*trace_file_obj* , *fit_database* , *stage_seconds* , *extra_cpu* ,
+and *release_child* .
 
 job_table
 *********
@@ -68,6 +72,67 @@ If this argument is not None, it is a ``io.TextIOBase`` object
 corresponding to a file that is opened for writing the tracing output
 for this job.
 
+fit_stage
+*********
+This ``str`` is ``all`` , ``fit`` , or ``children`` (default ``all`` ).
+If it is ``fit`` , this routine returns after the sample: OK
+:ref:`log<fit_one_job@fit_database@log>` entry; i.e.,
+the child databases are not created.
+If it is ``children`` , a previous call with *fit_stage* equal to ``fit``
+must have completed for this fit_database and this call
+starts where that call stopped.
+This is used by a
+:ref:`fit_one_process@fit_type_list@Speculative Fit` .
+
+stage_seconds
+*************
+The return value *stage_seconds* is a ``dict`` with the wall time
+for each stage of this job; e.g., ``init`` , ``fit`` and ``sample`` .
+If the argument *stage_seconds* is not None, it is the return value from
+the call with *fit_stage* equal to ``fit`` and it is included in the
+:ref:`fit_one_job@job_history` for this call.
+
+extra_cpu
+*********
+If this argument is not None,
+*number* = *extra_cpu* . ``acquire`` ( *max_number* )
+reserves *number* cpus, less than or equal *max_number* ,
+that are not being used by other jobs, and
+*extra_cpu* . ``release`` ( *number* ) returns them; see
+:ref:`fit_one_process@Sample Chunks` .
+It is used to run :ref:`fit_one_job@Sample Chunks` in parallel
+and to create the child databases in parallel; see
+:ref:`create_shift_db@extra_cpu` .
+If it is None, the chunks are run, and the child databases are created,
+one at a time.
+
+release_child
+*************
+If this argument is not None,
+*release_child* ( *child_job_id* ) is called as soon as the
+:ref:`glossary@input_node_database` for the job with index
+*child_job_id* has been created; see :ref:`create_shift_db@shift_done` .
+This is used to start fitting a child job while the databases for its
+siblings are still being created.
+
+cascade_hash
+************
+If this argument is not None, it is the
+:ref:`fit_cache_class@cascade_hash` for *all_node_database* .
+It is only used when the :ref:`option_all_table@fit_cache_dir` option
+appears, and it is computed by this routine when it is needed and None.
+Passing it in avoids reading the all node database, and the
+constant tables in the root database, for every job.
+
+Lazy Shift
+**********
+If :ref:`option_all_table@lazy_shift_db` is true,
+the child databases for jobs that are not
+:ref:`create_job_table@job_table@prior_only` are not created by this job;
+see :ref:`create_shift_db@lazy_shift` .
+If the fit database for *run_job_id* does not exist when this routine
+starts, it is created by :ref:`materialize_shift_db-name` .
+
 fit_database
 ************
 The :ref:`glossary@fit_database` for this fit is
@@ -80,6 +145,13 @@ Upon Input
 ==========
 On input, *fit_database* is an :ref:`glossary@input_node_database`.
 
+Copy
+====
+If the argument *fit_database* is not None, *fit_stage* must be ``fit``
+and this database is used in place of the fit database above; e.g.,
+it is a copy of the fit database that is being fit at the same time
+with a different *fit_type* .
+
 fit_var
 =======
 Upon return, the fit_var table correspond to the posterior
@@ -113,6 +185,9 @@ if the corresponding event occurs:
    at_cascade,   fit: OK,        the maximum likelihood problem was solved
    at_cascade,   sample: OK,     the posterior samples were computed
    at_cascade,   children: OK,   the child databases with priors were created
+   at_cascade,   fit: timeout,   the fit took more than max_fit_seconds
+   at_cascade,   sample: timeout, the sample took more than max_sample_seconds
+   at_cascade,   fit: cache,     the fit and sample results came from the cache
 
 Note that the events depend on each other in the following way:
 
@@ -120,6 +195,132 @@ Note that the events depend on each other in the following way:
 #. If sample: OK is present, then fit: OK is present.
 #. If fit: OK is present, then no data: abort is **not** present.
 
+If *first_fit* is false, the timeout entries from the previous fits
+of this job are kept; i.e., the log table records all the timeouts for
+this job.
+
+
+job_history
+***********
+If the :ref:`option_all_table@job_history_database` option appears,
+a row is added to the :ref:`job_history_class-name` database
+each time this routine completes.
+The *peak_rss_mb* in this row is the maximum resident set size
+for the dismod_at commands run by this job.
+In this case, one small python process is started for the job and it
+runs the dismod_at commands for the job,
+so that the resident set size of each command is measured separately
+and does not depend on the process that called fit_one_job.
+If this option does not appear, the dismod_at commands are run directly.
+If the sample command is run in chunks, the chunks may run at the same
+time and the sum of their resident set sizes is used for the sample command.
+
+Warm Start
+**********
+The optimization for a job with a parent job starts at the
+parent's posterior:
+The dismod_at init command sets the start_var and scale_var tables
+to the mean of the value prior for each model variable, and
+:ref:`create_shift_db-name` set these means using the parent's
+fit_var table mapped to this fit's node and covariate references.
+The only thing that moves the starting point away from the parent
+posterior is a non-zero
+:ref:`option_all_table@perturb_optimization_start` or
+:ref:`option_all_table@perturb_optimization_scale` .
+If :ref:`option_all_table@warm_start_from_parent` is true,
+it is an error for either of these options to be non-zero.
+Other than this check, and the reporting below,
+warm_start_from_parent has no effect on the fit.
+
+Fit Iterations
+**************
+Just before this routine returns, a line that starts with
+``fit_one_job: fit iterations =`` is written to the trace output
+(see *trace_file_obj* ).
+It contains the number of Ipopt iterations for the fixed effects
+(the maximum iter in the dismod_at trace_fixed table)
+and whether this was a warm start.
+If this was a warm start, and the job history has records for this
+job and fit type that were not warm starts, it also reports the
+iterations and fit seconds saved; see
+:ref:`job_history_class@cold_start` .
+
+Fit Cache
+*********
+If the :ref:`option_all_table@fit_cache_dir` option appears,
+and *fit_stage* is ``all`` ,
+the :ref:`fit_cache_class@input_hash` for this fit is computed
+after the dismod_at init, hold_out, and bnd_mulcov commands.
+If there are results for this hash in the :ref:`fit_cache_class-name` ,
+they are copied to the fit_database and the
+fit, sample, and predict commands are not run.
+In this case the fit: cache, fit: OK, and sample: OK entries are
+added to the :ref:`fit_one_job@fit_database@log` table.
+Otherwise, when the predict commands are done,
+the results for this fit are added to the cache.
+
+Sample Chunks
+*************
+If :ref:`option_all_table@number_sample_chunk` is greater than one,
+the :ref:`option_all_table@number_sample` samples are divided into
+that many chunks with nearly equal size.
+For each chunk, the fit database is copied to
+*fit_stem*\ ``.sample_``\ *k*\ ``.db`` , where *fit_stem* is the
+fit database name without the ``.db`` and *k* is the chunk index.
+The dismod_at option table random_seed in the copy is
+the seed for the fit database plus *k*
+(the current time is used for the seed if it is zero).
+The sample command (and the simulate command when
+:ref:`option_all_table@sample_method` is simulate) is run for each copy.
+The resulting sample tables are combined in the fit database sample table
+with the sample_index values for chunk *k* following those for chunk
+*k* - 1 .
+Error and warning log messages from the chunks
+are copied to the fit database log table.
+The :ref:`option_all_table@max_sample_seconds` limit applies to
+all the chunks together.
+
+Step Seconds
+************
+Just before this routine returns, a line that starts with
+``fit_one_job: step seconds:`` is written to *trace_file_obj*
+(or printed if *trace_file_obj* is None).
+It has the wall time for each type of dismod_at command (step)
+run by this call; e.g., ``init`` , ``hold_out`` , ``fit`` , ``sample`` ,
+and ``predict`` .
+To reduce the number of dismod_at processes started:
+
+#. A ``hold_out`` command is only run for an integrand that has more
+   data values in this fit than :ref:`option_all_table@max_fit`
+   (or :ref:`option_all_table@max_fit_parent` ); i.e., when it would
+   change the fit database.
+#. The ``perturb`` step is done in this process by
+   :ref:`perturb_var-name` instead of running ``dismodat.py`` .
+
+Stage Timing
+************
+A :ref:`stage_timer_class-name` object is used to add a row to the
+at_cascade_timing table in the fit database for each of the following
+stages of this job (that is run):
+
+.. csv-table::
+   :header-rows: 1
+
+   stage,                 included in stage
+   init,                  the dismod_at init command
+   hold_out,              the hold_out and bnd_mulcov commands and perturb
+   cache,                 a :ref:`fit_one_job@Fit Cache` get or put
+   fit,                   the dismod_at fit command
+   sample,                the dismod_at sample (and simulate) commands
+   avgint_parent_grid,    the :ref:`avgint_parent_grid-name` routine
+   predict fit_var,       the dismod_at predict fit_var command
+   predict sample,        the dismod_at predict sample command
+   shift *shift_name*,    creating one :ref:`create_shift_db-name` database
+   *stage*\ ``: timeout``, a fit or sample that timed out
+
+If *first_fit* is true, the at_cascade_timing table is dropped
+before the init stage.
+The :ref:`check_timing-name` routine returns these rows for a cascade.
 
 Exception
 *********
@@ -127,38 +328,389 @@ If there is no data from this fit, this routine will raise an exception
 with a message that starts with: ``no data: abort`` ; i.e., the same
 as the message it puts in the log.
 
+Timeout
+=======
+If the dismod_at fit (sample) command takes more than
+:ref:`option_all_table@max_fit_seconds`
+(:ref:`option_all_table@max_sample_seconds` ) it is killed.
+If :ref:`option_all_table@timeout_action` is ``fallback`` ,
+the exception message starts with ``fit: timeout`` ( ``sample: timeout`` )
+and the next type in *fit_type_list* is tried; see
+:ref:`fit_one_process@fit_type_list` .
+If it is ``error`` , the exception message starts with ``timeout: abort``
+and no other fit type is tried for this job.
+
 
 {xrst_end fit_one_job}
 '''
 # ----------------------------------------------------------------------------
 import io
 import os
+import sys
+import json
 import time
+import shutil
+import threading
+import subprocess
+import concurrent.futures
 import inspect
 import dismod_at
 import at_cascade
 # -----------------------------------------------------------------------------
-def system_command(command, file_stdout) :
-   if file_stdout is None :
-      dismod_at.system_command_prc(
-         command,
-         print_command = True,
-         return_stdout = False,
-         return_stderr = False,
-         file_stdout   = None,
-         file_stderr   = None,
-         write_command = False,
+# rss_server
+# This python program reads json requests, one per line, from its standard
+# input. Each request has an id, a command, a timeout (None for no timeout),
+# and a stdout file name (None for the standard output of this program).
+# The command for each request is run in a separate thread and a json reply,
+# with the same id, is written to the file descriptor sys.argv[1].
+# The reply has the return code for the command (None if it timed out),
+# its standard error, and its maximum resident set size (kilobytes).
+# On linux, a child starts with the maximum resident set size of its parent,
+# so the commands are run by this small program instead of by fit_one_job.
+rss_server = '''
+import os, sys, json, signal, threading, tempfile, subprocess
+reply_file = os.fdopen( int( sys.argv[1] ), 'w' )
+reply_lock = threading.Lock()
+def run(request) :
+   reply  = { 'id' : request['id'], 'returncode' : 1, 'kilobytes' : 0 }
+   stdout = None
+   if request['stdout'] is not None :
+      stdout = open(request['stdout'], 'a')
+   stderr = tempfile.TemporaryFile('w+')
+   try :
+      p = subprocess.Popen(
+         request['command'], stdout = stdout, stderr = stderr
       )
+   except OSError as e :
+      reply['stderr'] = str(e)
    else :
-      dismod_at.system_command_prc(
+      timeout_event = threading.Event()
+      def kill() :
+         timeout_event.set()
+         os.kill(p.pid, signal.SIGKILL)
+      timer = None
+      if request['timeout'] is not None :
+         timer = threading.Timer( request['timeout'], kill )
+         timer.start()
+      (pid, status, rusage) = os.wait4(p.pid, 0)
+      p.returncode = os.waitstatus_to_exitcode(status)
+      if timer is not None :
+         timer.cancel()
+      if not timeout_event.is_set() :
+         reply['returncode'] = p.returncode
+      else :
+         reply['returncode'] = None
+      reply['kilobytes'] = rusage.ru_maxrss
+      stderr.seek(0)
+      reply['stderr'] = stderr.read()
+   stderr.close()
+   if stdout is not None :
+      stdout.close()
+   with reply_lock :
+      reply_file.write( json.dumps(reply) + '\\n' )
+      reply_file.flush()
+thread_list = list()
+for line in sys.stdin :
+   thread = threading.Thread( target = run, args = ( json.loads(line), ) )
+   thread.start()
+   thread_list.append(thread)
+for thread in thread_list :
+   thread.join()
+'''
+# ----------------------------------------------------------------------------
+# rss_server_class
+# Runs the dismod_at commands for one job using one rss_server process,
+# so that the maximum resident set size for each command is measured.
+# The run method can be called by more than one thread at the same time.
+class rss_server_class :
+   #
+   # __init__(file_stdout)
+   # file_stdout is the standard output for rss_server (None for sys.stdout)
+   def __init__(self, file_stdout) :
+      (read_fd, write_fd) = os.pipe()
+      self.process = subprocess.Popen(
+         [ sys.executable, '-c', rss_server, str(write_fd) ],
+         stdin    = subprocess.PIPE,
+         stdout   = file_stdout,
+         pass_fds = (write_fd,),
+         encoding = 'utf-8',
+      )
+      os.close(write_fd)
+      self.reply_file = os.fdopen(read_fd, 'r')
+      self.condition  = threading.Condition()
+      self.reply      = dict()
+      self.next_id    = 0
+      self.closed     = False
+      self.reader     = threading.Thread( target = self.read_reply )
+      self.reader.daemon = True
+      self.reader.start()
+   #
+   # read_reply()
+   # store the replies from rss_server until it exits
+   def read_reply(self) :
+      for line in self.reply_file :
+         reply = json.loads(line)
+         with self.condition :
+            self.reply[ reply['id'] ] = reply
+            self.condition.notify_all()
+      with self.condition :
+         self.closed = True
+         self.condition.notify_all()
+   #
+   # (returncode, stderr, peak_rss_mb) = run(command, stdout_name, timeout)
+   # Run command with its standard output appended to the file stdout_name
+   # (None for the standard output of rss_server). If timeout is not None,
+   # the command is killed after timeout seconds and returncode is None.
+   # peak_rss_mb is the maximum resident set size for the command in
+   # megabytes.
+   def run(self, command, stdout_name, timeout) :
+      with self.condition :
+         request_id    = self.next_id
+         self.next_id += 1
+         request       = {
+            'id'      : request_id ,
+            'command' : command ,
+            'timeout' : timeout ,
+            'stdout'  : stdout_name ,
+         }
+         self.process.stdin.write( json.dumps(request) + '\n' )
+         self.process.stdin.flush()
+         while request_id not in self.reply :
+            assert not self.closed, 'fit_one_job: rss_server exited'
+            self.condition.wait()
+         reply = self.reply.pop(request_id)
+      peak_rss_mb = reply['kilobytes'] / 1024.0
+      return (reply['returncode'], reply['stderr'], peak_rss_mb)
+   #
+   # close()
+   # wait for rss_server to exit
+   def close(self) :
+      if self.process.stdin.closed :
+         return
+      self.process.stdin.close()
+      self.process.wait()
+      self.reader.join()
+      self.reply_file.close()
+   #
+   # __del__
+   def __del__(self) :
+      self.close()
+# ----------------------------------------------------------------------------
+# (returncode, stderr) = run_process(command, stdout, timeout)
+# Run command with its standard output going to stdout. If timeout is not
+# None, the command is killed after timeout seconds and returncode is None.
+# stderr is the standard error for the command.
+def run_process(command, stdout, timeout) :
+   try :
+      result = subprocess.run(
          command,
-         print_command = False,
-         return_stdout = False,
-         return_stderr = False,
-         file_stdout   = file_stdout,
-         file_stderr   = None,
-         write_command = True,
+         stdout   = stdout,
+         stderr   = subprocess.PIPE,
+         encoding = 'utf-8',
+         timeout  = timeout,
       )
+   except subprocess.TimeoutExpired as e :
+      return (None, e.stderr)
+   return (result.returncode, result.stderr)
+# ----------------------------------------------------------------------------
+# (ok, peak_rss_mb) = system_command(command, file_stdout, timeout, rss_server)
+# If timeout is not None, the command is killed after timeout seconds
+# and ok is false. Otherwise ok is true. If rss_server is None, the command
+# is run directly and peak_rss_mb is zero. Otherwise it is run using
+# rss_server and peak_rss_mb is the maximum resident set size for the command.
+def system_command(command, file_stdout, timeout = None, rss_server = None) :
+   if file_stdout is None :
+      print( ' '.join(command), flush = True )
+   else :
+      file_stdout.write( ' '.join(command) + '\n' )
+      file_stdout.flush()
+   if rss_server is None :
+      peak_rss_mb = 0.0
+      (returncode, stderr) = run_process(command, file_stdout, timeout)
+   else :
+      (returncode, stderr, peak_rss_mb) = \
+         rss_server.run(command, None, timeout)
+   if returncode is None :
+      return (False, peak_rss_mb)
+   if returncode != 0 :
+      msg  = 'fit_one_job: command failed: ' + ' '.join(command) + '\n'
+      msg += stderr
+      assert False, msg
+   return (True, peak_rss_mb)
+# ----------------------------------------------------------------------------
+# (ok, peak_rss_mb) = sample_in_chunks(
+#  fit_database, sample_method, fit_type, chunk_size, extra_cpu, file_stdout,
+#  timeout, rss_server
+# )
+# Run the sample command for each chunk size in chunk_size on a copy of
+# fit_database, in parallel using the cpus in extra_cpu, and merge the
+# results into the sample table in fit_database. If timeout is not None,
+# the commands are killed after timeout seconds and ok is false.
+# The chunks may run at the same time, so peak_rss_mb is the sum,
+# over the chunks, of the maximum resident set size for the chunk
+# (zero if rss_server is None); see system_command.
+def sample_in_chunks(
+   fit_database, sample_method, fit_type, chunk_size, extra_cpu, file_stdout,
+   timeout, rss_server
+) :
+   #
+   # deadline
+   deadline = None
+   if timeout is not None :
+      deadline = time.time() + timeout
+   #
+   # random_seed, n_log, n_var
+   connection = dismod_at.create_connection(
+      fit_database, new = False, readonly = True
+   )
+   option_table = dismod_at.get_table_dict(connection, 'option')
+   n_log = 0
+   if at_cascade.table_exists(connection, 'log') :
+      command = 'SELECT max(log_id) FROM log'
+      n_log   = dismod_at.sql_command(connection, command)[0][0] or 0
+   command = 'SELECT count(*) FROM var'
+   n_var   = dismod_at.sql_command(connection, command)[0][0]
+   connection.close()
+   random_seed = 0
+   for row in option_table :
+      if row['option_name'] == 'random_seed' :
+         random_seed = int( row['option_value'] )
+   if random_seed == 0 :
+      random_seed = int( time.time() )
+   #
+   # chunk_database, chunk_stdout, chunk_command
+   n_chunk = len(chunk_size)
+   stem    = fit_database
+   if stem.endswith('.db') :
+      stem = stem[: -3]
+   chunk_database = [ f'{stem}.sample_{k}.db' for k in range(n_chunk) ]
+   chunk_stdout   = [ f'{stem}.sample_{k}.out' for k in range(n_chunk) ]
+   chunk_command  = list()
+   for k in range(n_chunk) :
+      database = chunk_database[k]
+      number   = str( chunk_size[k] )
+      command_list = list()
+      if sample_method == 'simulate' :
+         command_list.append(
+            [ 'dismod_at', database, 'set', 'truth_var', 'fit_var' ]
+         )
+         command_list.append( [ 'dismod_at', database, 'simulate', number ] )
+      command_list.append(
+         [ 'dismod_at', database, 'sample', sample_method, fit_type, number ]
+      )
+      chunk_command.append(command_list)
+   #
+   # chunk_database
+   # each chunk has a different random_seed
+   for k in range(n_chunk) :
+      shutil.copyfile(fit_database, chunk_database[k])
+      connection = dismod_at.create_connection(
+         chunk_database[k], new = False, readonly = False
+      )
+      command  = "DELETE FROM option WHERE option_name = 'random_seed'"
+      dismod_at.sql_command(connection, command)
+      command  = 'INSERT INTO option (option_name, option_value) '
+      command += f"VALUES ('random_seed', '{random_seed + k}')"
+      dismod_at.sql_command(connection, command)
+      connection.close()
+   #
+   # run_chunk, chunk_peak_rss_mb
+   chunk_peak_rss_mb = n_chunk * [ 0.0 ]
+   def run_chunk(k) :
+      # rss_server appends to chunk_stdout[k]
+      open(chunk_stdout[k], 'w').close()
+      with open(chunk_stdout[k], 'a') as stdout :
+         for command in chunk_command[k] :
+            seconds = None
+            if deadline is not None :
+               seconds = deadline - time.time()
+               if seconds <= 0.0 :
+                  return 'timeout'
+            stdout.write( ' '.join(command) + '\n' )
+            stdout.flush()
+            if rss_server is None :
+               (returncode, stderr) = run_process(command, stdout, seconds)
+            else :
+               (returncode, stderr, peak_rss_mb) = \
+                  rss_server.run(command, chunk_stdout[k], seconds)
+               chunk_peak_rss_mb[k] = max(chunk_peak_rss_mb[k], peak_rss_mb)
+            if returncode is None :
+               return 'timeout'
+            if returncode != 0 :
+               msg  = 'fit_one_job: command failed: '
+               msg += ' '.join(command) + '\n' + stderr
+               return msg
+      return 'ok'
+   #
+   # n_extra
+   n_extra = 0
+   if extra_cpu is not None :
+      n_extra = extra_cpu.acquire(n_chunk - 1)
+   #
+   # result
+   try :
+      with concurrent.futures.ThreadPoolExecutor(
+         max_workers = 1 + n_extra
+      ) as executor :
+         result = list( executor.map( run_chunk, range(n_chunk) ) )
+   finally :
+      if extra_cpu is not None :
+         extra_cpu.release(n_extra)
+   #
+   # file_stdout
+   for k in range(n_chunk) :
+      if os.path.exists( chunk_stdout[k] ) :
+         with open(chunk_stdout[k], 'r') as stdout :
+            text = stdout.read()
+         if file_stdout is None :
+            print(text, end = '')
+         else :
+            file_stdout.write(text)
+            file_stdout.flush()
+   #
+   # fit_database: sample and log tables
+   ok  = 'timeout' not in result
+   msg = None
+   for chunk_result in result :
+      if chunk_result not in [ 'ok', 'timeout' ] :
+         msg = chunk_result
+   if ok and msg is None :
+      connection = dismod_at.create_connection(
+         fit_database, new = False, readonly = False
+      )
+      cursor = connection.cursor()
+      cursor.execute('DROP TABLE IF EXISTS sample')
+      offset = 0
+      for k in range(n_chunk) :
+         cursor.execute('ATTACH DATABASE ? AS chunk', (chunk_database[k],) )
+         if k == 0 :
+            command = "SELECT sql FROM chunk.sqlite_master WHERE name = ?"
+            sql     = cursor.execute(command, ('sample',) ).fetchall()[0][0]
+            cursor.execute(sql)
+         command  = 'INSERT INTO main.sample '
+         command += '(sample_id, sample_index, var_id, var_value) '
+         command += 'SELECT sample_id + ?, sample_index + ?, '
+         command += 'var_id, var_value FROM chunk.sample ORDER BY sample_id'
+         cursor.execute(command, (offset * n_var, offset) )
+         command  = 'INSERT INTO main.log '
+         command += '(message_type, table_name, row_id, unix_time, message) '
+         command += 'SELECT message_type, table_name, row_id, unix_time, '
+         command += 'message FROM chunk.log WHERE log_id > ? AND '
+         command += "message_type IN ('error', 'warning')"
+         cursor.execute(command, (n_log,) )
+         connection.commit()
+         cursor.execute('DETACH DATABASE chunk')
+         offset += chunk_size[k]
+      connection.close()
+   #
+   # chunk_database, chunk_stdout
+   for file_name in chunk_database + chunk_stdout :
+      if os.path.exists(file_name) :
+         os.remove(file_name)
+   #
+   if msg is not None :
+      assert False, msg
+   return (ok, sum(chunk_peak_rss_mb) )
 # ----------------------------------------------------------------------------
 # BEGIN_DEF
 # at_cascade.fit_one_job
@@ -171,6 +723,12 @@ def fit_one_job(
    fit_type                ,
    first_fit               ,
    trace_file_obj   = None ,
+   fit_stage        = 'all',
+   fit_database     = None ,
+   stage_seconds    = None ,
+   extra_cpu        = None ,
+   release_child    = None ,
+   cascade_hash     = None ,
 ) :
    assert type(job_table) == list
    assert type(run_job_id) == int
@@ -181,6 +739,12 @@ def fit_one_job(
    assert type(first_fit) == bool
    if trace_file_obj is not None :
       assert isinstance(trace_file_obj, io.TextIOBase)
+   assert fit_stage in [ 'all', 'fit', 'children' ]
+   assert fit_database == None or fit_stage == 'fit'
+   assert stage_seconds == None or type(stage_seconds) == dict
+   assert extra_cpu == None or hasattr(extra_cpu, 'acquire')
+   assert release_child == None or callable(release_child)
+   assert cascade_hash == None or type(cascade_hash) == str
    # END_DEF
    #
    # trace_line_number
@@ -294,6 +858,67 @@ def fit_one_job(
          msg += 'list with three elements'
          assert False, msg
    #
+   # max_stage_seconds
+   max_stage_seconds = dict()
+   for stage in [ 'fit', 'sample' ] :
+      max_stage_seconds[stage] = None
+      key = f'max_{stage}_seconds'
+      if key in option_all_dict :
+         max_stage_seconds[stage] = float( option_all_dict[key] )
+   #
+   # number_sample_chunk
+   number_sample_chunk = 1
+   if 'number_sample_chunk' in option_all_dict :
+      number_sample_chunk = int( option_all_dict['number_sample_chunk'] )
+      if number_sample_chunk < 1 :
+         msg  = 'option_all table: number_sample_chunk = '
+         msg += f'{number_sample_chunk} is less than one'
+         assert False, msg
+   #
+   # timeout_action
+   timeout_action = 'fallback'
+   if 'timeout_action' in option_all_dict :
+      timeout_action = option_all_dict['timeout_action']
+      if timeout_action not in [ 'fallback', 'error' ] :
+         msg  = f'option_all table: timeout_action = {timeout_action} '
+         msg += 'is not fallback or error'
+         assert False, msg
+   #
+   # warm_start
+   warm_start = False
+   if 'warm_start_from_parent' in option_all_dict :
+      warm_start = option_all_dict['warm_start_from_parent']
+      if warm_start not in [ 'true', 'false' ] :
+         msg  = f'option_all table: warm_start_from_parent = {warm_start} '
+         msg += 'is not true or false'
+         assert False, msg
+      warm_start = warm_start == 'true'
+   if warm_start :
+      for key in [ 'start', 'scale' ] :
+         long_key = f'perturb_optimization_{key}'
+         if float( option_all_dict.get(long_key, '0') ) != 0.0 :
+            msg  = 'option_all table: warm_start_from_parent is true and '
+            msg += f'{long_key} = {option_all_dict[long_key]} is not zero'
+            assert False, msg
+   warm_start = warm_start and job_table[run_job_id]['parent_job_id'] != None
+   #
+   # lazy_shift_db
+   lazy_shift_db = False
+   if 'lazy_shift_db' in option_all_dict :
+      lazy_shift_db = option_all_dict['lazy_shift_db']
+      if lazy_shift_db not in [ 'true', 'false' ] :
+         msg  = f'option_all table: lazy_shift_db = {lazy_shift_db} '
+         msg += 'is not true or false'
+         assert False, msg
+      lazy_shift_db = lazy_shift_db == 'true'
+   #
+   # fit_cache_dir, max_fit_cache_bytes
+   fit_cache_dir       = option_all_dict.get('fit_cache_dir', None)
+   max_fit_cache_bytes = 10 * 10**9
+   if 'max_fit_cache_gb' in option_all_dict :
+      max_fit_cache_gb    = float( option_all_dict['max_fit_cache_gb'] )
+      max_fit_cache_bytes = int( max_fit_cache_gb * 10**9 )
+   #
    # node_split_set
    node_split_set = set()
    for row in all_table['node_split'] :
@@ -309,12 +934,38 @@ def fit_one_job(
       fit_node_id             = fit_node_id ,
       fit_split_reference_id  = fit_split_reference_id,
    )
-   fit_database      = f'{result_dir}/{database_dir}/dismod.db'
+   if fit_database is None :
+      fit_database   = f'{result_dir}/{database_dir}/dismod.db'
+   #
+   # fit_database
+   # create this database if its parent deferred it; see lazy_shift_db
+   if not os.path.exists(fit_database) :
+      at_cascade.materialize_shift_db(
+         all_node_database, node_table, job_table, run_job_id
+      )
    #
    # check fit_database
    parent_node_name = at_cascade.get_parent_node(fit_database)
    assert parent_node_name == node_table[fit_node_id]['node_name']
    #
+   # stage_timeout
+   # log the timeout for this stage and raise the corresponding exception
+   def stage_timeout(stage) :
+      connection = dismod_at.create_connection(
+         fit_database, new = False, readonly = False
+      )
+      at_cascade.add_log_entry(connection, f'{stage}: timeout')
+      connection.close()
+      stage_timer.stop(f'{stage}: timeout')
+      #
+      job_name = job_table[run_job_id]['job_name']
+      seconds  = max_stage_seconds[stage]
+      if timeout_action == 'error' :
+         msg = f'timeout: abort {job_name} {stage} > {seconds} seconds'
+      else :
+         msg = f'{stage}: timeout {job_name} {stage} > {seconds} seconds'
+      raise Exception(msg)
+   #
    # integrand_table
    root_database      = option_all_dict['root_database']
    fit_or_root        = at_cascade.fit_or_root_class(
@@ -323,164 +974,382 @@ def fit_one_job(
    integrand_table = fit_or_root.get_table('integrand')
    fit_or_root.close()
    #
-   # fit_database: log table
-   connection = dismod_at.create_connection(
-      fit_database, new = False, readonly = False
-   )
-   command = 'DROP TABLE IF EXISTS log'
-   dismod_at.sql_command(connection, command)
-   #
-   # init
-   command = [ 'dismod_at', fit_database, 'init' ]
-   system_command(command, file_stdout)
-   #
-   # max_fit
-   if 'max_fit' in option_all_dict :
-      max_fit = option_all_dict['max_fit']
-      if double_max_fit :
-         max_fit = str( 2 * int(max_fit) )
-      for integrand_id in fit_integrand :
-         integrand_name = integrand_table[integrand_id]['integrand_name']
-         command = [
-            'dismod_at', fit_database,
-            'hold_out', integrand_name, max_fit
-         ]
-         if max_fit_parent is not None :
-            command += [ max_fit_parent ]
-         if balance_fit is not None :
-            command += balance_fit
-         system_command(command, file_stdout)
-   #
-   # max_abs_effect
-   if 'max_abs_effect' in option_all_dict:
-      max_abs_effect = option_all_dict['max_abs_effect']
-      command =[
-         'dismod_at', fit_database, 'bnd_mulcov', max_abs_effect
-      ]
-      system_command(command, file_stdout)
-   #
-   # perturb_optimization
-   perturb_optimization = dict()
-   for key in [ 'start', 'scale' ] :
-      long_key = f'perturb_optimization_{key}'
-      if long_key in option_all_dict :
-         sigma = option_all_dict[long_key]
-         if float(sigma) < 0.0 :
-            msg = f'fit_one_job: perturb_optimization_{key} = '
-            msg += sigma
-            msg += ' is less than zero'
-            assert False, msg
-         if float(sigma) > 0.0 :
-            perturb_optimization[key] = sigma
-   #
-   # fit_database: scale_var and start_var tables
-   for key in perturb_optimization :
-      sigma = perturb_optimization[key]
-      table = f'{key}_var'
-      command = [
-         'dismodat.py', fit_database, 'perturb', table, sigma
-      ]
-      system_command(command, file_stdout)
-   #
-   # fit_node_datase.log_table
-   # if fit has no data, abort with 'fit: error: no data abort' in log_table
-   # ( unless this fit has no ancestors; i.e., run_job_id == 0 ).
-   data_include_table = at_cascade.data_include(
-      fit_database, root_database
-   )
-   if len( data_include_table )  == 0 and run_job_id > 0:
-      msg        = 'no data: abort'
-      connection = dismod_at.create_connection(
-         fit_database, new = False, readonly = False
+   # rss_server
+   # the resident set size is only measured when it is recorded
+   rss_server = None
+   if 'job_history_database' in option_all_dict :
+      rss_server = rss_server_class(file_stdout)
+   #
+   # step_seconds, step_peak_rss_mb, run_command
+   # wall time and maximum resident set size (megabytes) for each
+   # dismod_at command (step) in this job
+   step_seconds     = dict()
+   step_peak_rss_mb = dict()
+   def run_command(command, timeout = None) :
+      step       = command[2]
+      step_start = time.time()
+      (ok, peak_rss_mb) = system_command(
+         command, file_stdout, timeout, rss_server
       )
-      at_cascade.add_log_entry(connection, msg)
-      #
-      job_name = job_table[run_job_id]['job_name']
-      msg      = f'no data: abort {job_name}'
-      raise Exception(msg)
+      step_seconds[step] = \
+         step_seconds.get(step, 0.0) + time.time() - step_start
+      step_peak_rss_mb[step] = \
+         max( step_peak_rss_mb.get(step, 0.0), peak_rss_mb )
+      return ok
    #
-   # fit
-   command = [ 'dismod_at', fit_database, 'fit', fit_type ]
-   system_command(command, file_stdout)
+   # trace_message
+   def trace_message(msg) :
+      if file_stdout is None :
+         print(msg)
+      else :
+         file_stdout.write( msg + '\n' )
+         file_stdout.flush()
    #
-   # fit_database.log_table
-   connection = dismod_at.create_connection(
-      fit_database, new = False, readonly = False
-   )
-   msg      = 'fit: OK'
-   at_cascade.add_log_entry(connection, msg)
-   connection.close()
+   # print_step_seconds
+   def print_step_seconds() :
+      msg = 'fit_one_job: step seconds:'
+      for step in step_seconds :
+         msg += f' {step} = {step_seconds[step]:.2f},'
+      trace_message( msg.rstrip(',') )
    #
-   # number_simulate
-   if 'number_sample' not in option_all_dict :
-      number_simulate = '20'
+   # stage_seconds, stage_start
+   # wall time for each stage of this job
+   if stage_seconds is None :
+      stage_seconds = dict()
    else :
-      number_simulate = option_all_dict['number_sample']
-   #
-   # sample
-   if sample_method == 'simulate' :
-      if int( number_simulate ) > 20 :
-         msg  = 'option_all table: number_sample > 20 and '
-         msg += 'sample_method is simulate.'
-         assert False, msg
-      command = [
-         'dismod_at', fit_database, 'set', 'truth_var', 'fit_var'
-      ]
-      system_command(command, file_stdout)
-      command = [
-         'dismod_at', fit_database, 'simulate', number_simulate
-      ]
-      system_command(command, file_stdout)
-   command = [
-      'dismod_at',
-      fit_database,
-      'sample',
-      sample_method,
-      fit_type,
-      number_simulate
-   ]
-   system_command(command, file_stdout)
+      stage_seconds = dict( stage_seconds )
+   stage_start   = time.time()
    #
-   # fit_database.log_table
-   connection = dismod_at.create_connection(
-      fit_database, new = False, readonly = False
-   )
-   msg      = 'sample: OK'
-   at_cascade.add_log_entry(connection, msg)
-   connection.close()
+   # stage_timer
+   # wall time, cpu time, and memory for each stage in at_cascade_timing
+   stage_timer = at_cascade.stage_timer_class(fit_database, fit_type)
    #
-   # avgint_parent_grid
-   at_cascade.avgint_parent_grid(
-      all_node_database = all_node_database ,
-      fit_database      = fit_database ,
-      job_table         = job_table         ,
-      fit_job_id        = run_job_id        ,
-   )
+   # cache_hit, input_hash
+   # cache_hit is true if the fit and sample results were in the fit cache
+   cache_hit  = False
+   input_hash = None
    #
-   # connection
-   connection = dismod_at.create_connection(
-      fit_database, new = False, readonly = False
-   )
-   #
-   # c_shift_predict_fit_var
-   command = [ 'dismod_at', fit_database, 'predict', 'fit_var' ]
-   system_command(command, file_stdout)
-   at_cascade.move_table(connection, 'predict', 'c_shift_predict_fit_var')
+   if fit_stage != 'children' :
+      #
+      # fit_database: log table
+      # keep the timeout entries from a previous fit of this job
+      connection = dismod_at.create_connection(
+         fit_database, new = False, readonly = False
+      )
+      if first_fit or not at_cascade.table_exists(connection, 'log') :
+         command = 'DROP TABLE IF EXISTS log'
+      else :
+         command  = "DELETE FROM log WHERE message_type != 'at_cascade' "
+         command += "OR message NOT LIKE '%: timeout'"
+      dismod_at.sql_command(connection, command)
+      #
+      # fit_database: at_cascade_timing table
+      # keep the timing for a previous fit of this job
+      if first_fit :
+         command = 'DROP TABLE IF EXISTS at_cascade_timing'
+         dismod_at.sql_command(connection, command)
+      connection.close()
+      #
+      # init
+      command = [ 'dismod_at', fit_database, 'init' ]
+      run_command(command)
+      #
+      # data_include_table
+      # data that is included in this fit before the hold_out commands
+      data_include_table = at_cascade.data_include(
+         fit_database, root_database
+      )
+      stage_timer.stop('init')
+      #
+      # max_fit, held_out
+      held_out = False
+      if 'max_fit' in option_all_dict :
+         max_fit = option_all_dict['max_fit']
+         if double_max_fit :
+            max_fit = str( 2 * int(max_fit) )
+         #
+         # integrand_count
+         integrand_count = dict()
+         for row in data_include_table :
+            integrand_id = row['integrand_id']
+            integrand_count[integrand_id] = \
+               integrand_count.get(integrand_id, 0) + 1
+         #
+         # max_count
+         # a hold_out command does not change the fit_database when the
+         # number of data values for its integrand is <= max_count
+         max_count = int(max_fit)
+         if max_fit_parent is not None :
+            max_count = min( max_count, int(max_fit_parent) )
+         #
+         for integrand_id in fit_integrand :
+            if integrand_count.get(integrand_id, 0) > max_count :
+               integrand_name = \
+                  integrand_table[integrand_id]['integrand_name']
+               command = [
+                  'dismod_at', fit_database,
+                  'hold_out', integrand_name, max_fit
+               ]
+               if max_fit_parent is not None :
+                  command += [ max_fit_parent ]
+               if balance_fit is not None :
+                  command += balance_fit
+               run_command(command)
+               held_out = True
+      #
+      # max_abs_effect
+      if 'max_abs_effect' in option_all_dict:
+         max_abs_effect = option_all_dict['max_abs_effect']
+         command =[
+            'dismod_at', fit_database, 'bnd_mulcov', max_abs_effect
+         ]
+         run_command(command)
+      #
+      # perturb_optimization
+      perturb_optimization = dict()
+      for key in [ 'start', 'scale' ] :
+         long_key = f'perturb_optimization_{key}'
+         if long_key in option_all_dict :
+            sigma = option_all_dict[long_key]
+            if float(sigma) < 0.0 :
+               msg = f'fit_one_job: perturb_optimization_{key} = '
+               msg += sigma
+               msg += ' is less than zero'
+               assert False, msg
+            if float(sigma) > 0.0 :
+               perturb_optimization[key] = sigma
+      #
+      # fit_database: scale_var and start_var tables
+      for key in perturb_optimization :
+         sigma      = float( perturb_optimization[key] )
+         table      = f'{key}_var'
+         step_start = time.time()
+         at_cascade.perturb_var(fit_database, table, sigma)
+         step_seconds['perturb'] = \
+            step_seconds.get('perturb', 0.0) + time.time() - step_start
+      #
+      # data_include_table
+      if held_out :
+         data_include_table = at_cascade.data_include(
+            fit_database, root_database
+         )
+      #
+      # fit_node_datase.log_table
+      # if fit has no data, abort with 'fit: error: no data abort' in log_table
+      # ( unless this fit has no ancestors; i.e., run_job_id == 0 ).
+      if len( data_include_table )  == 0 and run_job_id > 0:
+         msg        = 'no data: abort'
+         connection = dismod_at.create_connection(
+            fit_database, new = False, readonly = False
+         )
+         at_cascade.add_log_entry(connection, msg)
+         #
+         job_name = job_table[run_job_id]['job_name']
+         msg      = f'no data: abort {job_name}'
+         raise Exception(msg)
+      stage_timer.stop('hold_out')
+      #
+      # stage_seconds['init']
+      stage_seconds['init'] = time.time() - stage_start
+      stage_start           = time.time()
+      #
+      # cache_hit
+      if fit_cache_dir is not None and fit_stage == 'all' :
+         if cascade_hash is None :
+            cascade_hash = \
+               at_cascade.fit_cache_class.cascade_hash(all_node_database)
+         input_hash = at_cascade.fit_cache_class.input_hash(
+            cascade_hash,
+            root_database,
+            fit_database,
+            job_table,
+            run_job_id,
+            fit_type,
+         )
+         fit_cache = at_cascade.fit_cache_class(
+            fit_cache_dir, max_fit_cache_bytes
+         )
+         cache_hit = fit_cache.get(input_hash, fit_database)
+         fit_cache.close()
+         if cache_hit :
+            connection = dismod_at.create_connection(
+               fit_database, new = False, readonly = False
+            )
+            for msg in [ 'fit: cache', 'fit: OK', 'sample: OK' ] :
+               at_cascade.add_log_entry(connection, msg)
+            connection.close()
+         stage_timer.stop('cache')
+      #
+      if not cache_hit :
+         #
+         # fit
+         command = [ 'dismod_at', fit_database, 'fit', fit_type ]
+         ok = run_command(command, max_stage_seconds['fit'])
+         if not ok :
+            stage_timeout('fit')
+         #
+         # stage_seconds['fit']
+         stage_seconds['fit'] = time.time() - stage_start
+         stage_start          = time.time()
+         #
+         # fit_database.log_table
+         connection = dismod_at.create_connection(
+            fit_database, new = False, readonly = False
+         )
+         msg      = 'fit: OK'
+         at_cascade.add_log_entry(connection, msg)
+         connection.close()
+         stage_timer.stop('fit')
+         #
+         # number_simulate
+         if 'number_sample' not in option_all_dict :
+            number_simulate = '20'
+         else :
+            number_simulate = option_all_dict['number_sample']
+         #
+         # chunk_size
+         # number of samples in each chunk
+         n_sample   = int( number_simulate )
+         n_chunk    = max(1, min(number_sample_chunk, n_sample) )
+         chunk_size = [
+            n_sample // n_chunk + int( k < n_sample % n_chunk )
+            for k in range(n_chunk)
+         ]
+         #
+         # sample
+         if sample_method == 'simulate' :
+            if max(chunk_size) > 20 :
+               msg  = 'option_all table: number_sample > 20 times '
+               msg += 'number_sample_chunk and sample_method is simulate.'
+               assert False, msg
+         if n_chunk > 1 :
+            step_start = time.time()
+            (ok, peak_rss_mb) = sample_in_chunks(
+               fit_database,
+               sample_method,
+               fit_type,
+               chunk_size,
+               extra_cpu,
+               file_stdout,
+               max_stage_seconds['sample'],
+               rss_server,
+            )
+            step_seconds['sample'] = \
+               step_seconds.get('sample', 0.0) + time.time() - step_start
+            step_peak_rss_mb['sample'] = \
+               max( step_peak_rss_mb.get('sample', 0.0), peak_rss_mb )
+            if not ok :
+               stage_timeout('sample')
+         else :
+            if sample_method == 'simulate' :
+               command = [
+                  'dismod_at', fit_database, 'set', 'truth_var', 'fit_var'
+               ]
+               run_command(command)
+               command = [
+                  'dismod_at', fit_database, 'simulate', number_simulate
+               ]
+               run_command(command)
+            command = [
+               'dismod_at',
+               fit_database,
+               'sample',
+               sample_method,
+               fit_type,
+               number_simulate
+            ]
+            ok = run_command(command, max_stage_seconds['sample'])
+            if not ok :
+               stage_timeout('sample')
+         #
+         # fit_database.log_table
+         connection = dismod_at.create_connection(
+            fit_database, new = False, readonly = False
+         )
+         msg      = 'sample: OK'
+         at_cascade.add_log_entry(connection, msg)
+         connection.close()
+         stage_timer.stop('sample')
+         #
+         # stage_seconds['sample']
+         stage_seconds['sample'] = time.time() - stage_start
+         stage_start             = time.time()
    #
-   # c_shift_predict_sample
-   command = [ 'dismod_at', fit_database, 'predict', 'sample' ]
-   system_command(command, file_stdout)
-   at_cascade.move_table(connection, 'predict', 'c_shift_predict_sample')
+   if fit_stage == 'fit' :
+      print_step_seconds()
+      return stage_seconds
    #
-   # c_shift_avgint
-   # is the table created by avgint_parent_grid
-   at_cascade.move_table(connection, 'avgint', 'c_shift_avgint')
+   # avgint_parent_grid
+   # c_shift tables are in the fit_database when cache_hit is true
+   if not cache_hit :
+      #
+      # avgint_parent_grid
+      at_cascade.avgint_parent_grid(
+         all_node_database = all_node_database ,
+         fit_database      = fit_database ,
+         job_table         = job_table         ,
+         fit_job_id        = run_job_id        ,
+      )
+      stage_timer.stop('avgint_parent_grid')
+      #
+      # connection
+      connection = dismod_at.create_connection(
+         fit_database, new = False, readonly = False
+      )
+      #
+      # c_shift_predict_fit_var
+      command = [ 'dismod_at', fit_database, 'predict', 'fit_var' ]
+      run_command(command)
+      at_cascade.move_table(
+         connection, 'predict', 'c_shift_predict_fit_var'
+      )
+      stage_timer.stop('predict fit_var')
+      #
+      # c_shift_predict_sample
+      command = [ 'dismod_at', fit_database, 'predict', 'sample' ]
+      run_command(command)
+      at_cascade.move_table(
+         connection, 'predict', 'c_shift_predict_sample'
+      )
+      stage_timer.stop('predict sample')
+      #
+      # c_shift_avgint
+      # is the table created by avgint_parent_grid
+      at_cascade.move_table(connection, 'avgint', 'c_shift_avgint')
+      #
+      # connection
+      connection.close()
+      #
+      # fit_cache
+      if fit_cache_dir is not None :
+         if input_hash is None :
+            if cascade_hash is None :
+               cascade_hash = \
+                  at_cascade.fit_cache_class.cascade_hash(all_node_database)
+            input_hash = at_cascade.fit_cache_class.input_hash(
+               cascade_hash,
+               root_database,
+               fit_database,
+               job_table,
+               run_job_id,
+               fit_type,
+            )
+         fit_cache = at_cascade.fit_cache_class(
+            fit_cache_dir, max_fit_cache_bytes
+         )
+         fit_cache.put(input_hash, fit_database)
+         fit_cache.close()
+         stage_timer.stop('cache')
    #
-   # connection
-   connection.close()
+   # stage_seconds['predict']
+   stage_seconds['predict'] = time.time() - stage_start
+   stage_start              = time.time()
+   stage_timer.start()
    #
-   # shift_databases
+   # shift_databases, shift_job_id, lazy_shift
    shift_databases = dict()
+   shift_job_id    = dict()
+   lazy_shift      = set()
    for job_id in range(start_child_job_id, end_child_job_id) :
       #
       # shift_node_id
@@ -519,8 +1388,20 @@ def fit_one_job(
       else :
          shift_name = dir_list[-1]
       #
-      # shfit_databases
+      # shfit_databases, shift_job_id
       shift_databases[shift_name] = shift_node_database
+      shift_job_id[shift_name]    = job_id
+      #
+      # lazy_shift
+      # the databases for prior_only jobs are always created
+      if lazy_shift_db and not job_table[job_id]['prior_only'] :
+         lazy_shift.add(shift_name)
+   #
+   # shift_done
+   shift_done = None
+   if release_child != None :
+      def shift_done(shift_name) :
+         release_child( shift_job_id[shift_name] )
    #
    # create shifted databases
    at_cascade.create_shift_db(
@@ -529,6 +1410,10 @@ def fit_one_job(
       shift_databases   = shift_databases,
       no_ode_fit        = False,
       job_table         = job_table,
+      stage_timer       = stage_timer,
+      extra_cpu         = extra_cpu,
+      shift_done        = shift_done,
+      lazy_shift        = lazy_shift,
    )
    #
    # empty_avgint_table
@@ -547,4 +1432,80 @@ def fit_one_job(
    at_cascade.add_log_entry(connection, msg)
    connection.close()
    #
+   # stage_seconds['shift']
+   stage_seconds['shift'] = time.time() - stage_start
+   #
+   # fit_iterations
+   # number of ipopt iterations in the optimization of the fixed effects
+   fit_iterations = None
+   connection     = dismod_at.create_connection(
+      fit_database, new = False, readonly = True
+   )
+   if at_cascade.table_exists(connection, 'trace_fixed') :
+      command        = 'SELECT max(iter) FROM trace_fixed'
+      fit_iterations = dismod_at.sql_command(connection, command)[0][0]
+   connection.close()
+   #
+   # fit_message
+   fit_message = f'fit_one_job: fit iterations = {fit_iterations}'
+   if warm_start :
+      fit_message += ', warm start'
+   #
+   # rss_server
+   if rss_server is not None :
+      rss_server.close()
+   #
+   # job_history
+   if 'job_history_database' in option_all_dict :
+      #
+      # n_data, n_var
+      connection = dismod_at.create_connection(
+         fit_database, new = False, readonly = True
+      )
+      command = 'SELECT count(*) FROM data_subset'
+      n_data  = dismod_at.sql_command(connection, command)[0][0]
+      command = 'SELECT count(*) FROM var'
+      n_var   = dismod_at.sql_command(connection, command)[0][0]
+      connection.close()
+      #
+      # row
+      row = {
+         'job_name'        : job_table[run_job_id]['job_name'] ,
+         'input_hash'      :
+            at_cascade.job_history_class.input_hash(all_node_database) ,
+         'fit_type'        : fit_type ,
+         'n_data'          : n_data ,
+         'n_var'           : n_var ,
+         'total_seconds'   : sum( stage_seconds.values() ) ,
+      }
+      for stage in stage_seconds :
+         row[ f'{stage}_seconds' ] = stage_seconds[stage]
+      #
+      # peak_rss_mb
+      row['peak_rss_mb'] = max( step_peak_rss_mb.values(), default = 0.0 )
+      #
+      # fit_iterations, warm_start
+      row['fit_iterations'] = fit_iterations
+      row['warm_start']     = int(warm_start)
+      #
+      history_database = option_all_dict['job_history_database']
+      job_history      = at_cascade.job_history_class(history_database)
+      #
+      # fit_message
+      cold_start = None
+      if warm_start and fit_iterations is not None :
+         cold_start = job_history.cold_start(row['job_name'], fit_type)
+      if cold_start is not None :
+         (cold_iterations, cold_seconds) = cold_start
+         saved_iterations = cold_iterations - fit_iterations
+         saved_seconds    = cold_seconds - stage_seconds.get('fit', 0.0)
+         fit_message += f', saved {saved_iterations:.0f} iterations'
+         fit_message += f' and {saved_seconds:.2f} fit seconds'
+      #
+      job_history.add_row(row)
+      job_history.close()
+   #
    # trace_line_number( inspect.currentframe().f_lineno )
+   trace_message(fit_message)
+   print_step_seconds()
+   return stage_seconds
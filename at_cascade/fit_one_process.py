@@ -9,9 +9,6 @@ catch_exceptions_and_continue = True
 {xrst_begin fit_one_process}
 {xrst_spell
   cpus
-  dtype
-  inuse
-  numpy
 }
 
 Fit Using One Process
@@ -64,9 +61,48 @@ fit_type_list
 This is a list with one or two elements
 and its possible elements are ``both`` and ``fixed``.
 For each job, the first type of fit is attempted.
-If it fails, and there is a second type of fit, it is attempted.
+If it fails, and there is a second type of fit, it is attempted
+(unless the failure message starts with ``no data: abort`` or
+``timeout: abort`` ; see :ref:`fit_one_job@Exception` ).
 If it also fails, the corresponding job fails.
 
+Speculative Fit
+===============
+If the :ref:`option_all_table@speculative_fit` option is true,
+there are two elements in *fit_type_list* ,
+and a cpu is not in use when a job starts,
+the second type of fit is run at the same time as the first.
+It is run in a separate process using a copy of the job's database
+called ``speculative.db`` and its trace output is written to
+``speculative.out`` ; both are in the same directory as the job's database.
+If the first type of fit succeeds, the second one is cancelled.
+Otherwise, if the second type of fit succeeds,
+its copy of the database replaces the job's database.
+The child databases are then created using the database that was chosen.
+The extra cpu is counted in ``number_cpu_inuse`` while it is in use,
+but the memory for the extra fit is not counted by
+:ref:`option_all_table@max_memory_gb` .
+
+Sample Chunks
+*************
+If the :ref:`option_all_table@number_sample_chunk` option is greater
+than one, the cpus that are not in use when a job starts its sample
+stage are used to run the chunks in parallel; see
+:ref:`fit_one_job@extra_cpu` .
+These cpus are counted in ``number_cpu_inuse`` while they are in use.
+The same cpus are used to create the child databases at the same time;
+see :ref:`create_shift_db@extra_cpu` .
+
+Child Release
+*************
+If *max_number_cpu* is greater than one,
+each child of a job is set to ready as soon as its
+:ref:`glossary@input_node_database` is created
+(instead of when the job is done); see :ref:`fit_one_job@release_child` .
+If a job has an error after some of its children are ready,
+another fit type is not tried for the job,
+and the children that are ready (and their descendants) are not aborted.
+
 job_status_name
 ***************
 is the name corresponding to each possible job status integer values.
@@ -85,43 +121,49 @@ corresponding name.
    'error', job had an exception
    'abort', job is a descendant of a job that had an exception
 
-shared_job_status_name
-**********************
-This is the name of the shared job status memory.
-The corresponding multiprocessing shared memory is
-a numpy array with ``dtype`` equal to ``int`` and
-with length equal to the length of *job_table* .
-The value *shared_job_status* [ *job_table_index* ] is the
-integer status code for the corresponding job; see *job_status_name* above.
-
-number_cpu_inuse
-****************
-This is the name of the number of cpus in use memory.
-The corresponding multiprocessing shared memory is
-a numpy array with ``dtype`` equal to ``int`` and
-with length equal to one.
-The value *number_cpu_inuse* [0] is the number of cpus (precesses)
-currently fitting this cascade.
+shared_memory_prefix_plus
+*************************
+This is the prefix for the names of the shared memory that holds the
+job status values, the number of jobs with each status,
+the ready job queue, and the number of cpus in use;
+see :ref:`shared_job_class-name` .
 
 shared_lock
 ***********
 is a shared memory lock, used by all the fit processes,
-that must be acquired to read or write shared memory; i.e.,
-*shared_job_status* or *shared_number_cpu_in_use* .
+that must be acquired to read or write shared memory.
+It is only held for operations that are :math:`O( \\log n )`
+where :math:`n` is the number of jobs.
 
 shared_event
 ************
 is multiprocessing event,  used by all the fit processes,
 that is used to signal that the shared memory has changed.
 
+priority
+********
+If this is None, the ready jobs are started in job_id order.
+Otherwise it is a ``list`` of ``float`` with length equal to the length of
+*job_table* and the ready jobs with the largest
+*priority* [ *job_id* ] are started first; see :ref:`job_priority-name` .
+All the processes for one call to :ref:`fit_parallel-name`
+must use the same priority.
+
+cascade_hash
+************
+This is the :ref:`fit_one_job@cascade_hash` argument
+for each call to fit_one_job.
+
 {xrst_end fit_one_process}
 '''
 # ----------------------------------------------------------------------------
+import os
 import sys
+import shutil
+import signal
 import datetime
 import multiprocessing
 from multiprocessing import shared_memory
-import numpy
 import at_cascade
 import dismod_at
 # ----------------------------------------------------------------------------
@@ -136,6 +178,227 @@ def acquire_lock(shared_lock) :
       msg = f'pre_one_process: did not obtain lock in {seconds} seconds'
       sys.exit(msg)
 # ----------------------------------------------------------------------------
+# extra_cpu_class
+# cpus, in addition to the one running a job, that the job can use;
+# see fit_one_job extra_cpu.
+# If wake_queue is not None, None is put in it when cpus are released.
+class extra_cpu_class :
+   #
+   # __init__
+   def __init__(
+      self, shared_lock, shared_event, shared_job, max_number_cpu,
+      wake_queue = None
+   ) :
+      self.shared_lock    = shared_lock
+      self.shared_event   = shared_event
+      self.shared_job     = shared_job
+      self.max_number_cpu = max_number_cpu
+      self.wake_queue     = wake_queue
+   #
+   # number = acquire(number)
+   # returns the number of cpus, less than or equal number, that were
+   # reserved in number_cpu_inuse
+   def acquire(self, number) :
+      acquire_lock(self.shared_lock)
+      number_cpu_inuse = self.shared_job.number_cpu_inuse[0]
+      number = max(0, min(number, self.max_number_cpu - number_cpu_inuse) )
+      self.shared_job.number_cpu_inuse[0] += number
+      self.shared_lock.release()
+      return number
+   #
+   # release(number)
+   # returns cpus that were reserved by acquire
+   def release(self, number) :
+      if number == 0 :
+         return
+      acquire_lock(self.shared_lock)
+      self.shared_job.number_cpu_inuse[0] -= number
+      self.shared_event.set()
+      self.shared_lock.release()
+      if self.wake_queue is not None :
+         self.wake_queue.put(None)
+# ----------------------------------------------------------------------------
+# speculative = get_speculative_fit(all_node_database)
+def get_speculative_fit(all_node_database) :
+   connection = dismod_at.create_connection(
+      all_node_database, new = False, readonly = True
+   )
+   option_all_table = dismod_at.get_table_dict(connection, 'option_all')
+   connection.close()
+   speculative = 'false'
+   for row in option_all_table :
+      if row['option_name'] == 'speculative_fit' :
+         speculative = row['option_value']
+   if speculative not in [ 'true', 'false' ] :
+      msg = f'option_all table: speculative_fit = {speculative} '
+      msg += 'is not true or false'
+      assert False, msg
+   return speculative == 'true'
+# ----------------------------------------------------------------------------
+# speculative_fit
+# Target for the process that fits the copy of a job's database.
+# It is the leader of a new process group so that it, and the dismod_at
+# command it is running, can be cancelled using os.killpg.
+def speculative_fit(
+   result_queue,
+   job_table,
+   this_job_id,
+   all_node_database,
+   node_table,
+   fit_integrand,
+   fit_type,
+   copy_database,
+   trace_file_name,
+   cascade_hash,
+) :
+   os.setpgrp()
+   job_name       = job_table[this_job_id]['job_name']
+   trace_file_obj = open(trace_file_name, 'w')
+   try :
+      stage_seconds = at_cascade.fit_one_job(
+         job_table         = job_table,
+         run_job_id        = this_job_id ,
+         all_node_database = all_node_database,
+         node_table        = node_table,
+         fit_integrand     = fit_integrand,
+         fit_type          = fit_type,
+         first_fit         = True,
+         trace_file_obj    = trace_file_obj,
+         fit_stage         = 'fit',
+         fit_database      = copy_database,
+         cascade_hash      = cascade_hash,
+      )
+   except Exception as e:
+      trace_file_obj.close()
+      print( f'fit {fit_type} {job_name} message: ' + str(e) )
+      sys.exit(1)
+   trace_file_obj.close()
+   result_queue.put(stage_seconds)
+# ----------------------------------------------------------------------------
+# (job_done, fit_type) = speculative_job( ... )
+# Fit both types in fit_type_list at the same time; see Speculative Fit above.
+def speculative_job(
+   job_table,
+   this_job_id,
+   all_node_database,
+   node_table,
+   fit_integrand,
+   fit_type_list,
+   result_database_dir,
+   trace_file_obj,
+   release_child,
+   cascade_hash,
+) :
+   assert len(fit_type_list) == 2
+   #
+   # job_name, fit_database, copy_database
+   job_name      = job_table[this_job_id]['job_name']
+   fit_database  = f'{result_database_dir}/dismod.db'
+   copy_database = f'{result_database_dir}/speculative.db'
+   if not os.path.exists(fit_database) :
+      at_cascade.materialize_shift_db(
+         all_node_database, node_table, job_table, this_job_id
+      )
+   shutil.copyfile(fit_database, copy_database)
+   #
+   # p
+   # also set the process group here in case p has not done it yet
+   result_queue = multiprocessing.Queue()
+   args = (
+      result_queue,
+      job_table,
+      this_job_id,
+      all_node_database,
+      node_table,
+      fit_integrand,
+      fit_type_list[1],
+      copy_database,
+      f'{result_database_dir}/speculative.out',
+      cascade_hash,
+   )
+   p = multiprocessing.Process(target = speculative_fit, args = args)
+   p.daemon = False
+   p.start()
+   try :
+      os.setpgid(p.pid, p.pid)
+   except OSError :
+      pass
+   #
+   # print message at start of these fits
+   now          = datetime.datetime.now()
+   current_time = now.strftime("%H:%M:%S")
+   for fit_type in fit_type_list :
+      print( f'Begin: {current_time}: fit {fit_type:<5} {job_name}' )
+   #
+   # fit_type, stage_seconds, have_data
+   # fit_type is the type of fit that is used (None if both failed)
+   fit_type      = None
+   stage_seconds = None
+   have_data     = True
+   try :
+      stage_seconds = at_cascade.fit_one_job(
+         job_table         = job_table,
+         run_job_id        = this_job_id ,
+         all_node_database = all_node_database,
+         node_table        = node_table,
+         fit_integrand     = fit_integrand,
+         fit_type          = fit_type_list[0],
+         first_fit         = True,
+         trace_file_obj    = trace_file_obj,
+         fit_stage         = 'fit',
+         cascade_hash      = cascade_hash,
+      )
+      fit_type = fit_type_list[0]
+   except Exception as e:
+      msg = str(e)
+      # another fit type is not tried for these failures
+      if msg.startswith( ('no data: abort', 'timeout: abort') ) :
+         have_data = False
+      print( f'fit {fit_type_list[0]} {job_name} message: ' + msg )
+   #
+   if fit_type is not None or not have_data :
+      #
+      # cancel the second fit
+      try :
+         os.killpg(p.pid, signal.SIGTERM)
+      except ProcessLookupError :
+         pass
+      p.join()
+   else :
+      #
+      # wait for the second fit
+      p.join()
+      if p.exitcode == 0 :
+         stage_seconds = result_queue.get()
+         shutil.copyfile(copy_database, fit_database)
+         fit_type = fit_type_list[1]
+   os.remove(copy_database)
+   #
+   # job_done
+   job_done = False
+   if fit_type is not None :
+      try :
+         at_cascade.fit_one_job(
+            job_table         = job_table,
+            run_job_id        = this_job_id ,
+            all_node_database = all_node_database,
+            node_table        = node_table,
+            fit_integrand     = fit_integrand,
+            fit_type          = fit_type,
+            first_fit         = False,
+            trace_file_obj    = trace_file_obj,
+            fit_stage         = 'children',
+            stage_seconds     = stage_seconds,
+            release_child     = release_child,
+         )
+         job_done = True
+      except Exception as e:
+         print( f'fit {fit_type} {job_name} message: ' + str(e) )
+   else :
+      fit_type = fit_type_list[1]
+   #
+   return (job_done, fit_type)
+# ----------------------------------------------------------------------------
 def get_result_database_dir(
    all_node_database, node_table, fit_node_id, fit_split_reference_id
 ) :
@@ -200,8 +463,10 @@ def try_one_job(
    fit_type_list,
    shared_lock,
    shared_event,
-   shared_job_status,
+   shared_job,
    job_status_name,
+   wake_queue   = None,
+   cascade_hash = None,
 )  :
    assert type(job_table) == list
    assert type(this_job_id) == int
@@ -239,17 +504,94 @@ def try_one_job(
    # prior_only
    assert not job_table[this_job_id]['prior_only']
    #
+   # job_journal
+   # the lock should not be aquired during journal operations
+   job_journal = at_cascade.job_journal_class(
+      all_node_database, max_number_cpu = max_number_cpu
+   )
+   job_journal.set_status( [ job_name ], 'run')
+   #
    # trace_file_obj
    trace_file_obj = None
    if max_number_cpu > 1 :
       trace_file_name = f'{result_database_dir}/trace.out'
       trace_file_obj  = open(trace_file_name, 'w')
    #
+   # extra_cpu
+   extra_cpu = None
+   if max_number_cpu > 1 :
+      extra_cpu = extra_cpu_class(
+         shared_lock, shared_event, shared_job, max_number_cpu, wake_queue
+      )
+   #
+   # job_profiler
+   job_profiler = at_cascade.job_profiler_class(
+      all_node_database, job_name, f'{result_database_dir}/profile.prof'
+   )
+   job_profiler.start()
+   #
+   # released, release_child
+   # released is the set of child jobs that were made ready while this job
+   # was creating the child databases; see fit_one_job release_child.
+   released      = set()
+   release_child = None
+   if max_number_cpu > 1 :
+      def release_child(child_job_id) :
+         acquire_lock(shared_lock)
+         ready = shared_job.status(child_job_id) == job_status_wait
+         if ready :
+            shared_job.set_status(child_job_id, job_status_ready)
+            released.add(child_job_id)
+            shared_event.set()
+         shared_lock.release()
+         if ready and wake_queue is not None :
+            wake_queue.put(None)
+   #
+   # speculative
+   # is there a cpu available for a speculative fit
+   speculative = catch_exceptions_and_continue and max_number_cpu > 1
+   speculative = speculative and len(fit_type_list) == 2
+   speculative = speculative and get_speculative_fit(all_node_database)
+   if speculative :
+      acquire_lock(shared_lock)
+      speculative = shared_job.number_cpu_inuse[0] < max_number_cpu
+      if speculative :
+         shared_job.number_cpu_inuse[0] += 1
+      shared_lock.release()
+   #
    # job_done, fit_type_index, fit_type, have_data
    job_done       = False
    have_data      = True
    fit_type_index = 0
+   if speculative :
+      (job_done, fit_type) = speculative_job(
+         job_table,
+         this_job_id,
+         all_node_database,
+         node_table,
+         fit_integrand,
+         fit_type_list,
+         result_database_dir,
+         trace_file_obj,
+         release_child,
+         cascade_hash,
+      )
+      #
+      # shared_job.number_cpu_inuse
+      acquire_lock(shared_lock)
+      shared_job.number_cpu_inuse[0] -= 1
+      shared_event.set()
+      shared_lock.release()
+      if wake_queue is not None :
+         wake_queue.put(None)
+      #
+      # the while loop below is not used
+      fit_type_index = len(fit_type_list)
    while have_data and (not job_done) and (fit_type_index< len(fit_type_list)) :
+      #
+      # another fit type is not tried after some of the children are running
+      if len(released) > 0 :
+         break
       fit_type        = fit_type_list[fit_type_index]
       fit_type_index += 1
       #
@@ -270,6 +612,9 @@ def try_one_job(
             fit_type          = fit_type,
             first_fit         = fit_type_index == 1,
             trace_file_obj    = trace_file_obj,
+            extra_cpu         = extra_cpu,
+            release_child     = release_child,
+            cascade_hash      = cascade_hash,
          )
          #
          # job_done
@@ -285,6 +630,9 @@ def try_one_job(
                fit_type          = fit_type,
                first_fit         = fit_type_index == 1,
                trace_file_obj    = trace_file_obj,
+               extra_cpu         = extra_cpu,
+               release_child     = release_child,
+               cascade_hash      = cascade_hash,
             )
             #
             # job_done
@@ -292,34 +640,43 @@ def try_one_job(
          except Exception as e:
             job_done = False
             msg      = str(e)
-            if msg.startswith( 'no data: abort' ) :
+            # another fit type is not tried for these failures
+            if msg.startswith( ('no data: abort', 'timeout: abort') ) :
                have_data = False
             print( f'fit {fit_type} {job_name} message: ' + msg )
    #
+   # job_profiler
+   job_profiler.stop()
+   #
    # trace_file_obj
    if trace_file_obj != None :
       trace_file_obj.close()
    #
    if job_done :
+      #
+      # job_journal
+      job_journal.set_status( [ job_name ], 'done')
       #
       # shared_lock
       acquire_lock(shared_lock)
       #
-      # shared_job_status
-      assert shared_job_status[this_job_id] == job_status_run
-      shared_job_status[this_job_id] = job_status_done
+      # shared_job
+      assert shared_job.status(this_job_id) == job_status_run
+      shared_job.set_status(this_job_id, job_status_done)
       #
-      # shared_job_status[child_job_id]
+      # shared_job: child_job_id
       start_child_job_id    = job_table[this_job_id ]['start_child_job_id']
       end_child_job_id      = job_table[this_job_id ]['end_child_job_id']
       child_range = range(start_child_job_id, end_child_job_id)
       for child_job_id in child_range :
-         if shared_job_status[child_job_id] == job_status_wait :
+         if shared_job.status(child_job_id) == job_status_wait :
+            assert not job_table[child_job_id]['prior_only']
+            shared_job.set_status(child_job_id, job_status_ready)
+         elif child_job_id in released :
             assert not job_table[child_job_id]['prior_only']
-            shared_job_status[child_job_id] = job_status_ready
          else :
             assert job_table[child_job_id]['prior_only']
-            assert shared_job_status[child_job_id] == job_status_skip
+            assert shared_job.status(child_job_id) == job_status_skip
       #
       # release
       # shared memory has changed
@@ -330,32 +687,49 @@ def try_one_job(
       # if job not ok
       #
       # descendant_set
-      descendant_set = { this_job_id }
-      n_job          = len(job_table)
-      for job_id in range(this_job_id + 1, n_job) :
-         parent_job_id = job_table[job_id]['parent_job_id']
-         if parent_job_id in descendant_set :
-            descendant_set.add( job_id )
-      descendant_set.remove( this_job_id )
+      # uses the child job ranges so time is proportional to number of
+      # descendants of this job. The released children, and their
+      # descendants, are not included because their databases are complete.
+      descendant_set = set()
+      job_stack      = [ this_job_id ]
+      while len(job_stack) > 0 :
+         row = job_table[ job_stack.pop() ]
+         if not row['prior_only'] :
+            child_range = [
+               job_id for job_id in range(
+                  row['start_child_job_id'], row['end_child_job_id']
+               ) if job_id not in released
+            ]
+            descendant_set.update( child_range )
+            job_stack += child_range
+      #
+      # job_journal
+      job_journal.set_status( [ job_name ], 'error')
+      job_journal.set_status( [
+         job_table[job_id]['job_name'] for job_id in descendant_set
+            if not job_table[job_id]['prior_only']
+      ], 'abort')
       #
       # shared_lock
       acquire_lock(shared_lock)
       #
-      # shared_job_status[this_job_id]
-      if shared_job_status[this_job_id] != job_status_run :
-         msg  = 'try_one_job: except: shared_job_status[this_job_id] = '
-         msg += job_status_name[ shared_job_status[this_job_id] ]
+      # shared_job: this_job_id
+      job_status = shared_job.status(this_job_id)
+      if job_status != job_status_run :
+         msg  = 'try_one_job: except: shared_job.status(this_job_id) = '
+         msg += job_status_name[job_status]
          print(msg)
-      shared_job_status[this_job_id] = job_status_error
+      shared_job.set_status(this_job_id, job_status_error)
       #
-      # shared_job_status[descendant_set]
+      # shared_job: descendant_set
       for job_id in descendant_set :
-         if shared_job_status[job_id] != job_status_skip :
-            if shared_job_status[job_id] != job_status_wait :
-               msg  = 'try_one_job: except: shared_job_status[job_id] = '
-               msg += job_status_name[ shared_job_status[job_id] ]
+         job_status = shared_job.status(job_id)
+         if job_status != job_status_skip :
+            if job_status != job_status_wait :
+               msg  = 'try_one_job: except: shared_job.status(job_id) = '
+               msg += job_status_name[job_status]
                print(msg)
-            shared_job_status[job_id] = job_status_abort
+            shared_job.set_status(job_id, job_status_abort)
       #
       # release
       # shared memory has changed
@@ -365,6 +739,9 @@ def try_one_job(
       # ok
       job_done = False
    #
+   # job_journal
+   job_journal.close()
+   #
    if max_number_cpu > 1 :
       #
       # print message at end
@@ -378,11 +755,7 @@ def try_one_job(
       #
       # status_count
       acquire_lock(shared_lock)
-      n_status      = len( job_status_name )
-      status_count  = dict()
-      for job_status_i in range(n_status) :
-         name               = job_status_name[job_status_i]
-         status_count[name] =  int( sum( shared_job_status == job_status_i ) )
+      status_count  = shared_job.status_count()
       shared_lock.release()
       #
       print( f'       {status_count}' )
@@ -402,10 +775,11 @@ def fit_one_process(
    master_process,
    fit_type_list,
    job_status_name,
-   shared_job_status_name,
-   shared_number_cpu_inuse_name,
+   shared_memory_prefix_plus,
    shared_lock,
    shared_event,
+   priority                          = None,
+   cascade_hash                      = None,
 ) :
    assert type(job_table)            == list
    assert type(this_job_id)          == int
@@ -418,10 +792,11 @@ def fit_one_process(
    assert type(fit_type_list)        == list
    assert type(job_status_name)      == list
    assert type( job_status_name[0] ) == str
-   assert type(shared_job_status_name)       == str
-   assert type(shared_number_cpu_inuse_name) == str
+   assert type(shared_memory_prefix_plus)    == str
    assert type(shared_lock)          == multiprocessing.synchronize.Lock
    assert type(shared_event)         == multiprocessing.synchronize.Event
+   assert priority == None or type(priority) == list
+   assert cascade_hash == None or type(cascade_hash) == str
    # END_DEF
    # ----------------------------------------------------------------------
    job_status_skip  = job_status_name.index( 'skip' )
@@ -433,28 +808,10 @@ def fit_one_process(
    job_status_abort = job_status_name.index( 'abort' )
    # ----------------------------------------------------------------------
    #
-   # shm_job_status, shared_job_status
-   tmp    = numpy.empty(len(job_table), dtype = int )
-   mapped = at_cascade.map_shared( shared_job_status_name )
-   shm_job_status = multiprocessing.shared_memory.SharedMemory(
-      create = False, size = tmp.nbytes, name = mapped
-   )
-   shared_job_status = numpy.ndarray(
-      tmp.shape, dtype = tmp.dtype, buffer = shm_job_status.buf
-   )
-   #
-   # shm_number_cpu_inuse, shared_number_cpu_inuse
-   tmp    = numpy.empty(1, dtype = int )
-   mapped = at_cascade.map_shared( shared_number_cpu_inuse_name )
-   shm_number_cpu_inuse = multiprocessing.shared_memory.SharedMemory(
-      create = False, size = tmp.nbytes, name = mapped
+   # shared_job
+   shared_job = at_cascade.shared_job_class(
+      shared_memory_prefix_plus, job_table, job_status_name, priority
    )
-   shared_number_cpu_inuse = numpy.ndarray(
-      tmp.shape, dtype = tmp.dtype, buffer = shm_number_cpu_inuse.buf
-   )
-   #
-   # job_table_index
-   job_table_index = numpy.array( range(len(job_table)), dtype = int )
    #
    if not skip_this_job :
       #
@@ -472,37 +829,32 @@ def fit_one_process(
          fit_type_list,
          shared_lock,
          shared_event,
-         shared_job_status,
+         shared_job,
          job_status_name,
+         cascade_hash = cascade_hash,
       )
    #
    while True :
       # shared_lock
       acquire_lock(shared_lock)
       #
-      # job_id_ready
-      job_id_ready = job_table_index[ shared_job_status == job_status_ready ]
-      #
-      # job_id_run
-      job_id_run  = job_table_index[ shared_job_status == job_status_run ]
-      #
-      # n_job_ready
-      n_job_ready = job_id_ready.size
+      # n_job_ready, n_job_run
+      n_job_ready = shared_job.count(job_status_ready)
+      n_job_run   = shared_job.count(job_status_run)
       #
       if n_job_ready == 0 :
-         if job_id_run.size == 0 :
+         if n_job_run == 0 :
             #
             # no jobs running or ready
             if master_process :
-               if shared_number_cpu_inuse[0] == 1:
+               if shared_job.number_cpu_inuse[0] == 1:
                   # We are done, return to fit_parallel which wuill use
                   # the shared memory for error checking and then free it.
                   #
                   # should not need this release
                   shared_lock.release()
                   #
-                  shm_job_status.close()
-                  shm_number_cpu_inuse.close()
+                  shared_job.close()
                   return
                else :
                   #
@@ -514,15 +866,14 @@ def fit_one_process(
                   shared_event.wait(timeout = seconds)
             else :
                # return this processor
-               shared_number_cpu_inuse[0] -= 1
+               shared_job.number_cpu_inuse[0] -= 1
                #
                # release
                # shared memory has changed
                shared_event.set()
                shared_lock.release()
                #
-               shm_job_status.close()
-               shm_number_cpu_inuse.close()
+               shared_job.close()
                return
          else :
             #
@@ -537,29 +888,52 @@ def fit_one_process(
                shared_event.wait(timeout = seconds)
             else :
                # return this processor
-               shared_number_cpu_inuse[0] -= 1
+               shared_job.number_cpu_inuse[0] -= 1
                #
                # release
                shared_lock.release()
                #
-               shm_job_status.close()
-               shm_number_cpu_inuse.close()
+               shared_job.close()
                return
       else :
          #
-         # n_cpu_spawn
-         n_cpu_available  = max_number_cpu - shared_number_cpu_inuse[0]
-         n_cpu_spawn      = min(n_cpu_available, n_job_ready - 1)
-         #
-         # shared_numper_cpu_inuse
-         shared_number_cpu_inuse[0] += n_cpu_spawn
+         # job_id_ready
+         # the jobs with highest priority that fit in the memory limit;
+         # their status is changed to run
+         n_cpu_available  = max_number_cpu - shared_job.number_cpu_inuse[0]
+         job_id_ready     = list()
+         job_id           = shared_job.pop_ready()
+         while job_id is not None :
+            job_id_ready.append( job_id )
+            if len(job_id_ready) > n_cpu_available :
+               job_id = None
+            else :
+               job_id = shared_job.pop_ready()
          #
-         # shared_job_status
-         for i in range( n_cpu_spawn + 1 ) :
-            job_id = job_id_ready[i]
+         if len(job_id_ready) == 0 :
             #
-            assert shared_job_status[job_id] == job_status_ready
-            shared_job_status[job_id] = job_status_run
+            # jobs are ready but none fit in the memory limit
+            if master_process :
+               shared_event.clear()
+               shared_lock.release()
+               seconds = 10.0
+               shared_event.wait(timeout = seconds)
+            else :
+               # return this processor
+               shared_job.number_cpu_inuse[0] -= 1
+               #
+               # release
+               shared_lock.release()
+               #
+               shared_job.close()
+               return
+            continue
+         #
+         # n_cpu_spawn
+         n_cpu_spawn = len(job_id_ready) - 1
+         #
+         # shared_job.number_cpu_inuse
+         shared_job.number_cpu_inuse[0] += n_cpu_spawn
          #
          # release
          # shared memory has changed
@@ -576,7 +950,7 @@ def fit_one_process(
          for i in range(n_cpu_spawn) :
             #
             # job_id
-            job_id = int( job_id_ready[i] )
+            job_id = job_id_ready[i]
             #
             # p
             args = (
@@ -590,19 +964,20 @@ def fit_one_process(
                is_child_master_process,
                fit_type_list,
                job_status_name,
-               shared_job_status_name,
-               shared_number_cpu_inuse_name,
+               shared_memory_prefix_plus,
                shared_lock,
                shared_event,
+               priority,
+               cascade_hash,
             )
             target = fit_one_process
             p = multiprocessing.Process(target = target, args = args)
             #
-            p.deamon = False
+            p.daemon = False
             p.start()
          #
          # job_id
-         job_id = int( job_id_ready[n_cpu_spawn] )
+         job_id = job_id_ready[n_cpu_spawn]
          #
          # try_one_job
          # assumes lock is not acquired during this operation
@@ -618,6 +993,7 @@ def fit_one_process(
             fit_type_list,
             shared_lock,
             shared_event,
-            shared_job_status,
+            shared_job,
             job_status_name,
+            cascade_hash = cascade_hash,
          )
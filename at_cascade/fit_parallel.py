@@ -66,11 +66,13 @@ If it also fails, the corresponding job fails.
 
 shared_unique
 *************
-All of these jobs us the following two python multiprocessing
-shared memory names:
+All of these jobs use python multiprocessing shared memory
+with names that begin with
 
-|  *shared_memory_prefix* _ *job_name* *shared_unique* _number_cpu_in_use
-|  *shared_memory_prefix* _ *job_name* *shared_unique* _job_status
+|  *shared_memory_prefix* _ *job_name* *shared_unique*
+
+and end with one of the suffixes in
+:ref:`shared_job_class@shared_job_class@suffix_list` .
 
 #. *job_name* is *job_table* [ *start_job_id* ] [ ``"job_name"`` ]
 
@@ -82,6 +84,91 @@ shared memory names:
    It is suggested that you use the empty string for this value unless you
    are running more than one call with the same prefix and job name.
 
+fit_engine
+**********
+The :ref:`option_all_table@fit_engine` in the option all table
+determines how the jobs are run in parallel.
+If *max_number_cpu* is one, and the fit engine is not ``lease`` ,
+the jobs are run sequentially by :ref:`fit_one_process-name` .
+If the fit engine is ``lease`` ,
+*max_number_cpu* :ref:`lease_worker-name` processes are started on this host
+and more workers can be started on other hosts.
+
+job_priority
+************
+The :ref:`option_all_table@job_priority` in the option all table
+determines which ready jobs are started first; see :ref:`job_priority-name` .
+
+max_memory_gb
+*************
+If the :ref:`option_all_table@max_memory_gb` option appears,
+and there are memory predictions in the job history,
+a ready job is not started if the predicted memory for the running jobs
+would exceed this limit; see
+:ref:`shared_job_class@pop_ready@Memory Limit` .
+This limit is not used by the ``lease`` fit engine.
+
+job_history_database
+********************
+If the :ref:`option_all_table@job_history_database` option appears,
+the run history is used to predict the wall time for each job.
+These predictions are used by the ``critical_path`` and ``longest``
+job priorities, and to print a lower bound for the wall time of this call.
+
+fit_cache_dir
+*************
+If the :ref:`option_all_table@fit_cache_dir` option appears,
+the :ref:`fit_cache_class@cascade_hash` is computed once by this routine
+and passed to every job; see :ref:`fit_one_job@cascade_hash` .
+This includes the jobs run by :ref:`lease_worker-name` processes.
+
+resume
+******
+If *resume* is false, this is a new run of the jobs below the start job.
+If it is true, this call is continuing a previous run of the same
+jobs that did not complete; e.g., because the system crashed.
+In this case, any shared memory left over from the previous run is cleared
+(see :ref:`clear_shared-name` ) and
+a job is considered done if its parent is done
+(or it is the start job) and either:
+
+#. The :ref:`job_journal_class-name` status for the job is ``done`` .
+#. The log table for the job's database has an ``at_cascade``
+   message equal to ``children: OK`` ; see :ref:`add_log_entry-name` .
+   This handles a crash after the job completed and before its journal
+   entry was written.
+
+Only the jobs that are not done are run
+(this includes jobs that had an error during the previous run).
+If *resume* is true, *skip_start_job* can still be true,
+in which case the start job is considered done.
+
+job_journal.db
+**************
+The status of each job below the start job is recorded in the
+:ref:`job_journal_class-name` as it changes.
+This is used when *resume* is true.
+
+Status
+******
+The :ref:`job_journal_class@Status File` ``job_journal.json``
+in the :ref:`option_all_table@result_dir` directory
+is updated every ten seconds, and when this routine returns,
+by a :ref:`status_writer_class-name` .
+It has the number of jobs with each status, the running jobs,
+the jobs completed per hour, and an estimate of the time remaining.
+If the :ref:`option_all_table@status_port` option appears,
+this file is also served by a :ref:`status_server_class-name`
+while this routine is running.
+
+Profile
+*******
+If the :ref:`option_all_table@profile_job` option selects a job,
+the python code that runs the job (in the process that runs it) is
+profiled and the result is written to a file called ``profile.prof``
+in the same directory as the database for the job;
+see :ref:`job_profiler_class-name` and :ref:`merge_profile-name` .
+
 trace.out
 *********
 If the *max_number_cpu* is one, standard output is not redirected.
@@ -91,13 +178,14 @@ Otherwise, standard output for each job is written to a file called
 {xrst_end fit_parallel}
 '''
 # ----------------------------------------------------------------------------
+import os
 import multiprocessing
-import numpy
 import at_cascade
 import dismod_at
+from at_cascade.fit_one_process import get_result_database_dir
 # ----------------------------------------------------------------------------
-# shared_memory_prefix = get_shared_memory_prefix(all_node_database)
-def get_shared_memory_prefix(all_node_database) :
+# option_all_dict = get_option_all_dict(all_node_database)
+def get_option_all_dict(all_node_database) :
    assert type(all_node_database) == str
    #
    connection           = dismod_at.create_connection(
@@ -105,11 +193,42 @@ def get_shared_memory_prefix(all_node_database) :
    )
    option_all_table     = dismod_at.get_table_dict(connection, 'option_all')
    connection.close()
-   shared_memory_prefix = ""
+   option_all_dict = dict()
    for row in option_all_table :
-      if row['option_name'] == 'shared_memory_prefix' :
-         shared_memory_prefix = row['option_value']
-   return shared_memory_prefix
+      option_all_dict[ row['option_name'] ] = row['option_value']
+   return option_all_dict
+# ----------------------------------------------------------------------------
+# ok = log_children_ok(all_node_database, node_table, job_table, job_id)
+# is children: OK in the log table for this job's database
+def log_children_ok(all_node_database, node_table, job_table, job_id) :
+   #
+   # fit_database
+   row          = job_table[job_id]
+   database_dir = get_result_database_dir(
+      all_node_database,
+      node_table,
+      row['fit_node_id'],
+      row['split_reference_id'],
+   )
+   fit_database = f'{database_dir}/dismod.db'
+   if not os.path.exists(fit_database) :
+      return False
+   #
+   # log_table
+   connection = dismod_at.create_connection(
+      fit_database, new = False, readonly = True
+   )
+   if not at_cascade.table_exists(connection, 'log') :
+      connection.close()
+      return False
+   log_table = dismod_at.get_table_dict(connection, 'log')
+   connection.close()
+   #
+   for log_row in log_table :
+      if log_row['message_type'] == 'at_cascade' :
+         if log_row['message'] == 'children: OK' :
+            return True
+   return False
 # ----------------------------------------------------------------------------
 # BEGIN_DEF
 # at_cascade.fit_parallel
@@ -123,6 +242,7 @@ def fit_parallel(
    max_number_cpu    ,
    fit_type_list     ,
    shared_unique     ,
+   resume            = False,
 ) :
    #
    assert type(job_table)         == list
@@ -134,6 +254,7 @@ def fit_parallel(
    assert type(max_number_cpu)    == int
    assert type(fit_type_list)     == list
    assert type(shared_unique)     == str
+   assert type(resume)            == bool
    # END_DEF
    # ----------------------------------------------------------------------
    # job_status_name
@@ -154,68 +275,182 @@ def fit_parallel(
    job_status_error = job_status_name.index( 'error' )
    job_status_abort = job_status_name.index( 'abort' )
    # ----------------------------------------------------------------------
+   # option_all_dict
+   option_all_dict = get_option_all_dict(all_node_database)
+   #
+   # fit_engine
+   fit_engine = 'spawn'
+   if 'fit_engine' in option_all_dict :
+      fit_engine = option_all_dict['fit_engine']
+   if fit_engine not in [ 'spawn', 'pool', 'lease' ] :
+      msg = f'option_all table: fit_engine = {fit_engine} '
+      msg += 'is not "spawn", "pool", or "lease"'
+      assert False, msg
+   #
+   # priority_type
+   priority_type = 'job_id'
+   if 'job_priority' in option_all_dict :
+      priority_type = option_all_dict['job_priority']
+   #
+   # max_memory
+   max_memory = None
+   if 'max_memory_gb' in option_all_dict :
+      max_memory = float( option_all_dict['max_memory_gb'] ) * 1024.0
+   #
+   # job_seconds, job_memory
+   job_seconds = None
+   job_memory  = None
+   if 'job_history_database' in option_all_dict :
+      history_database = option_all_dict['job_history_database']
+      job_history      = at_cascade.job_history_class(history_database)
+      input_hash       = \
+         at_cascade.job_history_class.input_hash(all_node_database)
+      job_seconds      = job_history.predict(
+         job_table,
+         node_table,
+         option_all_dict['root_database'],
+         fit_type_list[0],
+         input_hash,
+      )
+      if max_memory is not None :
+         job_memory = job_history.predict_memory(
+            job_table,
+            node_table,
+            option_all_dict['root_database'],
+            fit_type_list[0],
+            input_hash,
+         )
+      job_history.close()
+   if max_memory is not None and job_memory is None :
+      print( 'max_memory_gb: no memory predictions, memory is not limited' )
+   #
+   # cascade_hash
+   cascade_hash = None
+   if 'fit_cache_dir' in option_all_dict :
+      cascade_hash = at_cascade.fit_cache_class.cascade_hash(all_node_database)
+   #
+   # priority
+   priority = at_cascade.job_priority(job_table, priority_type, job_seconds)
+   #
+   # print predicted wall time
+   if job_seconds is not None :
+      path_seconds = at_cascade.job_priority(
+         job_table, 'critical_path', job_seconds
+      )[start_job_id]
+      total_seconds = sum( job_seconds )
+      eta_seconds   = max( path_seconds, total_seconds / max_number_cpu )
+      msg  = f'predict: total job seconds = {total_seconds:.0f}, '
+      msg += f'critical path seconds = {path_seconds:.0f}, '
+      msg += f'wall seconds >= {eta_seconds:.0f}'
+      print(msg)
+   #
    # shared_memory_prefix_plus
-   shared_memory_prefix = get_shared_memory_prefix(all_node_database)
+   shared_memory_prefix = ''
+   if 'shared_memory_prefix' in option_all_dict :
+      shared_memory_prefix = option_all_dict['shared_memory_prefix']
    start_name           = job_table[start_job_id]['job_name']
    shared_memory_prefix_plus = \
       f'{shared_memory_prefix}_{start_name}{shared_unique}'
+   #
+   # clear shared memory left over from a run that did not terminate cleanly
+   if resume :
+      at_cascade.clear_shared(all_node_database, start_name + shared_unique)
    print(f'create: {shared_memory_prefix_plus} shared memory')
-   # -------------------------------------------------------------------------
-   # shared_number_cpu_inuse_name
-   shared_number_cpu_inuse_name = \
-      shared_memory_prefix_plus + '_number_cpu_inuse'
-   #
-   # shm_number_cpu_inuse, shared_number_cpu_inuse
-   tmp    = numpy.empty(1, dtype = int )
-   mapped = at_cascade.map_shared(shared_number_cpu_inuse_name)
-   shm_number_cpu_inuse = multiprocessing.shared_memory.SharedMemory(
-      create = True, size = tmp.nbytes, name = mapped
-   )
-   shared_number_cpu_inuse = numpy.ndarray(
-      tmp.shape, dtype = tmp.dtype, buffer = shm_number_cpu_inuse.buf
-   )
-   # -------------------------------------------------------------------------
-   # shared_job_status_name
-   shared_job_status_name = shared_memory_prefix_plus + '_job_status'
-   #
-   # shm_job_status, shared_job_status
-   tmp    = numpy.empty(len(job_table), dtype = int )
-   mapped = at_cascade.map_shared(shared_job_status_name)
-   shm_job_status = multiprocessing.shared_memory.SharedMemory(
-      create = True, size = tmp.nbytes, name = mapped
+   #
+   # shared_job
+   shared_job = at_cascade.shared_job_class(
+      shared_memory_prefix_plus,
+      job_table,
+      job_status_name,
+      priority,
+      create     = True,
+      job_memory = job_memory,
+      max_memory = max_memory,
    )
-   shared_job_status = numpy.ndarray(
-      tmp.shape, dtype = tmp.dtype, buffer = shm_job_status.buf
+   #
+   # shared_job.number_cpu_inuse
+   shared_job.number_cpu_inuse[0] = 1
+   #
+   # job_journal, status_dict
+   job_journal = at_cascade.job_journal_class(
+      all_node_database, max_number_cpu = max_number_cpu
    )
-   # -------------------------------------------------------------------------
+   if resume :
+      status_dict = job_journal.get_status()
    #
-   # shm_list
-   shm_list = [
-         shm_number_cpu_inuse,
-         shm_job_status,
+   # subtree_job_list
+   # jobs that are fit by this call, in job_id order
+   start_row        = job_table[start_job_id]
+   subtree_job_list = list()
+   for job_id in range(start_job_id, len(job_table) ) :
+      row = job_table[job_id]
+      if start_row['preorder_id'] <= row['preorder_id'] and \
+            row['preorder_id'] < start_row['end_preorder_id'] :
+         if not row['prior_only'] :
+            subtree_job_list.append(job_id)
+   #
+   # done_set
+   # a job is done if its parent is done and it completed in a previous run
+   done_set = set()
+   if skip_start_job :
+      done_set.add(start_job_id)
+   if resume :
+      for job_id in subtree_job_list :
+         parent_job_id = job_table[job_id]['parent_job_id']
+         if job_id == start_job_id or parent_job_id in done_set :
+            job_name = job_table[job_id]['job_name']
+            if status_dict.get(job_name, None) == 'done' :
+               done_set.add(job_id)
+            elif log_children_ok(
+               all_node_database, node_table, job_table, job_id
+            ) :
+               done_set.add(job_id)
+      print( f'resume: {len(done_set)} jobs are already done' )
+   #
+   # job_journal
+   job_name_list = [ job_table[job_id]['job_name'] for job_id in done_set ]
+   job_journal.set_status(job_name_list, 'done')
+   job_name_list = [
+      job_table[job_id]['job_name']
+         for job_id in subtree_job_list if job_id not in done_set
    ]
+   job_journal.set_status(job_name_list, 'wait')
+   status_file = job_journal.status_file
+   job_journal.close()
+   #
+   # status_writer
+   status_writer = at_cascade.status_writer_class(
+      all_node_database, 'job_journal', max_number_cpu, 10.0
+   )
    #
-   # shared_number_cpu_inuse
-   shared_number_cpu_inuse[0] = 1
+   # status_server
+   status_server = None
+   if 'status_port' in option_all_dict :
+      port          = int( option_all_dict['status_port'] )
+      status_server = at_cascade.status_server_class(status_file, port)
+      print( f'status: http://localhost:{port}' )
    #
-   # shared_job_status
+   # shared_job: job status
    for job_id in range( len(job_table) ) :
       if job_table[job_id]['prior_only'] :
-         shared_job_status[job_id] = job_status_skip
-      else :
-         shared_job_status[job_id]  = job_status_wait
-   if skip_start_job :
-      shared_job_status[start_job_id] = job_status_done
+         shared_job.set_status(job_id, job_status_skip)
+   for job_id in done_set :
+      shared_job.set_status(job_id, job_status_done)
+   for job_id in done_set :
       #
-      # shared_job_status[child_job_id]
-      start_child_job_id    = job_table[start_job_id ]['start_child_job_id']
-      end_child_job_id      = job_table[start_job_id ]['end_child_job_id']
+      # shared_job: child_job_id
+      start_child_job_id    = job_table[job_id]['start_child_job_id']
+      end_child_job_id      = job_table[job_id]['end_child_job_id']
       child_range = range(start_child_job_id, end_child_job_id)
       for child_job_id in child_range :
          if not job_table[child_job_id]['prior_only'] :
-            shared_job_status[child_job_id] = job_status_ready
-   else :
-      shared_job_status[start_job_id] = job_status_run
+            if child_job_id not in done_set :
+               shared_job.set_status(child_job_id, job_status_ready)
+   #
+   # skip_this_job
+   skip_this_job = start_job_id in done_set
+   if not skip_this_job :
+      shared_job.set_status(start_job_id, job_status_run)
    #
    # master_process
    master_process = True
@@ -228,40 +463,128 @@ def fit_parallel(
    shared_event = multiprocessing.Event()
    shared_event.set()
    #
-   # fit_one_process
-   at_cascade.fit_one_process(
-      job_table,
-      start_job_id,
-      all_node_database,
-      node_table,
-      fit_integrand,
-      skip_start_job,
-      max_number_cpu,
-      master_process,
-      fit_type_list,
-      job_status_name,
-      shared_job_status_name,
-      shared_number_cpu_inuse_name,
-      shared_lock,
-      shared_event,
-   )
+   if fit_engine == 'pool' and max_number_cpu > 1 :
+      #
+      # fit_pool
+      at_cascade.fit_pool(
+         job_table,
+         start_job_id,
+         all_node_database,
+         node_table,
+         fit_integrand,
+         skip_this_job,
+         max_number_cpu,
+         fit_type_list,
+         job_status_name,
+         shared_memory_prefix_plus,
+         shared_lock,
+         shared_event,
+         priority,
+         cascade_hash,
+      )
+   elif fit_engine == 'lease' :
+      #
+      # lease_database
+      start_row      = job_table[start_job_id]
+      lease_database = get_result_database_dir(
+         all_node_database,
+         node_table,
+         start_row['fit_node_id'],
+         start_row['split_reference_id'],
+      )
+      lease_database += f'/job_lease{shared_unique}.db'
+      #
+      # status_list
+      # the start job is run by a worker, not this process
+      status_list = list()
+      for job_id in range( len(job_table) ) :
+         status_name = job_status_name[ shared_job.status(job_id) ]
+         if status_name == 'run' :
+            status_name = 'ready'
+         status_list.append( status_name )
+      #
+      # option_dict
+      lease_seconds = '600'
+      if 'lease_seconds' in option_all_dict :
+         lease_seconds = option_all_dict['lease_seconds']
+      option_dict = {
+         'all_node_database' : all_node_database ,
+         'fit_integrand'     : ' '.join( str(i) for i in fit_integrand ) ,
+         'fit_type_list'     : ' '.join( fit_type_list ) ,
+         'lease_seconds'     : lease_seconds ,
+      }
+      if cascade_hash is not None :
+         option_dict['cascade_hash'] = cascade_hash
+      #
+      # job_lease_class.create
+      at_cascade.job_lease_class.create(
+         lease_database, job_table, status_list, priority, option_dict
+      )
+      print(f'create: {lease_database}')
+      #
+      # lease_worker
+      process_list = list()
+      for i in range(max_number_cpu) :
+         p = multiprocessing.Process(
+            target = at_cascade.lease_worker, args = (lease_database,)
+         )
+         p.daemon = False
+         p.start()
+         process_list.append(p)
+      for p in process_list :
+         p.join()
+      #
+      # shared_job: copy final job status from the lease database
+      job_lease   = at_cascade.job_lease_class(lease_database)
+      status_list = job_lease.get_status()
+      job_lease.close()
+      for (job_id, status_name) in enumerate(status_list) :
+         job_status = job_status_name.index(status_name)
+         shared_job.set_status(job_id, job_status)
+   else :
+      #
+      # fit_one_process
+      at_cascade.fit_one_process(
+         job_table,
+         start_job_id,
+         all_node_database,
+         node_table,
+         fit_integrand,
+         skip_this_job,
+         max_number_cpu,
+         master_process,
+         fit_type_list,
+         job_status_name,
+         shared_memory_prefix_plus,
+         shared_lock,
+         shared_event,
+         priority,
+         cascade_hash,
+      )
    #
-   # shared_number_cpu_inuse
-   if shared_number_cpu_inuse[0] != 1 :
-      n_inuse = shared_number_cpu_inuse[0]
+   # shared_job.number_cpu_inuse
+   if shared_job.number_cpu_inuse[0] != 1 :
+      n_inuse = shared_job.number_cpu_inuse[0]
       msg =f'{shared_memory_prefix_plus}_number_cpu_inuse[0] = {n_inuse}'
       assert False, msg
    #
-   # shared_job_status
-   for job_id in range(0, len(job_table) ):
-      status = shared_job_status[job_id]
-      assert status in \
-         [job_status_done, job_status_error, job_status_abort, job_status_skip]
+   # shared_job: job status
+   n_finished = 0
+   for job_status in \
+      [job_status_done, job_status_error, job_status_abort, job_status_skip] :
+      n_finished += shared_job.count(job_status)
+   assert n_finished == len(job_table)
    #
    # free shared memory objects
    print(f'remove: {shared_memory_prefix_plus} shared memory')
-   for shm in shm_list :
-      shm.close()
-      shm.unlink()
+   shared_job.close()
+   shared_job.unlink()
+   #
+   # status_writer
+   status_writer.close()
+   #
+   # status_server
+   if status_server != None :
+      status_server.close()
    #
    return
@@ -0,0 +1,276 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+{xrst_begin fit_pool}
+{xrst_spell
+  cpus
+  inuse
+}
+
+Fit Using a Pool of Long Lived Worker Processes
+###############################################
+This is the ``pool`` :ref:`option_all_table@fit_engine` for
+:ref:`fit_parallel-name` .
+It starts a fixed number of worker processes once,
+and then feeds them ready jobs through a queue,
+until there are no more jobs that can be run.
+
+Prototype
+*********
+{xrst_literal
+   # BEGIN_DEF
+   # END_DEF
+}
+
+Arguments
+*********
+The arguments
+*job_table* ,
+*this_job_id* ,
+*all_node_database* ,
+*node_table* ,
+*fit_integrand* ,
+*skip_this_job* ,
+*max_number_cpu* ,
+*fit_type_list* ,
+*job_status_name* ,
+*shared_memory_prefix_plus* ,
+*shared_lock* ,
+*shared_event* ,
+*priority* , and
+*cascade_hash*
+have the same meaning as for :ref:`fit_one_process-name` .
+
+Worker Processes
+****************
+The number of worker processes is *max_number_cpu* .
+Each worker attaches to the shared memory once,
+and then runs one job after another until the master tells it to stop.
+This avoids the cost of starting a new process for each job.
+
+Master Process
+**************
+The process that calls ``fit_pool`` does not fit any jobs.
+It waits (without polling) for a worker to report that its job has completed,
+that its job has made a child job ready before completing
+(see :ref:`fit_one_job@release_child` ),
+or that cpus used by its job have been released
+(see :ref:`fit_one_job@extra_cpu` and
+:ref:`fit_one_process@fit_type_list@Speculative Fit` ).
+It then sends the highest priority ready jobs to the idle workers.
+The ``number_cpu_inuse`` shared memory is the number of workers
+that are currently fitting a job plus the number of
+:ref:`fit_one_process@fit_type_list@Speculative Fit` processes.
+
+{xrst_end fit_pool}
+'''
+# ----------------------------------------------------------------------------
+import queue
+import multiprocessing
+import at_cascade
+from at_cascade.fit_one_process import acquire_lock, try_one_job
+# ----------------------------------------------------------------------------
+# pool_worker
+# Run jobs from ready_queue until None is received.
+# The job_id for each job is put in done_queue when the job is finished.
+# None is put in done_queue when a job releases a child job or a cpu
+# before it is finished.
+def pool_worker(
+   job_table,
+   all_node_database,
+   node_table,
+   fit_integrand,
+   max_number_cpu,
+   fit_type_list,
+   job_status_name,
+   shared_memory_prefix_plus,
+   shared_lock,
+   shared_event,
+   priority,
+   ready_queue,
+   done_queue,
+   cascade_hash,
+) :
+   #
+   # shared_job
+   shared_job = at_cascade.shared_job_class(
+      shared_memory_prefix_plus, job_table, job_status_name, priority
+   )
+   #
+   # skip_this_job, master_process
+   skip_this_job  = False
+   master_process = False
+   #
+   while True :
+      #
+      # job_id
+      job_id = ready_queue.get()
+      if job_id is None :
+         shared_job.close()
+         return
+      #
+      # try_one_job
+      # assumes lock is not acquired during this operation
+      try_one_job(
+         job_table,
+         job_id,
+         all_node_database,
+         node_table,
+         fit_integrand,
+         skip_this_job,
+         max_number_cpu,
+         master_process,
+         fit_type_list,
+         shared_lock,
+         shared_event,
+         shared_job,
+         job_status_name,
+         wake_queue   = done_queue,
+         cascade_hash = cascade_hash,
+      )
+      #
+      # done_queue
+      done_queue.put(job_id)
+# ----------------------------------------------------------------------------
+# BEGIN_DEF
+# at_cascade.fit_pool
+def fit_pool(
+   job_table,
+   this_job_id,
+   all_node_database,
+   node_table,
+   fit_integrand,
+   skip_this_job,
+   max_number_cpu,
+   fit_type_list,
+   job_status_name,
+   shared_memory_prefix_plus,
+   shared_lock,
+   shared_event,
+   priority                          = None,
+   cascade_hash                      = None,
+) :
+   assert type(job_table)            == list
+   assert type(this_job_id)          == int
+   assert type(all_node_database)    == str
+   assert type(node_table)           == list
+   assert type(fit_integrand)        == set
+   assert type(skip_this_job)        == bool
+   assert type(max_number_cpu)       == int
+   assert type(fit_type_list)        == list
+   assert type(job_status_name)      == list
+   assert type( job_status_name[0] ) == str
+   assert type(shared_memory_prefix_plus)    == str
+   assert type(shared_lock)          == multiprocessing.synchronize.Lock
+   assert type(shared_event)         == multiprocessing.synchronize.Event
+   assert priority == None or type(priority) == list
+   assert cascade_hash == None or type(cascade_hash) == str
+   # END_DEF
+   # ----------------------------------------------------------------------
+   job_status_ready = job_status_name.index( 'ready' )
+   job_status_run   = job_status_name.index( 'run' )
+   # ----------------------------------------------------------------------
+   #
+   # shared_job
+   shared_job = at_cascade.shared_job_class(
+      shared_memory_prefix_plus, job_table, job_status_name, priority
+   )
+   #
+   # shared_job
+   # The master process does not fit jobs, so it is not counted.
+   acquire_lock(shared_lock)
+   shared_job.number_cpu_inuse[0] -= 1
+   if not skip_this_job :
+      # fit_parallel has already set the status for this job to run
+      assert shared_job.status(this_job_id) == job_status_run
+      shared_job.set_status(this_job_id, job_status_ready)
+   shared_lock.release()
+   #
+   # ready_queue, done_queue
+   ready_queue = multiprocessing.Queue()
+   done_queue  = multiprocessing.Queue()
+   #
+   # process_list
+   n_worker     = max_number_cpu
+   process_list = list()
+   for i in range(n_worker) :
+      args = (
+         job_table,
+         all_node_database,
+         node_table,
+         fit_integrand,
+         max_number_cpu,
+         fit_type_list,
+         job_status_name,
+         shared_memory_prefix_plus,
+         shared_lock,
+         shared_event,
+         priority,
+         ready_queue,
+         done_queue,
+         cascade_hash,
+      )
+      p = multiprocessing.Process(target = pool_worker, args = args)
+      p.daemon = False
+      p.start()
+      process_list.append(p)
+   #
+   # n_running
+   n_running = 0
+   while True :
+      #
+      # ready_queue, n_running
+      # send the highest priority ready jobs, that fit in the memory limit,
+      # to idle workers
+      acquire_lock(shared_lock)
+      # (a speculative fit may be using a cpu that is not counted by n_running)
+      while n_running < n_worker and shared_job.count(job_status_ready) > 0 :
+         if shared_job.number_cpu_inuse[0] >= max_number_cpu :
+            break
+         job_id = shared_job.pop_ready()
+         if job_id is None :
+            break
+         shared_job.number_cpu_inuse[0] += 1
+         ready_queue.put(job_id)
+         n_running += 1
+      shared_event.set()
+      shared_lock.release()
+      #
+      # no jobs running or ready
+      if n_running == 0 :
+         break
+      #
+      # job_id
+      # wait for a worker to finish a job, or to release a child job or cpu
+      # (in which case job_id is None)
+      try :
+         job_id = done_queue.get(timeout = 60.0)
+      except queue.Empty :
+         for p in process_list :
+            if not p.is_alive() :
+               msg = f'fit_pool: worker process {p.pid} died'
+               assert False, msg
+         continue
+      if job_id is not None :
+         n_running -= 1
+         #
+         # shared_job.number_cpu_inuse
+         acquire_lock(shared_lock)
+         shared_job.number_cpu_inuse[0] -= 1
+         shared_lock.release()
+   #
+   # stop the workers
+   for p in process_list :
+      ready_queue.put(None)
+   for p in process_list :
+      p.join()
+   #
+   # shared_job.number_cpu_inuse
+   acquire_lock(shared_lock)
+   shared_job.number_cpu_inuse[0] += 1
+   shared_lock.release()
+   #
+   shared_job.close()
+   return
@@ -57,6 +57,14 @@ Otherwise, *generation* is one more than the number of nodes between the
 ancestor and descendent nodes.
 (There can be at most one split between any two nodes.
 
+Speed
+*****
+This routine uses the
+:ref:`create_job_table@job_table@job_depth` and
+:ref:`create_job_table@job_table@preorder_id` columns of the job table,
+so its computation time does not depend on the number of jobs or on
+*generation* .
+
 {xrst_end job_descendent}
 '''
 # -----------------------------------------------------------------------------
@@ -68,13 +76,16 @@ def job_descendent(job_table, ancestor_id, descendent_id) :
    assert type(descendent_id) == int
    # END_DEF
    #
+   # ancestor_row, descendent_row
+   ancestor_row   = job_table[ancestor_id]
+   descendent_row = job_table[descendent_id]
+   #
    # generation
-   generation = 0
-   job_id     = descendent_id
-   while job_id != None and job_id != ancestor_id :
-      generation += 1
-      job_id      = job_table[job_id]['parent_job_id']
-   if job_id == None :
+   preorder_id = descendent_row['preorder_id']
+   if ancestor_row['preorder_id'] <= preorder_id and \
+         preorder_id < ancestor_row['end_preorder_id'] :
+      generation = descendent_row['job_depth'] - ancestor_row['job_depth']
+   else :
       generation = None
    #
    # BEGIN_RETURN
@@ -0,0 +1,469 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+{xrst_begin job_history_class}
+{xrst_spell
+  ipopt
+  mtime
+  sqlite
+  var
+}
+
+Run History of Job Costs
+########################
+This is a small database that keeps a record of the cost of each job
+that completes, so that the cost of the jobs in the next run of a cascade
+can be predicted.
+
+job_history_class
+*****************
+{xrst_code py}
+job_history = job_history_class(history_database)
+{xrst_code}
+
+history_database
+================
+This ``str`` is the name of the history database; see
+:ref:`option_all_table@job_history_database` .
+If this file does not exist, it is created.
+The history is kept in the ``job_history`` table of this database.
+More than one process (or host) can use the same history database
+at the same time.
+
+input_hash
+**********
+{xrst_code py}
+input_hash = job_history_class.input_hash(all_node_database)
+{xrst_code}
+This static method returns a ``str`` that identifies the inputs for a run.
+It is a hash of the :ref:`option_all_table-name` together with
+the size and modification time of the :ref:`glossary@root_database` .
+The options that do not change the result of a fit
+(e.g., max_number_cpu and job_priority) are not included; see
+:ref:`fit_cache_class@input_hash` .
+
+add_row
+*******
+{xrst_code py}
+job_history.add_row(row)
+{xrst_code}
+The ``dict`` *row* has the following keys
+(the job_history table has one column for each key):
+
+.. csv-table::
+   :header-rows: 1
+
+   Key,              Type,  Meaning
+   job_name,         str,   :ref:`create_job_table@job_table@job_name`
+   input_hash,       str,   *input_hash* for the run this job was part of
+   fit_type,         str,   type of fit (``both`` or ``fixed`` )
+   n_data,           int,   number of rows in the data_subset table
+   n_var,            int,   number of rows in the var table
+   init_seconds,     float, wall time for init through perturb commands
+   fit_seconds,      float, wall time for the fit command
+   sample_seconds,   float, wall time for simulate and sample commands
+   predict_seconds,  float, wall time for avgint_parent_grid and predicts
+   shift_seconds,    float, wall time for :ref:`create_shift_db-name`
+   total_seconds,    float, sum of the seconds above
+   peak_rss_mb,      float, peak resident memory in megabytes for the fit
+   fit_iterations,   int,   number of Ipopt iterations for the fixed effects
+   warm_start,       int,   one (zero) if the fit was (was not) a warm start
+
+A column for the integer unix time that the row was added is also included.
+Keys that are missing from *row* are stored as null.
+
+predict
+*******
+{xrst_code py}
+job_seconds = job_history.predict(
+   job_table, node_table, root_database, fit_type, input_hash
+)
+{xrst_code}
+
+job_table
+=========
+is the :ref:`create_job_table@job_table` for the next run.
+
+node_table
+==========
+is the node table for this cascade.
+
+root_database
+=============
+is the :ref:`glossary@root_database` for this cascade.
+
+fit_type
+========
+is the first type of fit that will be tried for each job.
+
+input_hash
+==========
+is the *input_hash* for the next run.
+
+job_seconds
+===========
+If the history is empty, the return value *job_seconds* is None.
+Otherwise it is a ``list`` of ``float`` with the predicted
+wall time, in seconds, for each job in *job_table*
+(zero for :ref:`create_job_table@job_table@prior_only` jobs):
+
+#. If there are records for this job name and fit_type
+   with the same *input_hash* , their average total seconds is used.
+#. Otherwise, if there are records for this job name and fit_type,
+   the average of its three most recent total seconds is used.
+#. Otherwise, a least squares regression of log( *total_seconds* )
+   with respect to log( 1 + *n_data* ) and log( 1 + *n_var* ) ,
+   over all the records for this fit_type, is evaluated at
+   the number of data rows for the fit node, and its descendants,
+   in the root database data table,
+   and at the predicted number of variables for the job.
+   The number of variables is predicted using a least squares regression
+   of *n_var* with respect to the number of children of the fit node,
+   over the records for this fit_type that have a job name in *job_table* .
+
+predict_memory
+**************
+{xrst_code py}
+job_memory = job_history.predict_memory(
+   job_table, node_table, root_database, fit_type, input_hash
+)
+{xrst_code}
+The arguments have the same meaning as for *predict* .
+If there are no records with a *peak_rss_mb* value,
+the return value *job_memory* is None.
+Otherwise it is a ``list`` of ``float`` with the predicted peak memory,
+in megabytes, for each job in *job_table* .
+It is computed the same way as *job_seconds* with
+*total_seconds* replaced by *peak_rss_mb* ,
+except that the maximum (instead of the average) of the records is used.
+
+cold_start
+**********
+{xrst_code py}
+cold_start = job_history.cold_start(job_name, fit_type)
+{xrst_code}
+If there are no records for this ``str`` *job_name* and ``str`` *fit_type*
+that have a *fit_iterations* value and were not a warm start,
+the return value *cold_start* is None.
+Otherwise it is a ``tuple`` with the average *fit_iterations* and the
+average *fit_seconds* for the three most recent of these records; see
+:ref:`fit_one_job@Warm Start` .
+
+close
+*****
+{xrst_code py}
+job_history.close()
+{xrst_code}
+This closes the database connection held by *job_history* .
+
+{xrst_end job_history_class}
+'''
+import os
+import time
+import math
+import hashlib
+import numpy
+import dismod_at
+import at_cascade
+from at_cascade.fit_cache_class import run_option_list
+# ----------------------------------------------------------------------------
+# job_history_col
+# name and type of each column in the job_history table
+job_history_col = [
+   ( 'job_name',        'text'    ),
+   ( 'input_hash',      'text'    ),
+   ( 'fit_type',        'text'    ),
+   ( 'unix_time',       'integer' ),
+   ( 'n_data',          'integer' ),
+   ( 'n_var',           'integer' ),
+   ( 'init_seconds',    'real'    ),
+   ( 'fit_seconds',     'real'    ),
+   ( 'sample_seconds',  'real'    ),
+   ( 'predict_seconds', 'real'    ),
+   ( 'shift_seconds',   'real'    ),
+   ( 'total_seconds',   'real'    ),
+   ( 'peak_rss_mb',     'real'    ),
+   ( 'fit_iterations',  'integer' ),
+   ( 'warm_start',      'integer' ),
+]
+# ----------------------------------------------------------------------------
+# coefficient = least_squares(x_list, y_list)
+# x_list[i] is a float or a list of floats and y_list[i] is a float.
+# If y_list is empty, coefficient is None. Otherwise coefficient[0] is the
+# intercept and coefficient[1:] are the slopes, for the least squares fit
+# of y_list w.r.t. x_list. A slope is zero if its x values are all the same,
+# or if there are not more records than coefficients.
+def least_squares(x_list, y_list) :
+   if len(y_list) == 0 :
+      return None
+   x_array = numpy.array(x_list, dtype = float).reshape( len(y_list), -1 )
+   y_array = numpy.array(y_list, dtype = float)
+   n_x     = x_array.shape[1]
+   #
+   # column
+   # columns of x_array that are used
+   column = list()
+   if len(y_list) > n_x + 1 :
+      column = [ j for j in range(n_x) if numpy.std( x_array[:, j] ) > 0.0 ]
+   #
+   # coefficient
+   a_matrix = numpy.ones( (len(y_list), 1 + len(column) ), dtype = float )
+   a_matrix[:, 1 :] = x_array[:, column]
+   solution = numpy.linalg.lstsq(a_matrix, y_array, rcond = None)[0]
+   coefficient = numpy.zeros(1 + n_x, dtype = float)
+   coefficient[0] = solution[0]
+   for (k, j) in enumerate(column) :
+      coefficient[1 + j] = solution[1 + k]
+   return coefficient
+# ----------------------------------------------------------------------------
+class job_history_class :
+   #
+   # __init__
+   def __init__(self, history_database) :
+      assert type(history_database) == str
+      #
+      # connection
+      new = not os.path.exists(history_database)
+      self.connection = dismod_at.create_connection(
+         history_database, new = new, readonly = False
+      )
+      dismod_at.sql_command(self.connection, 'PRAGMA busy_timeout = 60000')
+      #
+      # job_history table
+      command  = 'CREATE TABLE IF NOT EXISTS job_history('
+      command += 'job_history_id integer primary key'
+      for (name, ty) in job_history_col :
+         command += f', {name} {ty}'
+      command += ')'
+      dismod_at.sql_command(self.connection, command)
+      #
+      # add columns that were not in an older version of this table
+      (col_name, col_type) = dismod_at.get_name_type(
+         self.connection, 'job_history'
+      )
+      for (name, ty) in job_history_col :
+         if name not in col_name :
+            command = f'ALTER TABLE job_history ADD COLUMN {name} {ty}'
+            dismod_at.sql_command(self.connection, command)
+   #
+   # input_hash
+   @staticmethod
+   def input_hash(all_node_database) :
+      assert type(all_node_database) == str
+      #
+      connection = dismod_at.create_connection(
+         all_node_database, new = False, readonly = True
+      )
+      option_all_table = dismod_at.get_table_dict(connection, 'option_all')
+      connection.close()
+      #
+      # text
+      option_all_dict = dict()
+      root_database   = None
+      for row in option_all_table :
+         if row['option_name'] == 'root_database' :
+            root_database = row['option_value']
+         if row['option_name'] not in run_option_list :
+            option_all_dict[ row['option_name'] ] = row['option_value']
+      text = str( sorted( option_all_dict.items() ) )
+      assert root_database != None
+      if os.path.exists(root_database) :
+         stat  = os.stat(root_database)
+         text += f'{stat.st_size} {stat.st_mtime}'
+      #
+      return hashlib.sha1( text.encode() ).hexdigest()
+   #
+   # add_row
+   def add_row(self, row) :
+      assert type(row) == dict
+      #
+      col_name  = list()
+      col_value = list()
+      for (name, ty) in job_history_col :
+         if name == 'unix_time' :
+            value = int( time.time() )
+         else :
+            value = row.get(name, None)
+         col_name.append(name)
+         col_value.append(value)
+      #
+      command  = 'INSERT INTO job_history (' + ','.join(col_name) + ') '
+      command += 'VALUES (' + ','.join( len(col_name) * [ '?' ] ) + ')'
+      cursor = self.connection.cursor()
+      cursor.execute(command, col_value)
+      self.connection.commit()
+   #
+   # predict_col
+   # predict the value in the column col_name for each job in job_table.
+   # combine is used to combine the values in more than one record.
+   def predict_col(
+      self,
+      col_name,
+      combine,
+      job_table,
+      node_table,
+      root_database,
+      fit_type,
+      input_hash,
+   ) :
+      assert type(col_name) == str
+      assert type(job_table) == list
+      assert type(node_table) == list
+      assert type(root_database) == str
+      assert fit_type in [ 'both', 'fixed' ]
+      assert type(input_hash) == str
+      #
+      # name_record
+      # records for this fit_type by job name in unix_time order
+      history_table = dismod_at.get_table_dict(self.connection, 'job_history')
+      name_record   = dict()
+      for row in history_table :
+         if row['fit_type'] == fit_type and row[col_name] != None :
+            job_name = row['job_name']
+            if job_name not in name_record :
+               name_record[job_name] = list()
+            name_record[job_name].append(row)
+      if len(name_record) == 0 :
+         return None
+      for job_name in name_record :
+         name_record[job_name].sort( key = lambda row : row['unix_time'] )
+      #
+      # node_n_child
+      # number of children for each node
+      node_n_child = len(node_table) * [ 0 ]
+      for row in node_table :
+         if row['parent'] is not None :
+            node_n_child[ row['parent'] ] += 1
+      #
+      # var_coefficient
+      # least squares fit of n_var w.r.t. number of children of the fit node
+      job_name2node_id = dict()
+      for row in job_table :
+         job_name2node_id[ row['job_name'] ] = row['fit_node_id']
+      x_list = list()
+      y_list = list()
+      for job_name in name_record :
+         if job_name in job_name2node_id :
+            n_child = node_n_child[ job_name2node_id[job_name] ]
+            for row in name_record[job_name] :
+               if row['n_var'] != None :
+                  x_list.append( float(n_child) )
+                  y_list.append( float( row['n_var'] ) )
+      var_coefficient = least_squares(x_list, y_list)
+      #
+      # coefficient
+      # least squares fit of log(col_name) w.r.t.
+      # log(1 + n_data) and log(1 + n_var)
+      x_list = list()
+      y_list = list()
+      for job_name in name_record :
+         for row in name_record[job_name] :
+            ok = row['n_data'] != None and row['n_var'] != None
+            if ok and row[col_name] > 0.0 :
+               x_list.append( [
+                  math.log( 1.0 + row['n_data'] ),
+                  math.log( 1.0 + row['n_var'] ),
+               ] )
+               y_list.append( math.log( row[col_name] ) )
+      coefficient = least_squares(x_list, y_list)
+      if var_coefficient is None :
+         coefficient = None
+      #
+      # node_n_data
+      # number of data table rows for each node and its descendants
+      node_n_data = None
+      if coefficient is not None :
+         connection  = dismod_at.create_connection(
+            root_database, new = False, readonly = True
+         )
+         command = 'SELECT node_id, count(*) FROM data GROUP BY node_id'
+         result  = dismod_at.sql_command(connection, command)
+         connection.close()
+         node_n_data = len(node_table) * [ 0 ]
+         for (node_id, count) in result :
+            while node_id is not None :
+               node_n_data[node_id] += count
+               node_id = node_table[node_id]['parent']
+      #
+      # job_value
+      job_value = list()
+      for row in job_table :
+         job_name = row['job_name']
+         if row['prior_only'] :
+            value = 0.0
+         elif job_name in name_record :
+            record_list = name_record[job_name]
+            same_list   = [
+               r[col_name] for r in record_list
+               if r['input_hash'] == input_hash
+            ]
+            if len(same_list) > 0 :
+               value = combine(same_list)
+            else :
+               value = combine( [ r[col_name] for r in record_list[-3 :] ] )
+         elif coefficient is not None :
+            n_data  = node_n_data[ row['fit_node_id'] ]
+            n_child = node_n_child[ row['fit_node_id'] ]
+            n_var   = var_coefficient[0] + var_coefficient[1] * n_child
+            n_var   = max(0.0, n_var)
+            x       = [ math.log( 1.0 + n_data ), math.log( 1.0 + n_var ) ]
+            value   = coefficient[0] + numpy.dot(coefficient[1 :], x)
+            value   = math.exp(value)
+         else :
+            value = 0.0
+         job_value.append( float(value) )
+      #
+      assert len(job_value) == len(job_table)
+      return job_value
+   #
+   # predict
+   def predict(
+      self, job_table, node_table, root_database, fit_type, input_hash
+   ) :
+      average = lambda value_list : sum(value_list) / len(value_list)
+      return self.predict_col(
+         'total_seconds',
+         average,
+         job_table,
+         node_table,
+         root_database,
+         fit_type,
+         input_hash,
+      )
+   #
+   # predict_memory
+   def predict_memory(
+      self, job_table, node_table, root_database, fit_type, input_hash
+   ) :
+      return self.predict_col(
+         'peak_rss_mb',
+         max,
+         job_table,
+         node_table,
+         root_database,
+         fit_type,
+         input_hash,
+      )
+   #
+   # cold_start
+   def cold_start(self, job_name, fit_type) :
+      assert type(job_name) == str
+      assert type(fit_type) == str
+      command  = 'SELECT fit_iterations, fit_seconds FROM job_history '
+      command += 'WHERE job_name = ? AND fit_type = ? '
+      command += 'AND fit_iterations IS NOT NULL '
+      command += 'AND (warm_start IS NULL OR warm_start = 0) '
+      command += 'ORDER BY unix_time DESC, job_history_id DESC LIMIT 3'
+      cursor = self.connection.cursor()
+      result = cursor.execute(command, (job_name, fit_type) ).fetchall()
+      if len(result) == 0 :
+         return None
+      fit_iterations = sum( row[0] for row in result ) / len(result)
+      fit_seconds    = sum( row[1] or 0.0 for row in result ) / len(result)
+      return (fit_iterations, fit_seconds)
+   #
+   # close
+   def close(self) :
+      self.connection.close()
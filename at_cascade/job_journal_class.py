@@ -0,0 +1,332 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+{xrst_begin job_journal_class}
+{xrst_spell
+  eta
+  json
+  sqlite
+  wal
+}
+
+On Disk Journal of Job Status
+#############################
+The job status used by :ref:`fit_parallel-name` is kept in shared memory
+and is lost if the system crashes.
+This journal keeps a copy of the job status on disk so that a cascade can be
+resumed; see :ref:`fit_parallel@resume` .
+It is also used to report the progress of a running cascade; see
+:ref:`job_journal_class@Status File` .
+
+job_journal_class
+*****************
+{xrst_code py}
+job_journal = job_journal_class(
+   all_node_database, journal_name, max_number_cpu
+)
+{xrst_code}
+
+all_node_database
+=================
+is the :ref:`all_node_db-name` for this cascade.
+The journal is the sqlite database
+
+|  *result_dir* / *journal_name* ``.db``
+
+where :ref:`option_all_table@result_dir` is in the option all table.
+If this file does not exist, it is created.
+It uses sqlite write ahead logging (wal) so that many processes can
+update the journal at the same time.
+
+journal_name
+============
+This optional ``str`` argument has default value ``job_journal`` .
+The :ref:`csv.pre_parallel-name` routine uses ``pre_journal`` .
+
+max_number_cpu
+==============
+This optional ``int`` argument is the number of processes running the jobs.
+It is only used for the *eta_seconds* in the status file.
+If it is None, the :ref:`option_all_table@max_number_cpu` option is used.
+
+set_status
+**********
+{xrst_code py}
+job_journal.set_status(job_name_list, status_name)
+{xrst_code}
+sets the status for each job in the ``list`` of ``str`` *job_name_list* to
+the ``str`` *status_name* ; see :ref:`fit_one_process@job_status_name` .
+The changes are committed to disk before this routine returns.
+The time that a job's status is set to ``run`` is its start time.
+The time that it is then set to ``done`` or ``error`` is its end time.
+Other changes clear the start and end time for a job.
+The cost of this operation is proportional to the length of
+*job_name_list* ; in particular, the status file is not written.
+
+get_status
+**********
+{xrst_code py}
+status_dict = job_journal.get_status()
+{xrst_code}
+returns a ``dict`` where the keys are the job names in the journal
+and the values are the corresponding status names.
+
+progress
+********
+{xrst_code py}
+progress = job_journal.progress()
+{xrst_code}
+returns a ``dict`` with the following keys:
+
+.. csv-table::
+   :header-rows: 1
+
+   Key,               Meaning
+   unix_time,         time when *progress* was computed
+   status_count,      ``dict`` with the number of jobs for each status name
+   running,           [ *job_name* , *elapsed_seconds* ] for running jobs
+   mean_job_seconds,  average seconds for the last 50 jobs that completed
+   jobs_per_hour,     rate at which the last 50 jobs completed
+   eta_seconds,       estimated seconds until all the jobs are done
+
+The *running* list has the longest running job first.
+The *mean_job_seconds* , *jobs_per_hour* , and *eta_seconds* values
+are None until a job that was started by this run has completed.
+The *eta_seconds* is the *mean_job_seconds* for each job that has
+not started, plus the expected seconds remaining for each running job,
+divided by *max_number_cpu* .
+It does not account for the ordering constraints between jobs.
+This reads all the jobs in the journal, so it should not be called
+each time the status of a job changes.
+
+write_status
+************
+{xrst_code py}
+job_journal.write_status()
+{xrst_code}
+writes the current *progress* to the status file.
+
+Status File
+***********
+The file
+
+|  *result_dir* / *journal_name* ``.json``
+
+contains the most recent *progress* in json format.
+It is replaced by a complete new version each time
+``write_status`` is called; i.e., a reader never sees a partial file.
+The shared lock is not used by this operation.
+During a cascade, it is written by one :ref:`status_writer_class-name`
+process on a timer; see
+:ref:`option_all_table@status_port` for a way to serve this file.
+
+clear
+*****
+{xrst_code py}
+job_journal.clear()
+{xrst_code}
+removes all the jobs from the journal.
+
+close
+*****
+{xrst_code py}
+job_journal.close()
+{xrst_code}
+This closes the database connection held by *job_journal* .
+
+{xrst_end job_journal_class}
+'''
+import os
+import json
+import time
+import dismod_at
+# ----------------------------------------------------------------------------
+class job_journal_class :
+   #
+   # __init__
+   def __init__(
+      self,
+      all_node_database,
+      journal_name   = 'job_journal',
+      max_number_cpu = None,
+   ) :
+      assert type(all_node_database) == str
+      assert type(journal_name) == str
+      assert max_number_cpu == None or type(max_number_cpu) == int
+      #
+      # result_dir, max_number_cpu
+      connection = dismod_at.create_connection(
+         all_node_database, new = False, readonly = True
+      )
+      option_all_table = dismod_at.get_table_dict(connection, 'option_all')
+      connection.close()
+      result_dir = None
+      for row in option_all_table :
+         if row['option_name'] == 'result_dir' :
+            result_dir = row['option_value']
+         if row['option_name'] == 'max_number_cpu' :
+            if max_number_cpu == None :
+               max_number_cpu = int( row['option_value'] )
+      assert result_dir != None
+      if max_number_cpu == None :
+         max_number_cpu = 1
+      self.max_number_cpu = max_number_cpu
+      #
+      # status_file
+      self.status_file = f'{result_dir}/{journal_name}.json'
+      #
+      # connection
+      journal_database = f'{result_dir}/{journal_name}.db'
+      new = not os.path.exists(journal_database)
+      self.connection = dismod_at.create_connection(
+         journal_database, new = new, readonly = False
+      )
+      dismod_at.sql_command(self.connection, 'PRAGMA busy_timeout = 60000')
+      dismod_at.sql_command(self.connection, 'PRAGMA journal_mode = WAL')
+      #
+      # job_journal table
+      command  = 'CREATE TABLE IF NOT EXISTS job_journal('
+      command += 'job_name text primary key, '
+      command += 'status_name text, '
+      command += 'unix_time integer, '
+      command += 'start_time real, '
+      command += 'end_time real)'
+      dismod_at.sql_command(self.connection, command)
+      #
+      # start_time, end_time
+      # journals created before these columns were added do not have them
+      command     = 'PRAGMA table_info(job_journal)'
+      column_list = [
+         row[1] for row in dismod_at.sql_command(self.connection, command)
+      ]
+      for column in [ 'start_time', 'end_time' ] :
+         if column not in column_list :
+            command = f'ALTER TABLE job_journal ADD COLUMN {column} real'
+            dismod_at.sql_command(self.connection, command)
+      #
+      # indices used by progress
+      command  = 'CREATE INDEX IF NOT EXISTS job_journal_status_name '
+      command += 'ON job_journal(status_name)'
+      dismod_at.sql_command(self.connection, command)
+      command  = 'CREATE INDEX IF NOT EXISTS job_journal_end_time '
+      command += 'ON job_journal(end_time)'
+      dismod_at.sql_command(self.connection, command)
+   #
+   # set_status
+   def set_status(self, job_name_list, status_name) :
+      assert type(job_name_list) == list
+      assert type(status_name) == str
+      #
+      # start_time, end_time
+      now = time.time()
+      if status_name == 'run' :
+         (start_time, end_time) = (now, None)
+      elif status_name in [ 'done', 'error' ] :
+         (start_time, end_time) = (None, now)
+      else :
+         (start_time, end_time) = (None, None)
+      #
+      unix_time = int( now )
+      command   = 'INSERT INTO job_journal '
+      command  += '(job_name, status_name, unix_time, start_time, end_time) '
+      command  += 'VALUES (?, ?, ?, ?, ?) '
+      command  += 'ON CONFLICT(job_name) DO UPDATE SET '
+      command  += 'status_name = excluded.status_name, '
+      command  += 'unix_time = excluded.unix_time, '
+      if status_name in [ 'done', 'error' ] :
+         # only a job that was running has a start and end time
+         was_run   = "job_journal.status_name = 'run'"
+         command  += f'start_time = CASE WHEN {was_run} '
+         command  += 'THEN job_journal.start_time ELSE NULL END, '
+         command  += f'end_time = CASE WHEN {was_run} '
+         command  += 'THEN excluded.end_time ELSE NULL END'
+      else :
+         command  += 'start_time = excluded.start_time, '
+         command  += 'end_time = excluded.end_time'
+      value_list = [
+         (job_name, status_name, unix_time, start_time, end_time)
+            for job_name in job_name_list
+      ]
+      cursor = self.connection.cursor()
+      cursor.executemany(command, value_list)
+      self.connection.commit()
+   #
+   # get_status
+   def get_status(self) :
+      command = 'SELECT job_name, status_name FROM job_journal'
+      result  = dismod_at.sql_command(self.connection, command)
+      status_dict = dict()
+      for (job_name, status_name) in result :
+         status_dict[job_name] = status_name
+      return status_dict
+   #
+   # progress
+   def progress(self) :
+      now = time.time()
+      #
+      # status_count
+      command  = 'SELECT status_name, count(*) FROM job_journal '
+      command += 'GROUP BY status_name'
+      result       = dismod_at.sql_command(self.connection, command)
+      status_count = { status_name : n_job for (status_name, n_job) in result }
+      #
+      # running
+      command  = "SELECT job_name, start_time FROM job_journal "
+      command += "WHERE status_name = 'run' ORDER BY start_time"
+      result   = dismod_at.sql_command(self.connection, command)
+      running  = [
+         [ job_name, now - start_time ] for (job_name, start_time) in result
+      ]
+      #
+      # mean_job_seconds, jobs_per_hour
+      command  = 'SELECT start_time, end_time FROM job_journal '
+      command += 'WHERE end_time IS NOT NULL AND start_time IS NOT NULL '
+      command += 'ORDER BY end_time DESC LIMIT 50'
+      result   = dismod_at.sql_command(self.connection, command)
+      mean_job_seconds = None
+      jobs_per_hour    = None
+      if len(result) > 0 :
+         job_seconds      = [ end - start for (start, end) in result ]
+         mean_job_seconds = sum(job_seconds) / len(result)
+         first_start      = min( start for (start, end) in result )
+         jobs_per_hour    = 3600.0 * len(result) / max(now - first_start, 1.0)
+      #
+      # eta_seconds
+      eta_seconds = None
+      if mean_job_seconds != None :
+         n_wait      = status_count.get('wait', 0)
+         eta_seconds = n_wait * mean_job_seconds
+         for (job_name, elapsed_seconds) in running :
+            eta_seconds += max(mean_job_seconds - elapsed_seconds, 0.0)
+         eta_seconds = eta_seconds / self.max_number_cpu
+      #
+      progress = {
+         'unix_time'        : now ,
+         'status_count'     : status_count ,
+         'running'          : running ,
+         'mean_job_seconds' : mean_job_seconds ,
+         'jobs_per_hour'    : jobs_per_hour ,
+         'eta_seconds'      : eta_seconds ,
+      }
+      return progress
+   #
+   # write_status
+   def write_status(self) :
+      #
+      # status_file
+      # write to a temporary file and then replace so that readers
+      # never see a partial file
+      temp_file = f'{self.status_file}.{os.getpid()}.tmp'
+      with open(temp_file, 'w') as file_obj :
+         json.dump( self.progress(), file_obj, indent = 1 )
+      os.replace(temp_file, self.status_file)
+   #
+   # clear
+   def clear(self) :
+      dismod_at.sql_command(self.connection, 'DELETE FROM job_journal')
+   #
+   # close
+   def close(self) :
+      self.connection.close()
@@ -0,0 +1,368 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+{xrst_begin job_lease_class}
+{xrst_spell
+  nfs
+  sqlite
+}
+
+Job Table and Job Leases in a File System Database
+##################################################
+This class is used by the ``lease``
+:ref:`option_all_table@fit_engine` to coordinate
+:ref:`lease_worker-name` processes that may be running on different hosts.
+The job table, the status of each job, and the lease held by each running
+job are stored in a sqlite database.
+All of the workers must be able to read and write this database; e.g.,
+it is on a file system that is mounted by all the hosts.
+(The file system must support the file locking used by sqlite.
+Some nfs configurations do not.)
+
+job_lease_class
+***************
+{xrst_code py}
+job_lease = job_lease_class(lease_database)
+{xrst_code}
+This ``str`` is the name of an existing lease database; see
+*create* below.
+
+create
+******
+{xrst_code py}
+job_lease_class.create(
+   lease_database,
+   job_table,
+   status_list,
+   priority,
+   option_dict,
+)
+{xrst_code}
+This static method creates a new lease database
+(replacing any previous version of this database).
+
+job_table
+=========
+is the :ref:`create_job_table@job_table` for this cascade.
+
+status_list
+===========
+is a ``list`` with the initial ``str`` status name for each job in
+*job_table* .
+The possible status names are
+``skip`` , ``wait`` , ``ready`` , ``done`` , ``error`` , and ``abort`` ;
+see :ref:`fit_one_process@job_status_name` .
+
+priority
+========
+is a ``list`` of ``float`` with the priority for each job in *job_table* .
+Ready jobs with larger priority are leased first; see
+:ref:`job_priority-name` .
+
+option_dict
+===========
+is a ``dict`` of options that the workers need to run jobs.
+The keys and values are ``str`` and the following keys are required:
+
+.. csv-table::
+   :header-rows: 1
+
+   Key,                 Meaning
+   all_node_database,   :ref:`all_node_db-name` relative to worker directory
+   fit_integrand,       space separated integrand ids in *fit_integrand*
+   fit_type_list,       space separated elements of *fit_type_list*
+   lease_seconds,       :ref:`option_all_table@lease_seconds`
+
+The optional key ``cascade_hash`` is the
+:ref:`fit_cache_class@cascade_hash` for the jobs.
+
+get_option
+**********
+{xrst_code py}
+option_dict = job_lease.get_option()
+{xrst_code}
+returns the *option_dict* passed to ``create`` .
+
+get_job_table
+*************
+{xrst_code py}
+job_table = job_lease.get_job_table()
+{xrst_code}
+returns the *job_table* passed to ``create`` .
+
+claim
+*****
+{xrst_code py}
+job_id = job_lease.claim(worker_name)
+{xrst_code}
+First, the jobs that have a ``run`` status, and have not had a
+heartbeat in the last *lease_seconds* , have their lease reclaimed;
+i.e., their status is changed back to ``ready`` .
+Then, if there are no ready jobs, None is returned.
+Otherwise, the ready job with the highest priority
+(smallest job_id in case of a tie) is leased to the ``str`` *worker_name* ;
+i.e., its status is changed to ``run`` and its job_id is returned.
+
+heartbeat
+*********
+{xrst_code py}
+ok = job_lease.heartbeat(job_id, worker_name)
+{xrst_code}
+extends the lease for this job.
+The return value is false if *worker_name* no longer holds this lease.
+
+finish
+******
+{xrst_code py}
+ok = job_lease.finish(job_id, worker_name, job_done)
+{xrst_code}
+If *worker_name* no longer holds the lease for this job, the return value
+is false and nothing is changed.
+Otherwise, the return value is true and:
+If the ``bool`` *job_done* is true, the status for this job is changed to
+``done`` and the status of its children that are not
+:ref:`create_job_table@job_table@prior_only` is changed to ``ready`` .
+If *job_done* is false, the status for this job is changed to ``error``
+and the status for its descendants that are not prior only is
+changed to ``abort`` .
+
+status_count
+************
+{xrst_code py}
+status_count = job_lease.status_count()
+{xrst_code}
+returns a ``dict`` with key equal to each status name
+and value equal to the number of jobs with that status.
+
+get_status
+**********
+{xrst_code py}
+status_list = job_lease.get_status()
+{xrst_code}
+returns a ``list`` with the current ``str`` status name for each job.
+
+close
+*****
+{xrst_code py}
+job_lease.close()
+{xrst_code}
+This closes the database connection held by *job_lease* .
+
+{xrst_end job_lease_class}
+'''
+import os
+import time
+import dismod_at
+# ----------------------------------------------------------------------------
+# job_table_col
+# name and type of the job_lease columns that come from the job table
+job_table_col = [
+   ( 'job_name',            'text'    ),
+   ( 'prior_only',          'integer' ),
+   ( 'fit_node_id',         'integer' ),
+   ( 'split_reference_id',  'integer' ),
+   ( 'parent_job_id',       'integer' ),
+   ( 'start_child_job_id',  'integer' ),
+   ( 'end_child_job_id',    'integer' ),
+   ( 'job_depth',           'integer' ),
+   ( 'preorder_id',         'integer' ),
+   ( 'end_preorder_id',     'integer' ),
+]
+# ----------------------------------------------------------------------------
+class job_lease_class :
+   #
+   # create
+   @staticmethod
+   def create(lease_database, job_table, status_list, priority, option_dict) :
+      assert type(lease_database) == str
+      assert type(job_table) == list
+      assert type(status_list) == list
+      assert type(priority) == list
+      assert type(option_dict) == dict
+      assert len(status_list) == len(job_table)
+      assert len(priority) == len(job_table)
+      #
+      connection = dismod_at.create_connection(
+         lease_database, new = True, readonly = False
+      )
+      #
+      # job_lease table
+      # job_lease_id is equal to job_id
+      col_name = [ name for (name, ty) in job_table_col ]
+      col_type = [ ty for (name, ty) in job_table_col ]
+      col_name += [ 'priority', 'status_name', 'worker_name', 'heartbeat' ]
+      col_type += [ 'real',     'text',        'text',        'real'      ]
+      row_list  = list()
+      for (job_id, job_row) in enumerate(job_table) :
+         row = list()
+         for (name, ty) in job_table_col :
+            value = job_row.get(name, None)
+            if name == 'prior_only' :
+               value = int(value)
+            row.append(value)
+         row += [ priority[job_id], status_list[job_id], None, None ]
+         row_list.append(row)
+      dismod_at.create_table(
+         connection, 'job_lease', col_name, col_type, row_list
+      )
+      #
+      # indices used by claim and finish
+      for command in [
+         'CREATE INDEX job_lease_parent ON job_lease(parent_job_id)' ,
+         'CREATE INDEX job_lease_preorder ON job_lease(preorder_id)' ,
+         'CREATE INDEX job_lease_ready ON job_lease' +
+            '(status_name, priority DESC, job_lease_id)' ,
+      ] :
+         dismod_at.sql_command(connection, command)
+      #
+      # lease_option table
+      row_list = [ [ key, option_dict[key] ] for key in option_dict ]
+      dismod_at.create_table(
+         connection,
+         'lease_option',
+         [ 'option_name', 'option_value' ],
+         [ 'text', 'text' ],
+         row_list,
+      )
+      connection.close()
+   #
+   # __init__
+   def __init__(self, lease_database) :
+      assert type(lease_database) == str
+      assert os.path.exists(lease_database)
+      self.connection = dismod_at.create_connection(
+         lease_database, new = False, readonly = False
+      )
+      dismod_at.sql_command(self.connection, 'PRAGMA busy_timeout = 60000')
+      #
+      # lease_seconds
+      option_dict        = self.get_option()
+      self.lease_seconds = float( option_dict['lease_seconds'] )
+   #
+   # get_option
+   def get_option(self) :
+      command = 'SELECT option_name, option_value FROM lease_option'
+      result  = dismod_at.sql_command(self.connection, command)
+      option_dict = dict()
+      for (name, value) in result :
+         option_dict[name] = value
+      return option_dict
+   #
+   # get_job_table
+   def get_job_table(self) :
+      col_name  = [ name for (name, ty) in job_table_col ]
+      command   = 'SELECT ' + ','.join(col_name)
+      command  += ' FROM job_lease ORDER BY job_lease_id'
+      result    = dismod_at.sql_command(self.connection, command)
+      job_table = list()
+      for value_list in result :
+         row = dict()
+         for (name, value) in zip(col_name, value_list) :
+            if name == 'prior_only' :
+               row[name] = bool(value)
+            elif value != None or name not in \
+                  [ 'start_child_job_id', 'end_child_job_id' ] :
+               row[name] = value
+         job_table.append(row)
+      return job_table
+   #
+   # claim
+   def claim(self, worker_name) :
+      assert type(worker_name) == str
+      now    = time.time()
+      cursor = self.connection.cursor()
+      cursor.execute('BEGIN IMMEDIATE')
+      #
+      # reclaim expired leases
+      command  = "UPDATE job_lease SET status_name = 'ready', "
+      command += 'worker_name = NULL '
+      command += "WHERE status_name = 'run' AND heartbeat < ?"
+      cursor.execute(command, (now - self.lease_seconds,) )
+      #
+      # job_id
+      command  = 'SELECT job_lease_id FROM job_lease '
+      command += "WHERE status_name = 'ready' "
+      command += 'ORDER BY priority DESC, job_lease_id LIMIT 1'
+      result   = cursor.execute(command).fetchall()
+      job_id   = None
+      if len(result) > 0 :
+         job_id   = result[0][0]
+         command  = "UPDATE job_lease SET status_name = 'run', "
+         command += 'worker_name = ?, heartbeat = ? WHERE job_lease_id = ?'
+         cursor.execute(command, (worker_name, now, job_id) )
+      self.connection.commit()
+      return job_id
+   #
+   # heartbeat
+   def heartbeat(self, job_id, worker_name) :
+      assert type(job_id) == int
+      assert type(worker_name) == str
+      command  = 'UPDATE job_lease SET heartbeat = ? '
+      command += 'WHERE job_lease_id = ? AND worker_name = ? '
+      command += "AND status_name = 'run'"
+      cursor = self.connection.cursor()
+      cursor.execute(command, (time.time(), job_id, worker_name) )
+      ok = cursor.rowcount == 1
+      self.connection.commit()
+      return ok
+   #
+   # finish
+   def finish(self, job_id, worker_name, job_done) :
+      assert type(job_id) == int
+      assert type(worker_name) == str
+      assert type(job_done) == bool
+      cursor = self.connection.cursor()
+      cursor.execute('BEGIN IMMEDIATE')
+      #
+      # this_job_id
+      status_name = 'done' if job_done else 'error'
+      command  = 'UPDATE job_lease SET status_name = ?, worker_name = NULL '
+      command += 'WHERE job_lease_id = ? AND worker_name = ? '
+      command += "AND status_name = 'run'"
+      cursor.execute(command, (status_name, job_id, worker_name) )
+      ok = cursor.rowcount == 1
+      if not ok :
+         self.connection.rollback()
+         return False
+      #
+      if job_done :
+         # children of this job
+         command  = "UPDATE job_lease SET status_name = 'ready' "
+         command += "WHERE parent_job_id = ? AND status_name = 'wait'"
+         cursor.execute(command, (job_id,) )
+      else :
+         # descendants of this job
+         command  = 'SELECT preorder_id, end_preorder_id FROM job_lease '
+         command += 'WHERE job_lease_id = ?'
+         (preorder_id, end_preorder_id) = \
+            cursor.execute(command, (job_id,) ).fetchall()[0]
+         command  = "UPDATE job_lease SET status_name = 'abort' "
+         command += 'WHERE ? < preorder_id AND preorder_id < ? '
+         command += 'AND prior_only = 0'
+         cursor.execute(command, (preorder_id, end_preorder_id) )
+      self.connection.commit()
+      return True
+   #
+   # status_count
+   def status_count(self) :
+      command  = 'SELECT status_name, count(*) FROM job_lease '
+      command += 'GROUP BY status_name'
+      result   = dismod_at.sql_command(self.connection, command)
+      status_count = dict()
+      for name in [ 'skip', 'wait', 'ready', 'run', 'done', 'error', 'abort' ] :
+         status_count[name] = 0
+      for (name, count) in result :
+         status_count[name] = count
+      return status_count
+   #
+   # get_status
+   def get_status(self) :
+      command = 'SELECT status_name FROM job_lease ORDER BY job_lease_id'
+      result  = dismod_at.sql_command(self.connection, command)
+      return [ row[0] for row in result ]
+   #
+   # close
+   def close(self) :
+      self.connection.close()
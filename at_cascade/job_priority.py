@@ -0,0 +1,172 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+{xrst_begin job_priority}
+
+Priority for Running Ready Jobs
+###############################
+
+Prototype
+*********
+{xrst_literal ,
+   # BEGIN_DEF, # END_DEF
+   # BEGIN_RETURN, # END_RETURN
+}
+
+Purpose
+*******
+When there are more jobs ready to run than there are cpus available,
+:ref:`fit_parallel-name` starts the ready jobs with the highest priority first.
+Ties are broken by running the job with the smallest job_id first.
+Starting deep and wide subtrees early reduces the time at the end of a
+cascade when most of the cpus are idle waiting for a few long chains of jobs.
+
+job_table
+*********
+This is the :ref:`create_job_table@job_table` for this cascade.
+
+priority_type
+*************
+This ``str`` specifies the priority policy.
+It is one of the following values:
+
+job_id
+======
+All the jobs have the same priority; i.e.,
+the ready jobs are run in job_id order.
+
+descendant
+==========
+The priority for a job is the number of its descendants that must be fit;
+i.e., descendants that are not
+:ref:`create_job_table@job_table@prior_only` .
+
+critical_path
+=============
+The priority for a job is the maximum, over all chains of jobs
+that start with this job, of the cost of the jobs in the chain
+that must be fit.
+If *job_seconds* is None, the cost of each job is one.
+Otherwise the cost of each job is its predicted seconds.
+
+longest
+=======
+The priority for a job is its predicted seconds; i.e.,
+the longest jobs are run first.
+If *job_seconds* is None, this is the same as ``job_id`` .
+
+goal *job_name*
+===============
+The priority type is the text ``goal`` followed by a space and a job name.
+The jobs that are ancestors of the goal job, the goal job,
+and the descendants of the goal job,
+have priority one. All the other jobs have priority zero.
+If *job_name* is a node name, and the job table has
+split reference values for this node,
+all the jobs for this node are goal jobs.
+
+job_seconds
+***********
+If this is not None, it is a ``list`` of ``float`` with the predicted
+wall time for each job; see :ref:`job_history_class@predict` .
+
+priority
+********
+The return value *priority* is a ``list`` of ``float`` with length
+equal to the length of *job_table* .
+A job with a larger value of *priority* [ *job_id* ]
+is run before a job with a smaller value.
+
+{xrst_end job_priority}
+'''
+# ----------------------------------------------------------------------------
+# BEGIN_DEF
+# at_cascade.job_priority
+def job_priority(job_table, priority_type, job_seconds = None) :
+   assert type(job_table) == list
+   assert type(priority_type) == str
+   assert job_seconds == None or type(job_seconds) == list
+   # END_DEF
+   #
+   # n_job
+   n_job = len(job_table)
+   #
+   # priority_name, goal_name
+   priority_list = priority_type.split()
+   priority_name = priority_list[0] if len(priority_list) > 0 else ''
+   if priority_name == 'goal' :
+      if len(priority_list) != 2 :
+         msg  = f'job_priority: priority_type = {priority_type} '
+         msg += 'is goal but not followed by one job name'
+         assert False, msg
+      goal_name = priority_list[1]
+   elif len(priority_list) != 1 or priority_name not in [
+      'job_id', 'descendant', 'critical_path', 'longest'
+   ] :
+      msg  = f'job_priority: priority_type = {priority_type} is not '
+      msg += 'job_id, descendant, critical_path, longest, or goal job_name'
+      assert False, msg
+   #
+   # fit_job
+   fit_job = [ not row['prior_only'] for row in job_table ]
+   #
+   # job_cost
+   if job_seconds is None :
+      job_cost = n_job * [ 1.0 ]
+   else :
+      job_cost = job_seconds
+   #
+   # priority
+   priority = n_job * [ 0.0 ]
+   if priority_name == 'descendant' :
+      # job_table is in breadth first order so children come after parents
+      for job_id in reversed( range(n_job) ) :
+         parent_job_id = job_table[job_id]['parent_job_id']
+         if parent_job_id is not None and fit_job[job_id] :
+            priority[parent_job_id] += priority[job_id] + 1.0
+   elif priority_name == 'critical_path' :
+      for job_id in reversed( range(n_job) ) :
+         if fit_job[job_id] :
+            priority[job_id] += job_cost[job_id]
+         parent_job_id = job_table[job_id]['parent_job_id']
+         if parent_job_id is not None :
+            priority[parent_job_id] = max(
+               priority[parent_job_id], priority[job_id]
+            )
+   elif priority_name == 'longest' :
+      if job_seconds is not None :
+         priority = [ float(seconds) for seconds in job_seconds ]
+   elif priority_name == 'goal' :
+      #
+      # goal_job_set
+      goal_job_set = set()
+      for (job_id, row) in enumerate(job_table) :
+         job_name = row['job_name']
+         if job_name == goal_name or job_name.startswith(goal_name + '.') :
+            goal_job_set.add(job_id)
+      if len(goal_job_set) == 0 :
+         msg = f'job_priority: goal {goal_name} is not in the job table'
+         assert False, msg
+      #
+      # priority: descendants of goal jobs
+      for job_id in range(n_job) :
+         parent_job_id = job_table[job_id]['parent_job_id']
+         if job_id in goal_job_set :
+            priority[job_id] = 1.0
+         elif parent_job_id is not None and priority[parent_job_id] == 1.0 :
+            priority[job_id] = 1.0
+      #
+      # priority: ancestors of goal jobs
+      for job_id in goal_job_set :
+         parent_job_id = job_table[job_id]['parent_job_id']
+         while parent_job_id is not None :
+            priority[parent_job_id] = 1.0
+            parent_job_id = job_table[parent_job_id]['parent_job_id']
+   #
+   # BEGIN_RETURN
+   assert type(priority) == list
+   assert len(priority) == n_job
+   return priority
+   # END_RETURN
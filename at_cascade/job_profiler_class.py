@@ -0,0 +1,125 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+{xrst_begin job_profiler_class}
+{xrst_spell
+  cprofile
+  pstats
+}
+
+Profile the Python Code For Selected Jobs
+#########################################
+
+job_profiler_class
+******************
+{xrst_code py}
+job_profiler = job_profiler_class(all_node_database, job_name, profile_file)
+{xrst_code}
+
+all_node_database
+=================
+is the :ref:`all_node_db-name` for this cascade.
+The :ref:`option_all_table@profile_job` option in this database
+determines if this job is profiled.
+
+job_name
+========
+is the ``str`` :ref:`create_job_table@job_table@job_name` for this job.
+
+profile_file
+============
+is the ``str`` name of the file where the profile for this job is written.
+
+AT_CASCADE_PROFILE_JOB
+======================
+If the profile_job option does not appear in the option_all table,
+the value of this environment variable (if it is set) is used for
+the option; e.g., to profile the :ref:`csv.pre_parallel-name` jobs.
+
+selected
+********
+*job_profiler* . ``selected`` is true (false) if this job
+is (is not) profiled.
+
+start
+*****
+{xrst_code py}
+job_profiler.start()
+{xrst_code}
+If this job is selected, this starts a ``cProfile`` profiler for
+the current thread.
+Otherwise, it does nothing.
+
+stop
+****
+{xrst_code py}
+job_profiler.stop()
+{xrst_code}
+If this job is selected, this stops the profiler and writes the
+results to *profile_file* in the ``pstats`` format;
+see :ref:`merge_profile-name` .
+Otherwise, it does nothing.
+
+{xrst_end job_profiler_class}
+'''
+import os
+import zlib
+import cProfile
+import dismod_at
+# ----------------------------------------------------------------------------
+# selected = profile_selected(profile_job, job_name)
+# profile_job is the value of the profile_job option (or None)
+def profile_selected(profile_job, job_name) :
+   if profile_job == None :
+      return False
+   token_list = profile_job.split()
+   if len(token_list) == 1 :
+      try :
+         fraction = float( token_list[0] )
+      except ValueError :
+         fraction = None
+      if fraction != None :
+         # the same jobs are selected in every process and every run
+         hash_value = zlib.crc32( job_name.encode('utf-8') )
+         return hash_value < fraction * 2**32
+   if 'all' in token_list :
+      return True
+   return job_name in token_list
+# ----------------------------------------------------------------------------
+class job_profiler_class :
+   #
+   # __init__
+   def __init__(self, all_node_database, job_name, profile_file) :
+      assert type(all_node_database) == str
+      assert type(job_name) == str
+      assert type(profile_file) == str
+      #
+      # profile_job
+      connection = dismod_at.create_connection(
+         all_node_database, new = False, readonly = True
+      )
+      option_all_table = dismod_at.get_table_dict(connection, 'option_all')
+      connection.close()
+      profile_job = os.environ.get('AT_CASCADE_PROFILE_JOB', None)
+      for row in option_all_table :
+         if row['option_name'] == 'profile_job' :
+            profile_job = row['option_value']
+      #
+      self.selected     = profile_selected(profile_job, job_name)
+      self.profile_file = profile_file
+      self.profiler     = None
+   #
+   # start
+   def start(self) :
+      if self.selected :
+         self.profiler = cProfile.Profile()
+         self.profiler.enable()
+   #
+   # stop
+   def stop(self) :
+      if self.profiler != None :
+         self.profiler.disable()
+         self.profiler.dump_stats(self.profile_file)
+         self.profiler = None
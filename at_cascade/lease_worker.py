@@ -0,0 +1,326 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+{xrst_begin lease_worker}
+{xrst_spell
+  pid
+}
+
+Fit Jobs Leased From a Job Lease Database
+#########################################
+
+Prototype
+*********
+{xrst_literal
+   # BEGIN_DEF
+   # END_DEF
+}
+
+Purpose
+*******
+This routine is used by the ``lease``
+:ref:`option_all_table@fit_engine` .
+It can also be run on other hosts that mount the same file system,
+so that the cascade uses the cpus on more than one host;
+see *lease_database* below.
+Each call to lease_worker fits one job at a time
+until there are no more jobs that can be run.
+
+lease_database
+**************
+This is the :ref:`job_lease_class-name` database
+(relative to the current working directory).
+It is ``job_lease`` *shared_unique* ``.db``
+in the directory for the start job database; see
+:ref:`fit_parallel@shared_unique` and :ref:`get_database_dir-name` .
+All the workers must use the same current working directory
+(relative to the file system) as :ref:`fit_parallel-name` because the
+:ref:`option_all_table@result_dir` is relative to this directory.
+
+Other Hosts
+===========
+For example, the following command would start a worker on another host::
+
+   cd directory ; python3 -c \\
+   "import at_cascade ; at_cascade.lease_worker('lease_database')"
+
+where *directory* is the current working directory for fit_parallel.
+This can be done any time after fit_parallel prints the message
+``create:`` *lease_database* .
+
+worker_name
+***********
+This ``str`` identifies this worker in the lease database.
+If it is None, *host_name* . *pid* is used
+where *host_name* is the name of this host and
+*pid* is the process id for this worker.
+
+Heartbeat
+*********
+While a job is being fit, a separate thread extends its lease every
+:ref:`option_all_table@lease_seconds` divided by five seconds.
+If a worker dies, its lease expires after *lease_seconds* and the job
+is leased to another worker.
+If a worker loses its lease while fitting a job,
+the process that is fitting the job, and the dismod_at command it is running,
+are terminated (within about a second) and the job is not marked
+as done or error by this worker.
+This keeps the old holder from writing to the job's database
+while the new holder is fitting it.
+
+Fit
+***
+Each job is fit using :ref:`fit_one_job-name` in a separate process
+that is the leader of a new process group; see Heartbeat above.
+The first type in *fit_type_list* is tried first,
+if it fails and there is a second type, it is tried.
+The standard output for the fit is written to ``trace.out``
+in the same directory as the database for the job.
+
+{xrst_end lease_worker}
+'''
+import os
+import time
+import signal
+import socket
+import datetime
+import threading
+import multiprocessing
+import dismod_at
+import at_cascade
+from at_cascade.fit_one_process import get_result_database_dir
+# ----------------------------------------------------------------------------
+# heartbeat_loop
+# extend the lease for job_id until stop_event is set.
+# If the lease is lost, lost_event is set.
+def heartbeat_loop(
+   lease_database, job_id, worker_name, stop_event, lost_event
+) :
+   job_lease = at_cascade.job_lease_class(lease_database)
+   seconds   = job_lease.lease_seconds / 5.0
+   while not stop_event.wait(timeout = seconds) :
+      ok = job_lease.heartbeat(job_id, worker_name)
+      if not ok :
+         lost_event.set()
+         break
+   job_lease.close()
+# ----------------------------------------------------------------------------
+# lease_fit
+# Target for the process that fits one leased job.
+# It is the leader of a new process group so that it, and the dismod_at
+# command it is running, can be terminated using os.killpg.
+def lease_fit(
+   result_queue,
+   job_table,
+   job_id,
+   all_node_database,
+   node_table,
+   fit_integrand,
+   fit_type_list,
+   result_database_dir,
+   cascade_hash,
+) :
+   os.setpgrp()
+   job_name = job_table[job_id]['job_name']
+   #
+   # trace_file_obj
+   trace_file_obj = open(f'{result_database_dir}/trace.out', 'w')
+   #
+   # job_profiler
+   job_profiler = at_cascade.job_profiler_class(
+      all_node_database, job_name, f'{result_database_dir}/profile.prof'
+   )
+   job_profiler.start()
+   #
+   # job_done
+   job_done       = False
+   have_data      = True
+   fit_type_index = 0
+   while have_data and (not job_done) and \
+         (fit_type_index < len(fit_type_list)) :
+      fit_type        = fit_type_list[fit_type_index]
+      fit_type_index += 1
+      #
+      now          = datetime.datetime.now()
+      current_time = now.strftime("%H:%M:%S")
+      print( f'Begin: {current_time}: fit {fit_type:<5} {job_name}' )
+      try :
+         at_cascade.fit_one_job(
+            job_table         = job_table,
+            run_job_id        = job_id ,
+            all_node_database = all_node_database,
+            node_table        = node_table,
+            fit_integrand     = fit_integrand,
+            fit_type          = fit_type,
+            first_fit         = fit_type_index == 1,
+            trace_file_obj    = trace_file_obj,
+            cascade_hash      = cascade_hash,
+         )
+         job_done = True
+      except Exception as e:
+         msg      = str(e)
+         # another fit type is not tried for these failures
+         if msg.startswith( ('no data: abort', 'timeout: abort') ) :
+            have_data = False
+         print( f'fit {fit_type} {job_name} message: ' + msg )
+   job_profiler.stop()
+   trace_file_obj.close()
+   result_queue.put( (job_done, fit_type) )
+# ----------------------------------------------------------------------------
+# BEGIN_DEF
+# at_cascade.lease_worker
+def lease_worker(lease_database, worker_name = None) :
+   assert type(lease_database) == str
+   assert worker_name == None or type(worker_name) == str
+   # END_DEF
+   #
+   # worker_name
+   if worker_name == None :
+      worker_name = f'{socket.gethostname()}.{os.getpid()}'
+   #
+   # job_lease, job_table, option_dict
+   job_lease   = at_cascade.job_lease_class(lease_database)
+   job_table   = job_lease.get_job_table()
+   option_dict = job_lease.get_option()
+   #
+   # all_node_database, fit_integrand, fit_type_list, cascade_hash
+   all_node_database = option_dict['all_node_database']
+   fit_integrand     = { int(s) for s in option_dict['fit_integrand'].split() }
+   fit_type_list     = option_dict['fit_type_list'].split()
+   cascade_hash      = option_dict.get('cascade_hash', None)
+   #
+   # root_database
+   connection = dismod_at.create_connection(
+      all_node_database, new = False, readonly = True
+   )
+   option_all_table = dismod_at.get_table_dict(connection, 'option_all')
+   connection.close()
+   root_database = None
+   for row in option_all_table :
+      if row['option_name'] == 'root_database' :
+         root_database = row['option_value']
+   assert root_database != None
+   #
+   # node_table
+   connection = dismod_at.create_connection(
+      root_database, new = False, readonly = True
+   )
+   node_table = dismod_at.get_table_dict(connection, 'node')
+   connection.close()
+   #
+   # poll_seconds
+   # time to wait for a job to become ready
+   poll_seconds = min(10.0, job_lease.lease_seconds / 5.0)
+   #
+   while True :
+      #
+      # job_id
+      job_id = job_lease.claim(worker_name)
+      if job_id == None :
+         status_count = job_lease.status_count()
+         if status_count['run'] == 0 and status_count['ready'] == 0 :
+            job_lease.close()
+            return
+         time.sleep(poll_seconds)
+         continue
+      #
+      # job_name
+      job_name = job_table[job_id]['job_name']
+      #
+      # heartbeat_thread
+      stop_event       = threading.Event()
+      lost_event       = threading.Event()
+      heartbeat_thread = threading.Thread(
+         target = heartbeat_loop,
+         args   = (
+            lease_database, job_id, worker_name, stop_event, lost_event
+         ),
+      )
+      heartbeat_thread.start()
+      #
+      # job_journal
+      job_journal = at_cascade.job_journal_class(all_node_database)
+      job_journal.set_status( [ job_name ], 'run' )
+      #
+      # result_database_dir
+      row = job_table[job_id]
+      result_database_dir = get_result_database_dir(
+         all_node_database,
+         node_table,
+         row['fit_node_id'],
+         row['split_reference_id'],
+      )
+      #
+      # p
+      # also set the process group here in case p has not done it yet
+      result_queue = multiprocessing.Queue()
+      args = (
+         result_queue,
+         job_table,
+         job_id,
+         all_node_database,
+         node_table,
+         fit_integrand,
+         fit_type_list,
+         result_database_dir,
+         cascade_hash,
+      )
+      p = multiprocessing.Process(target = lease_fit, args = args)
+      p.daemon = False
+      p.start()
+      try :
+         os.setpgid(p.pid, p.pid)
+      except OSError :
+         pass
+      #
+      # lease_lost
+      # wait for the fit to finish, terminate it if the lease is lost
+      lease_lost = False
+      while p.is_alive() and not lease_lost :
+         p.join(timeout = 1.0)
+         lease_lost = lost_event.is_set()
+      if lease_lost :
+         try :
+            os.killpg(p.pid, signal.SIGTERM)
+         except ProcessLookupError :
+            pass
+      #
+      # job_done, fit_type
+      job_done = False
+      fit_type = fit_type_list[0]
+      if not lease_lost :
+         if p.exitcode == 0 :
+            (job_done, fit_type) = result_queue.get()
+      p.join()
+      #
+      # heartbeat_thread
+      stop_event.set()
+      heartbeat_thread.join()
+      #
+      # job_lease, job_journal
+      ok = job_lease.finish(job_id, worker_name, job_done)
+      if not ok :
+         print( f'lease_worker: {worker_name} lost lease for {job_name}' )
+      elif job_done :
+         job_journal.set_status( [ job_name ], 'done' )
+      else :
+         job_journal.set_status( [ job_name ], 'error' )
+         start_row = job_table[job_id]
+         job_journal.set_status( [
+            row['job_name'] for row in job_table
+               if start_row['preorder_id'] < row['preorder_id']
+               and row['preorder_id'] < start_row['end_preorder_id']
+               and not row['prior_only']
+         ], 'abort' )
+      job_journal.close()
+      #
+      # print message at end
+      now          = datetime.datetime.now()
+      current_time = now.strftime("%H:%M:%S")
+      if job_done :
+         print( f'End:   {current_time}: fit {fit_type:<5} {job_name}' )
+      else :
+         print( f'Error: {current_time}: fit {fit_type:<5} {job_name}' )
+      print( f'       {job_lease.status_count()}' )
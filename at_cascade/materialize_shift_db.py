@@ -0,0 +1,98 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+{xrst_begin materialize_shift_db}
+
+Create a Shift Database That Was Deferred by its Parent
+#######################################################
+
+Prototype
+*********
+{xrst_literal ,
+   # BEGIN_DEF, # END_DEF
+   # BEGIN_RETURN, # END_RETURN
+}
+
+all_node_database
+*****************
+is a python string containing the name of the :ref:`all_node_db-name`.
+
+node_table
+**********
+is a ``list`` of ``dict`` containing the node table for this cascade.
+
+job_table
+*********
+is the :ref:`create_job_table@job_table` for this cascade.
+
+job_id
+******
+is the ``int`` job table index for the job that needs its database.
+
+shift_database
+**************
+We use *shift_database* for the ``dismod.db`` file for this job
+and *fit_database* for the ``dismod.db`` file for its parent job.
+If *fit_database* has a
+:ref:`create_shift_db@lazy_shift@c_shift_summary Table` with rows for
+*shift_database* , it is created by copying the ``shift_template.db``
+in the same directory as *fit_database* ,
+changing the values in the c_shift_summary table in one transaction,
+and then running :ref:`omega_constraint-name` .
+This is done using a temporary file that is moved to *shift_database*
+when it is complete, so *shift_database* is never partially written.
+The rows for *shift_database* are then removed from the c_shift_summary table
+and, if no rows remain, ``shift_template.db`` is removed.
+If this job has no parent, or there are no rows for *shift_database* ,
+nothing is done and the return value is None.
+Otherwise the return value is *shift_database* .
+
+{xrst_end materialize_shift_db}
+'''
+from at_cascade.create_shift_db import summary2shift_db
+from at_cascade.fit_one_process import get_result_database_dir
+# ----------------------------------------------------------------------------
+# BEGIN_DEF
+# at_cascade.materialize_shift_db
+def materialize_shift_db(
+   all_node_database ,
+   node_table        ,
+   job_table         ,
+   job_id            ,
+) :
+   assert type(all_node_database) == str
+   assert type(node_table) == list
+   assert type(job_table) == list
+   assert type(job_id) == int
+   # END_DEF
+   #
+   # parent_job_id
+   parent_job_id = job_table[job_id]['parent_job_id']
+   if parent_job_id == None :
+      return None
+   #
+   # shift_database, fit_database
+   database_dir = dict()
+   for this_id in [ job_id, parent_job_id ] :
+      row = job_table[this_id]
+      database_dir[this_id] = get_result_database_dir(
+         all_node_database,
+         node_table,
+         row['fit_node_id'],
+         row['split_reference_id'],
+      )
+   shift_database = f'{database_dir[job_id]}/dismod.db'
+   fit_database   = f'{database_dir[parent_job_id]}/dismod.db'
+   #
+   # shift_database
+   shift_database = summary2shift_db(
+      all_node_database, fit_database, shift_database
+   )
+   #
+   # BEGIN_RETURN
+   # ...
+   assert shift_database == None or type(shift_database) == str
+   return shift_database
+   # END_RETURN
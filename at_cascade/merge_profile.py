@@ -0,0 +1,104 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+{xrst_begin merge_profile}
+{xrst_spell
+  pstats
+  tottime
+}
+
+Combine the Job Profiles For a Cascade
+######################################
+
+Prototype
+*********
+{xrst_literal ,
+   # BEGIN_DEF, # END_DEF
+   # BEGIN_RETURN, # END_RETURN
+}
+
+result_dir
+**********
+is the :ref:`option_all_table@result_dir` for the cascade.
+This directory, and all its sub-directories, are searched for profiles.
+
+profile_name
+************
+is the name of the profile files that are combined; see
+:ref:`job_profiler_class@job_profiler_class@profile_file` .
+The :ref:`fit_one_process-name` profiles are called ``profile.prof``
+and the :ref:`csv.pre_one_process-name` profiles are called
+``pre_profile.prof`` .
+
+n_function
+**********
+is the number of functions included in each of the tables in the report.
+
+report
+******
+The return value *report* is a ``str`` containing two tables.
+The first has the *n_function* functions with the largest
+cumulative time for all the jobs together (the hot paths).
+The second has the *n_function* functions with the largest
+time spent in the function itself (``tottime`` ).
+The first line of the report has the number of profiles that were combined.
+If there are no profiles, *report* is None.
+
+Report File
+***********
+If *report* is not None, it is also written to
+*result_dir* / *stem* ``_report.txt`` where *stem* is *profile_name*
+without its ``.prof`` extension.
+
+{xrst_end merge_profile}
+'''
+import io
+import os
+import pstats
+# ----------------------------------------------------------------------------
+# BEGIN_DEF
+# at_cascade.merge_profile
+def merge_profile(
+   result_dir                     ,
+   profile_name   = 'profile.prof',
+   n_function     = 40            ,
+) :
+   assert type(result_dir) == str
+   assert type(profile_name) == str
+   assert type(n_function) == int
+   # END_DEF
+   #
+   # profile_list
+   profile_list = list()
+   for (dirpath, dirnames, filenames) in os.walk(result_dir) :
+      if profile_name in filenames :
+         profile_list.append( os.path.join(dirpath, profile_name) )
+   profile_list = sorted(profile_list)
+   #
+   # report
+   report = None
+   if len(profile_list) > 0 :
+      stream = io.StringIO()
+      stats  = pstats.Stats( *profile_list, stream = stream )
+      stats.strip_dirs()
+      stream.write( f'merge_profile: {len(profile_list)} profiles\n' )
+      for sort_key in [ 'cumulative', 'tottime' ] :
+         stats.sort_stats(sort_key)
+         stats.print_stats(n_function)
+      report = stream.getvalue()
+      #
+      # report_file
+      stem        = profile_name
+      if stem.endswith('.prof') :
+         stem = stem[: -len('.prof')]
+      report_file = f'{result_dir}/{stem}_report.txt'
+      with open(report_file, 'w') as file_obj :
+         file_obj.write(report)
+   #
+   # BEGIN_RETURN
+   # ...
+   assert report == None or type(report) == str
+   return report
+   # END_RETURN
@@ -0,0 +1,68 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+{xrst_begin perturb_var}
+{xrst_spell
+  dismodat
+}
+
+Perturb the Start or Scale Values for the Model Variables
+#########################################################
+
+Prototype
+*********
+{xrst_literal
+   # BEGIN_DEF
+   # END_DEF
+}
+
+Purpose
+*******
+This has the same result as the command
+
+|  ``dismodat.py`` *fit_database* ``perturb`` *table_name* *sigma*
+
+see
+:ref:`option_all_table@perturb_optimization_start` and
+:ref:`option_all_table@perturb_optimization_scale` .
+It calls the dismod_at python routine that implements this command,
+in the current process,
+so a new python process is not started and dismod_at is not imported again.
+Because the same routine is used,
+the random values, the order in which they are drawn, and the bounds
+for the perturbed values are the same as for the command.
+Hence, for a given dismod_at option table *random_seed* ,
+the result is the same as for the command.
+
+fit_database
+************
+This ``str`` is the name of the :ref:`glossary@fit_database` .
+The dismod_at init command has been run on this database.
+
+table_name
+**********
+This ``str`` is ``start_var`` or ``scale_var`` and is the table,
+in *fit_database* , that is perturbed.
+
+sigma
+*****
+This non-negative ``float`` is the standard deviation
+of the log of the multiplier for each value.
+
+{xrst_end perturb_var}
+'''
+import dismod_at
+# ----------------------------------------------------------------------------
+# BEGIN_DEF
+# at_cascade.perturb_var
+def perturb_var(fit_database, table_name, sigma) :
+   assert type(fit_database) == str
+   assert table_name in [ 'start_var', 'scale_var' ]
+   assert type(sigma) == float
+   assert sigma >= 0.0
+   # END_DEF
+   #
+   # fit_database
+   dismod_at.perturb_command(fit_database, table_name, str(sigma) )
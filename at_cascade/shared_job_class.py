@@ -0,0 +1,432 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+{xrst_begin shared_job_class}
+{xrst_spell
+  cpus
+  dtype
+  inuse
+  numpy
+}
+
+Shared Memory Job Status, Counts, and Ready Queue
+#################################################
+This class holds the multiprocessing shared memory that is used by
+:ref:`fit_parallel-name` to coordinate the processes fitting a cascade.
+Each operation is either :math:`O(1)` or :math:`O( \\log n )`
+where :math:`n` is the number of jobs,
+so the shared lock is only held for a short time.
+
+shared_job_class
+****************
+{xrst_code py}
+shared_job = shared_job_class(
+   shared_memory_prefix_plus,
+   job_table,
+   job_status_name,
+   priority,
+   create,
+   job_memory,
+   max_memory,
+)
+{xrst_code}
+
+shared_memory_prefix_plus
+=========================
+is the prefix for the names of the shared memory; see
+:ref:`fit_parallel@shared_unique` .
+
+job_table
+=========
+is the :ref:`create_job_table@job_table` for this cascade.
+
+job_status_name
+===============
+is the name corresponding to each job status value; see
+:ref:`fit_one_process@job_status_name` .
+
+priority
+========
+If this is None, all jobs have the same priority.
+Otherwise it is a ``list`` of ``float`` with length equal to the length of
+*job_table* ; see :ref:`job_priority-name` .
+All the processes using the same shared memory must use the same priority.
+
+create
+======
+If this ``bool`` is true, the shared memory is created
+and all the job status values are set to ``wait`` .
+Otherwise, the shared memory must have already been created.
+
+job_memory
+==========
+If *create* is true, this is None or a ``list`` of ``float``
+with length equal to the length of *job_table* .
+It is the predicted memory, in megabytes, used by each job;
+see :ref:`job_history_class@predict_memory` .
+If *create* is false, this argument is not used
+(the value stored in shared memory is used).
+
+max_memory
+==========
+If *create* is true, this is None or a ``float`` specifying the
+maximum total memory, in megabytes, for the jobs that are running;
+see :ref:`option_all_table@max_memory_gb` .
+If *create* is false, this argument is not used.
+If *job_memory* or *max_memory* is None, there is no memory limit.
+
+suffix_list
+===========
+{xrst_code py}
+shared_job_class.suffix_list
+{xrst_code}
+This is the ``list`` of suffixes that are appended to
+*shared_memory_prefix_plus* to get the shared memory names.
+
+number_cpu_inuse
+****************
+The value *shared_job* . ``number_cpu_inuse`` [0] is the
+number of cpus (processes) currently fitting this cascade.
+It is a numpy array with ``dtype`` equal to ``int`` and length one.
+
+Lock
+****
+The shared lock must be held when calling any of the functions below,
+or when accessing *number_cpu_inuse* .
+
+status
+******
+{xrst_code py}
+job_status = shared_job.status(job_id)
+{xrst_code}
+returns the ``int`` status for the job with the specified job_id.
+
+count
+*****
+{xrst_code py}
+n_job = shared_job.count(job_status)
+{xrst_code}
+returns the ``int`` number of jobs with the specified status.
+
+status_count
+************
+{xrst_code py}
+status_count = shared_job.status_count()
+{xrst_code}
+returns a ``dict`` with key equal to the name of each status and value
+equal to the number of jobs with that status.
+
+set_status
+**********
+{xrst_code py}
+shared_job.set_status(job_id, job_status)
+{xrst_code}
+sets the status for the specified job.
+If *job_status* is ``ready`` , the job is added to the ready queue.
+
+pop_ready
+*********
+{xrst_code py}
+job_id = shared_job.pop_ready()
+{xrst_code}
+If no jobs are ready, the return value is None.
+Otherwise, the ready job with the highest priority
+(smallest job_id in case of a tie) is removed from the ready queue,
+its status is set to ``run`` , and its job_id is returned.
+
+Memory Limit
+============
+If there is a memory limit, and the highest priority ready job would
+make the total memory for the running jobs greater than *max_memory* ,
+the highest priority ready job that does fit is used instead.
+If no ready job fits, the return value is None.
+(This search is :math:`O(n)` and only happens when the limit is reached.)
+A job is always admitted when no jobs are running,
+so a job that is larger than *max_memory* is run by itself.
+
+memory_inuse
+************
+{xrst_code py}
+memory_inuse = shared_job.memory_inuse()
+{xrst_code}
+returns the ``int`` total predicted memory, in megabytes,
+for the jobs that have status ``run`` .
+
+close
+*****
+{xrst_code py}
+shared_job.close()
+{xrst_code}
+This closes this process's access to the shared memory.
+
+unlink
+******
+{xrst_code py}
+shared_job.unlink()
+{xrst_code}
+This frees the shared memory. It should be called once, after all
+the processes using the shared memory have called ``close`` .
+
+{xrst_end shared_job_class}
+'''
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy
+import at_cascade
+#
+class shared_job_class :
+   #
+   # suffix_list
+   suffix_list = [
+      '_number_cpu_inuse',
+      '_job_status',
+      '_status_count',
+      '_job_ready',
+      '_ready_index',
+      '_job_memory',
+      '_memory_limit',
+   ]
+   #
+   # __init__
+   def __init__(
+      self,
+      shared_memory_prefix_plus,
+      job_table,
+      job_status_name,
+      priority   = None,
+      create     = False,
+      job_memory = None,
+      max_memory = None,
+   ) :
+      assert type(shared_memory_prefix_plus) == str
+      assert type(job_table) == list
+      assert type(job_status_name) == list
+      assert priority == None or type(priority) == list
+      assert type(create) == bool
+      assert job_memory == None or type(job_memory) == list
+      assert max_memory == None or type(max_memory) == float
+      #
+      # n_job, n_status
+      n_job    = len(job_table)
+      n_status = len(job_status_name)
+      #
+      # job_status_name, job_status_wait, job_status_ready, job_status_run
+      self.job_status_name  = job_status_name
+      self.job_status_wait  = job_status_name.index( 'wait' )
+      self.job_status_ready = job_status_name.index( 'ready' )
+      self.job_status_run   = job_status_name.index( 'run' )
+      #
+      # priority
+      if priority is None :
+         self.priority = numpy.zeros( n_job, dtype = float )
+      else :
+         self.priority = numpy.array( priority, dtype = float )
+      #
+      # shm_list, shared_array
+      length = {
+         '_number_cpu_inuse' : 1 ,
+         '_job_status'       : n_job ,
+         '_status_count'     : n_status ,
+         '_job_ready'        : n_job ,
+         '_ready_index'      : n_job ,
+         '_job_memory'       : n_job ,
+         '_memory_limit'     : 2 ,
+      }
+      self.shm_list = list()
+      shared_array  = dict()
+      for suffix in self.suffix_list :
+         tmp    = numpy.empty( length[suffix], dtype = int )
+         mapped = at_cascade.map_shared( shared_memory_prefix_plus + suffix )
+         shm = multiprocessing.shared_memory.SharedMemory(
+            create = create, size = tmp.nbytes, name = mapped
+         )
+         self.shm_list.append(shm)
+         shared_array[suffix] = numpy.ndarray(
+            tmp.shape, dtype = tmp.dtype, buffer = shm.buf
+         )
+      #
+      # number_cpu_inuse, job_status, job_count, job_ready, ready_index
+      # job_ready[0:job_count[job_status_ready]] is a heap of ready job_ids
+      # job_ready[ ready_index[job_id] ] == job_id for each ready job_id
+      self.number_cpu_inuse = shared_array['_number_cpu_inuse']
+      self.job_status       = shared_array['_job_status']
+      self.job_count        = shared_array['_status_count']
+      self.job_ready        = shared_array['_job_ready']
+      self.ready_index      = shared_array['_ready_index']
+      #
+      # job_memory, memory_limit
+      # memory is in megabytes, memory_limit[1] == 0 means no limit
+      # memory_limit[0] is the memory for the jobs that are running
+      self.job_memory       = shared_array['_job_memory']
+      self.memory_limit     = shared_array['_memory_limit']
+      if create :
+         self.number_cpu_inuse[0]       = 0
+         self.job_status[:]             = self.job_status_wait
+         self.job_count[:]              = 0
+         self.job_count[self.job_status_wait] = n_job
+         self.job_ready[:]              = 0
+         self.ready_index[:]            = -1
+         self.job_memory[:]             = 0
+         self.memory_limit[:]           = 0
+         if job_memory is not None and max_memory is not None :
+            assert len(job_memory) == n_job
+            self.job_memory[:]   = numpy.ceil( job_memory )
+            self.memory_limit[1] = max( 1, int( numpy.ceil(max_memory) ) )
+   #
+   # less
+   # is job_id_1 before job_id_2 in the ready queue
+   def less(self, job_id_1, job_id_2) :
+      priority_1 = self.priority[job_id_1]
+      priority_2 = self.priority[job_id_2]
+      if priority_1 != priority_2 :
+         return priority_1 > priority_2
+      return job_id_1 < job_id_2
+   #
+   # swap
+   # swap two elements of the ready queue
+   def swap(self, index_1, index_2) :
+      heap = self.job_ready
+      heap[index_1], heap[index_2] = heap[index_2], heap[index_1]
+      self.ready_index[ heap[index_1] ] = index_1
+      self.ready_index[ heap[index_2] ] = index_2
+   #
+   # sift_up
+   def sift_up(self, index) :
+      heap = self.job_ready
+      while index > 0 :
+         parent = (index - 1) // 2
+         if not self.less( heap[index], heap[parent] ) :
+            return
+         self.swap(index, parent)
+         index = parent
+   #
+   # sift_down
+   def sift_down(self, index, n_heap) :
+      heap = self.job_ready
+      while True :
+         smallest = index
+         for child in [ 2 * index + 1, 2 * index + 2 ] :
+            if child < n_heap and self.less( heap[child], heap[smallest] ) :
+               smallest = child
+         if smallest == index :
+            return
+         self.swap(index, smallest)
+         index = smallest
+   #
+   # remove_ready
+   # remove the job at the specified index in the ready queue
+   def remove_ready(self, index) :
+      n_heap   = int( self.job_count[self.job_status_ready] )
+      last     = n_heap - 1
+      job_id   = int( self.job_ready[index] )
+      self.job_ready[index] = self.job_ready[last]
+      self.ready_index[ self.job_ready[index] ] = index
+      self.ready_index[job_id] = -1
+      n_heap   = last
+      self.job_count[self.job_status_ready] = n_heap
+      if index < n_heap :
+         self.sift_down(index, n_heap)
+         self.sift_up(index)
+      return job_id
+   #
+   # status
+   def status(self, job_id) :
+      return int( self.job_status[job_id] )
+   #
+   # count
+   def count(self, job_status) :
+      return int( self.job_count[job_status] )
+   #
+   # status_count
+   def status_count(self) :
+      result = dict()
+      for (job_status, name) in enumerate(self.job_status_name) :
+         result[name] = int( self.job_count[job_status] )
+      return result
+   #
+   # set_status
+   def set_status(self, job_id, job_status) :
+      old_status = int( self.job_status[job_id] )
+      if old_status == job_status :
+         return
+      #
+      # memory_limit
+      if old_status == self.job_status_run :
+         self.memory_limit[0] -= self.job_memory[job_id]
+      if job_status == self.job_status_run :
+         self.memory_limit[0] += self.job_memory[job_id]
+      #
+      # remove from the ready queue
+      if old_status == self.job_status_ready :
+         self.remove_ready( int( self.ready_index[job_id] ) )
+      else :
+         self.job_count[old_status] -= 1
+      #
+      # add to the ready queue
+      if job_status == self.job_status_ready :
+         n_heap = int( self.job_count[self.job_status_ready] )
+         self.job_ready[n_heap]   = job_id
+         self.ready_index[job_id] = n_heap
+         self.job_count[self.job_status_ready] = n_heap + 1
+         self.sift_up(n_heap)
+      else :
+         self.job_count[job_status] += 1
+      #
+      self.job_status[job_id] = job_status
+   #
+   # pop_ready
+   def pop_ready(self) :
+      n_heap = int( self.job_count[self.job_status_ready] )
+      if n_heap == 0 :
+         return None
+      #
+      # index
+      # index in the ready queue of the job to run
+      index = 0
+      if not self.fits( int( self.job_ready[0] ) ) :
+         index = None
+         for i in range(1, n_heap) :
+            job_id = int( self.job_ready[i] )
+            if self.fits(job_id) :
+               if index is None or self.less(job_id, self.job_ready[index]) :
+                  index = i
+         if index is None :
+            return None
+      #
+      job_id = self.remove_ready(index)
+      self.job_status[job_id]                 = self.job_status_run
+      self.job_count[self.job_status_run]    += 1
+      self.memory_limit[0]                   += self.job_memory[job_id]
+      return job_id
+   #
+   # fits
+   # can job_id be run without exceeding the memory limit
+   def fits(self, job_id) :
+      max_memory   = self.memory_limit[1]
+      memory_inuse = self.memory_limit[0]
+      if max_memory == 0 or self.job_count[self.job_status_run] == 0 :
+         return True
+      return memory_inuse + self.job_memory[job_id] <= max_memory
+   #
+   # memory_inuse
+   def memory_inuse(self) :
+      return int( self.memory_limit[0] )
+   #
+   # close
+   def close(self) :
+      del self.number_cpu_inuse
+      del self.job_status
+      del self.job_count
+      del self.job_ready
+      del self.ready_index
+      del self.job_memory
+      del self.memory_limit
+      for shm in self.shm_list :
+         shm.close()
+   #
+   # unlink
+   def unlink(self) :
+      for shm in self.shm_list :
+         shm.unlink()
@@ -0,0 +1,143 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+{xrst_begin stage_timer_class}
+{xrst_spell
+  rss
+  rusage
+}
+
+Record Time and Memory For Each Stage of a Job
+##############################################
+
+stage_timer_class
+*****************
+{xrst_code py}
+stage_timer = stage_timer_class(fit_database, fit_type)
+{xrst_code}
+This starts the timer for the first stage.
+
+fit_database
+============
+This ``str`` is the name of the :ref:`glossary@fit_database`
+that the timing results are written to.
+
+fit_type
+========
+This ``str`` is the type of fit (``both`` or ``fixed`` ) that is
+being timed; see :ref:`fit_one_job@fit_type` .
+
+start
+*****
+{xrst_code py}
+stage_timer.start()
+{xrst_code}
+This restarts the timer for the next stage; i.e.,
+the time since the previous ``start`` or ``stop``
+is not included in any stage.
+
+stop
+****
+{xrst_code py}
+stage_timer.stop(stage)
+{xrst_code}
+This adds a row for the ``str`` *stage* to the at_cascade_timing table
+and starts the timer for the next stage.
+
+at_cascade_timing
+*****************
+If the at_cascade_timing table does not exist in *fit_database*,
+it is created. It has the following columns:
+
+.. csv-table::
+   :header-rows: 1
+
+   Column,             Type,    Meaning
+   fit_type,           text,    *fit_type* for this timer
+   stage,              text,    *stage* for this row
+   unix_time,          real,    unix time at the end of this stage
+   wall_seconds,       real,    wall time for this stage
+   cpu_seconds,        real,    cpu time used by this process
+   child_cpu_seconds,  real,    cpu time used by child processes
+   peak_rss_mb,        real,    peak resident memory for this process
+   child_peak_rss_mb,  real,    peak resident memory for child processes
+
+The cpu times are for the time between the start and stop
+and include both user and system time.
+The child values are for the child processes
+(e.g., the dismod_at commands) that completed during this stage.
+The peak resident memory values are in megabytes and are the maximum
+since the process started, not just during this stage; see
+``resource.getrusage`` .
+
+{xrst_end stage_timer_class}
+'''
+import time
+import resource
+import dismod_at
+# ----------------------------------------------------------------------------
+# usage_now
+def usage_now() :
+   self_usage  = resource.getrusage(resource.RUSAGE_SELF)
+   child_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+   #
+   # usage
+   # ru_maxrss is in kilobytes on linux
+   usage = {
+      'wall_seconds'      : time.perf_counter() ,
+      'cpu_seconds'       : self_usage.ru_utime + self_usage.ru_stime ,
+      'child_cpu_seconds' : child_usage.ru_utime + child_usage.ru_stime ,
+      'peak_rss_mb'       : self_usage.ru_maxrss / 1024.0 ,
+      'child_peak_rss_mb' : child_usage.ru_maxrss / 1024.0 ,
+   }
+   return usage
+# ----------------------------------------------------------------------------
+class stage_timer_class :
+   #
+   def __init__(self, fit_database, fit_type) :
+      assert type(fit_database) == str
+      assert type(fit_type) == str
+      #
+      self.fit_database = fit_database
+      self.fit_type     = fit_type
+      self.start()
+   #
+   # start
+   def start(self) :
+      self.usage = usage_now()
+   #
+   # stop
+   def stop(self, stage) :
+      assert type(stage) == str
+      #
+      # row
+      usage = usage_now()
+      row   = { 'unix_time' : time.time() }
+      for key in [ 'wall_seconds', 'cpu_seconds', 'child_cpu_seconds' ] :
+         row[key] = usage[key] - self.usage[key]
+      for key in [ 'peak_rss_mb', 'child_peak_rss_mb' ] :
+         row[key] = usage[key]
+      #
+      # at_cascade_timing
+      connection = dismod_at.create_connection(
+         self.fit_database, new = False, readonly = False
+      )
+      command  = 'CREATE TABLE IF NOT EXISTS at_cascade_timing('
+      command += 'at_cascade_timing_id integer primary key,'
+      command += 'fit_type text,'
+      command += 'stage text,'
+      command += ','.join( f'{key} real' for key in row )
+      command += ')'
+      dismod_at.sql_command(connection, command)
+      command  = 'INSERT INTO at_cascade_timing (fit_type,stage,'
+      command += ','.join( row.keys() ) + ') VALUES ('
+      command += f"'{self.fit_type}','{stage}',"
+      command += ','.join( str( row[key] ) for key in row ) + ')'
+      dismod_at.sql_command(connection, command)
+      connection.close()
+      #
+      # usage
+      # the time to write the table is included in the next stage
+      self.usage = usage
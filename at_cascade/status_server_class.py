@@ -0,0 +1,79 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+{xrst_begin status_server_class}
+{xrst_spell
+  http
+  json
+  localhost
+}
+
+Serve the Status of a Running Cascade
+#####################################
+
+status_server_class
+*******************
+{xrst_code py}
+status_server = status_server_class(status_file, port)
+{xrst_code}
+This starts a thread, in the current process, that responds to
+every HTTP GET request on ``localhost`` : *port* with the contents
+of the ``str`` *status_file* ; see
+:ref:`job_journal_class@Status File` .
+The content type is ``application/json`` .
+If *status_file* does not exist yet, the response is the json
+representation of an empty ``dict`` .
+
+close
+*****
+{xrst_code py}
+status_server.close()
+{xrst_code}
+This stops the thread and frees the port.
+
+{xrst_end status_server_class}
+'''
+import threading
+import http.server
+# ----------------------------------------------------------------------------
+class status_server_class :
+   #
+   # __init__
+   def __init__(self, status_file, port) :
+      assert type(status_file) == str
+      assert type(port) == int
+      #
+      # handler_class
+      class handler_class(http.server.BaseHTTPRequestHandler) :
+         def do_GET(self) :
+            try :
+               with open(status_file, 'rb') as file_obj :
+                  body = file_obj.read()
+            except FileNotFoundError :
+               body = b'{}'
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str( len(body) ) )
+            self.end_headers()
+            self.wfile.write(body)
+         #
+         # do not write a line to standard error for each request
+         def log_message(self, format, *args) :
+            pass
+      #
+      # server, thread
+      self.server = http.server.ThreadingHTTPServer(
+         ('localhost', port), handler_class
+      )
+      self.thread = threading.Thread(
+         target = self.server.serve_forever, daemon = True
+      )
+      self.thread.start()
+   #
+   # close
+   def close(self) :
+      self.server.shutdown()
+      self.server.server_close()
+      self.thread.join()
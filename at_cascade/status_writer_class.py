@@ -0,0 +1,87 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+{xrst_begin status_writer_class}
+
+Write the Status File for a Running Cascade
+###########################################
+
+status_writer_class
+*******************
+{xrst_code py}
+status_writer = status_writer_class(
+   all_node_database, journal_name, max_number_cpu, seconds
+)
+{xrst_code}
+This starts a process that writes the
+:ref:`job_journal_class@Status File` every *seconds* seconds.
+The arguments *all_node_database* , *journal_name* , and
+*max_number_cpu* have the same meaning as for :ref:`job_journal_class-name` .
+The ``float`` *seconds* must be greater than zero.
+The status file is written as soon as the process starts.
+
+Because only this process writes the status file,
+the cost of computing the progress does not depend on the
+number of times :ref:`job_journal_class@set_status` is called.
+
+close
+*****
+{xrst_code py}
+status_writer.close()
+{xrst_code}
+This writes the status file one more time and then stops the process.
+
+{xrst_end status_writer_class}
+'''
+import multiprocessing
+import at_cascade
+# ----------------------------------------------------------------------------
+# write_status_loop
+# Target for the process that writes the status file.
+def write_status_loop(
+   all_node_database, journal_name, max_number_cpu, seconds, stop_event
+) :
+   job_journal = at_cascade.job_journal_class(
+      all_node_database,
+      journal_name   = journal_name,
+      max_number_cpu = max_number_cpu,
+   )
+   job_journal.write_status()
+   while not stop_event.wait(timeout = seconds) :
+      job_journal.write_status()
+   job_journal.write_status()
+   job_journal.close()
+# ----------------------------------------------------------------------------
+class status_writer_class :
+   #
+   # __init__
+   def __init__(
+      self, all_node_database, journal_name, max_number_cpu, seconds
+   ) :
+      assert type(all_node_database) == str
+      assert type(journal_name) == str
+      assert max_number_cpu == None or type(max_number_cpu) == int
+      assert type(seconds) == float
+      assert seconds > 0.0
+      #
+      # stop_event, process
+      self.stop_event = multiprocessing.Event()
+      args = (
+         all_node_database,
+         journal_name,
+         max_number_cpu,
+         seconds,
+         self.stop_event,
+      )
+      self.process = multiprocessing.Process(
+         target = write_status_loop, args = args
+      )
+      self.process.daemon = True
+      self.process.start()
+   #
+   # close
+   def close(self) :
+      self.stop_event.set()
+      self.process.join()
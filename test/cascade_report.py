@@ -0,0 +1,135 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+          n0
+      n1      n2
+Check cascade_report using at_cascade_timing tables for three jobs
+run with max_number_cpu equal to two:
+n0 runs from 0 to 10, n1 from 12 to 20, and n2 from 10 to 30.
+'''
+import os
+import sys
+import json
+#
+# import at_cascade with a preference current directory version
+current_directory = os.getcwd()
+if os.path.isfile( current_directory + '/at_cascade/__init__.py' ) :
+   sys.path.insert(0, current_directory)
+import at_cascade
+import dismod_at
+# -----------------------------------------------------------------------------
+# create_database
+def create_database(file_name, table_dict) :
+   connection = dismod_at.create_connection(
+      file_name, new = True, readonly = False
+   )
+   for table_name in table_dict :
+      (col_name, col_type, row_list) = table_dict[table_name]
+      dismod_at.create_table(
+         connection, table_name, col_name, col_type, row_list
+      )
+   connection.close()
+# -----------------------------------------------------------------------------
+def main() :
+   #
+   # work_dir
+   work_dir = 'build/test'
+   at_cascade.empty_directory(work_dir)
+   os.chdir(work_dir)
+   #
+   # root.db
+   create_database( 'root.db', {
+      'node' : (
+         [ 'node_name', 'parent' ],
+         [ 'text',      'integer' ],
+         [ [ 'n0', None ], [ 'n1', 0 ], [ 'n2', 0 ] ],
+      ),
+      'covariate' : (
+         [ 'covariate_name', 'reference' ], [ 'text', 'real' ], [],
+      ),
+      'option' : (
+         [ 'option_name', 'option_value' ],
+         [ 'text',        'text'         ],
+         [ [ 'parent_node_name', 'n0' ] ],
+      ),
+   } )
+   #
+   # all_node.db
+   create_database( 'all_node.db', {
+      'option_all' : (
+         [ 'option_name', 'option_value' ],
+         [ 'text',        'text'         ],
+         [
+            [ 'root_database',  'root.db' ] ,
+            [ 'result_dir',     '.' ] ,
+            [ 'root_node_name', 'n0' ] ,
+            [ 'max_number_cpu', '2' ] ,
+         ],
+      ),
+      'split_reference' : (
+         [ 'split_reference_name', 'split_reference_value' ],
+         [ 'text', 'real' ],
+         [],
+      ),
+      'node_split' : ( [ 'node_id' ], [ 'integer' ], [] ),
+      'fit_goal'   : ( [ 'node_id' ], [ 'integer' ], [ [ 1 ], [ 2 ] ] ),
+   } )
+   #
+   # job_table
+   connection = dismod_at.create_connection(
+      'root.db', new = False, readonly = True
+   )
+   node_table = dismod_at.get_table_dict(connection, 'node')
+   connection.close()
+   job_table = at_cascade.create_job_table(
+      'all_node.db', node_table, 0, { 'n1', 'n2' }
+   )
+   #
+   # fit databases
+   # (stage, unix_time, wall_seconds) for each job
+   stage_dict = {
+      'n0'    : [ ('init', 102, 2), ('fit', 108, 6), ('shift n1', 110, 2) ],
+      'n0/n1' : [ ('init', 113, 1), ('fit', 120, 7) ],
+      'n0/n2' : [ ('init', 111, 1), ('fit', 130, 19) ],
+   }
+   for directory in stage_dict :
+      row_list = [
+         [ 'both', stage, unix_time, wall_seconds ]
+         for (stage, unix_time, wall_seconds) in stage_dict[directory]
+      ]
+      os.makedirs(directory)
+      create_database( f'{directory}/dismod.db', {
+         'at_cascade_timing' : (
+            [ 'fit_type', 'stage', 'unix_time', 'wall_seconds' ],
+            [ 'text',     'text',  'real',      'real'         ],
+            row_list,
+         )
+      } )
+   with open('n0/n1/trace.out', 'w') as file_obj :
+      file_obj.write('fit_one_job: fit iterations = 17, warm start\n')
+   #
+   # report
+   report = at_cascade.cascade_report('all_node.db', job_table)
+   with open('cascade_report.json', 'r') as file_obj :
+      assert json.load(file_obj) == report
+   assert os.path.exists('cascade_report.html')
+   #
+   assert report['elapsed_seconds'] == 30.0
+   assert report['utilization'] == 38.0 / 60.0
+   job_name = [ row['job_name'] for row in report['job'] ]
+   assert job_name == [ 'n0', 'n2', 'n1' ]
+   assert report['job'][2]['fit_iterations'] == 17
+   assert report['job'][0]['stage_seconds']['shift'] == 2.0
+   assert report['timeline'] == [ [0.0, 1], [12.0, 2], [20.0, 1], [30.0, 0] ]
+   assert report['ready_idle'] == [ [10.0, 12.0, 1] ]
+   assert report['ready_idle_seconds'] == 2.0
+   assert report['critical_path'] == [ 'n0', 'n2' ]
+   assert report['critical_path_seconds'] == 30.0
+   assert report['slowest_stage'][0] == [ 'fit', 32.0 ]
+   assert report['slowest_job'][0] == [ 'n2', 20.0 ]
+#
+if __name__ == '__main__' :
+   main()
+   print('cascade_report: OK')
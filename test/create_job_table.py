@@ -42,6 +42,18 @@ for job_id in range(5) :
 for job_id in range(5, 11) :
    check_job_table[job_id]['start_child_job_id'] = len(check_job_table)
    check_job_table[job_id]['end_child_job_id']   = len(check_job_table)
+#
+# job_depth
+for job_id in range(11) :
+   check_job_table[job_id]['job_depth'] = [0,1,1,2,2,2,2,3,3,3,3][job_id]
+#
+# preorder_id, end_preorder_id
+# depth first order: j0, j1, j3, j7, j8, j4, j9, j10, j2, j5, j6
+preorder_id     = [ 0, 1,  8, 2, 5,  9, 10, 3, 4, 6, 7 ]
+end_preorder_id = [11, 8, 11, 5, 8, 10, 11, 4, 5, 7, 8 ]
+for job_id in range(11) :
+   check_job_table[job_id]['preorder_id']     = preorder_id[job_id]
+   check_job_table[job_id]['end_preorder_id'] = end_preorder_id[job_id]
 # -----------------------------------------------------------------------------
 # imports
 # ----------------------------------------------------------------------------
@@ -0,0 +1,212 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+                n0
+          n1          n2
+      n3      n4      n5
+Check the jobs that delta_cascade refits when the data for n3 changes.
+The data for a node has 10 rows, x_0 is an absolute covariate with
+max_difference 1, and reference 0. The first row for n3 is not in any
+data subset because its x_0 value is 3.
+Then check a relative covariate with max_difference 1 where the
+cov_reference table reference is 2 for n1, n3, n4 and 0 for n0, n2, n5.
+'''
+import os
+import sys
+import shutil
+#
+# import at_cascade with a preference current directory version
+current_directory = os.getcwd()
+if os.path.isfile( current_directory + '/at_cascade/__init__.py' ) :
+   sys.path.insert(0, current_directory)
+import at_cascade
+import dismod_at
+# -----------------------------------------------------------------------------
+# create_database
+def create_database(file_name, table_dict) :
+   connection = dismod_at.create_connection(
+      file_name, new = True, readonly = False
+   )
+   for table_name in table_dict :
+      (col_name, col_type, row_list) = table_dict[table_name]
+      dismod_at.create_table(
+         connection, table_name, col_name, col_type, row_list
+      )
+   connection.close()
+# -----------------------------------------------------------------------------
+# set_meas_value
+def set_meas_value(root_database, data_id, x_0) :
+   connection = dismod_at.create_connection(
+      root_database, new = False, readonly = False
+   )
+   command  = f'UPDATE data SET meas_value = 2.0, x_0 = {x_0} '
+   command += f'WHERE data_id = {data_id}'
+   dismod_at.sql_command(connection, command)
+   connection.close()
+# -----------------------------------------------------------------------------
+# create_all_node_db
+def create_all_node_db(absolute_covariates, node_reference) :
+   option_row = [
+      [ 'root_database',       'root.db' ] ,
+      [ 'result_dir',          '.' ] ,
+      [ 'root_node_name',      'n0' ] ,
+   ]
+   if absolute_covariates :
+      option_row.append( [ 'absolute_covariates', 'x' ] )
+   cov_reference_row = [
+      [ node_id, None, 0, reference ]
+      for (node_id, reference) in enumerate(node_reference)
+   ]
+   create_database( 'all_node.db', {
+      'option_all' : (
+         [ 'option_name', 'option_value' ],
+         [ 'text',        'text'         ],
+         option_row,
+      ),
+      'split_reference' : (
+         [ 'split_reference_name', 'split_reference_value' ],
+         [ 'text', 'real' ],
+         [],
+      ),
+      'node_split' : ( [ 'node_id' ], [ 'integer' ], [] ),
+      'fit_goal' : (
+         [ 'node_id' ], [ 'integer' ], [ [ 3 ], [ 4 ], [ 5 ] ]
+      ),
+      'cov_reference' : (
+         [
+            'node_id', 'split_reference_id', 'covariate_id', 'reference_value'
+         ],
+         [ 'integer', 'integer', 'integer', 'real' ],
+         cov_reference_row,
+      ),
+   } )
+# -----------------------------------------------------------------------------
+def main() :
+   #
+   # work_dir
+   work_dir = 'build/test'
+   at_cascade.empty_directory(work_dir)
+   os.chdir(work_dir)
+   #
+   # old_root.db
+   node_row = [
+      [ 'n0', None ], [ 'n1', 0 ], [ 'n2', 0 ],
+      [ 'n3', 1 ],    [ 'n4', 1 ], [ 'n5', 2 ],
+   ]
+   data_row = list()
+   for node_id in [ 3, 4, 5 ] :
+      for i in range(10) :
+         x_0 = 3.0 if (node_id, i) == (3, 0) else 0.5
+         data_row.append( [ node_id, 1.0, x_0 ] )
+   create_database( 'old_root.db', {
+      'node' : (
+         [ 'node_name', 'parent' ], [ 'text', 'integer' ], node_row
+      ),
+      'covariate' : (
+         [ 'covariate_name', 'reference', 'max_difference' ],
+         [ 'text',           'real',      'real'           ],
+         [ [ 'x', 0.0, 1.0 ] ],
+      ),
+      'data' : (
+         [ 'node_id', 'meas_value', 'x_0' ],
+         [ 'integer', 'real',       'real' ],
+         data_row,
+      ),
+   } )
+   #
+   # all_node.db
+   create_all_node_db( absolute_covariates = True, node_reference = 6 * [0.0] )
+   #
+   # fit_goal_set
+   fit_goal_set = { 'n3', 'n4', 'n5' }
+   #
+   # no change
+   shutil.copyfile('old_root.db', 'root.db')
+   refit_list = at_cascade.delta_cascade(
+      'all_node.db', 'old_root.db', fit_goal_set, dry_run = True
+   )
+   assert refit_list == []
+   #
+   # change to a row that is not in any data subset
+   set_meas_value('root.db', 0, 3.0)
+   refit_list = at_cascade.delta_cascade(
+      'all_node.db', 'old_root.db', fit_goal_set, dry_run = True
+   )
+   assert refit_list == []
+   #
+   # change to a row for n3 that is in the data subsets
+   set_meas_value('root.db', 1, 0.5)
+   refit_list = at_cascade.delta_cascade(
+      'all_node.db', 'old_root.db', fit_goal_set, dry_run = True
+   )
+   assert refit_list == [ 'n0', 'n1', 'n2', 'n3', 'n4', 'n5' ]
+   #
+   # The changed row counts as two changed rows (old and new),
+   # this is 2/9 of the n3 data and 2/19 of the n1 data.
+   refit_list = at_cascade.delta_cascade(
+      'all_node.db',
+      'old_root.db',
+      fit_goal_set,
+      max_changed_fraction = 0.15,
+      dry_run              = True,
+   )
+   assert refit_list == [ 'n3' ]
+   #
+   # node_table
+   connection = dismod_at.create_connection(
+      'root.db', new = False, readonly = True
+   )
+   node_table = dismod_at.get_table_dict(connection, 'node')
+   connection.close()
+   #
+   # reduce_job_table
+   job_table = at_cascade.create_job_table(
+      'all_node.db', node_table, 0, fit_goal_set
+   )
+   from at_cascade.delta_cascade import reduce_job_table
+   reduced_job_table = reduce_job_table(job_table, [ 1, 3 ] )
+   assert [ row['job_name'] for row in reduced_job_table ] == [ 'n1', 'n3' ]
+   assert reduced_job_table[0]['start_child_job_id'] == 1
+   assert reduced_job_table[0]['end_child_job_id'] == 2
+   assert reduced_job_table[1]['parent_job_id'] == 0
+   assert reduced_job_table[1]['job_depth'] == 1
+   assert reduced_job_table[0]['end_preorder_id'] == 2
+   #
+   # relative covariate
+   # The n3 data has x_0 = 2.5, so it is only in the n3 and n1 data subsets.
+   data_row = list()
+   for node_id in [ 3, 4, 5 ] :
+      for i in range(10) :
+         x_0 = 2.5 if node_id == 3 else 0.5
+         data_row.append( [ node_id, 1.0, x_0 ] )
+   create_database( 'old_root.db', {
+      'node' : (
+         [ 'node_name', 'parent' ], [ 'text', 'integer' ], node_row
+      ),
+      'covariate' : (
+         [ 'covariate_name', 'reference', 'max_difference' ],
+         [ 'text',           'real',      'real'           ],
+         [ [ 'x', 0.0, 1.0 ] ],
+      ),
+      'data' : (
+         [ 'node_id', 'meas_value', 'x_0' ],
+         [ 'integer', 'real',       'real' ],
+         data_row,
+      ),
+   } )
+   create_all_node_db(
+      absolute_covariates = False,
+      node_reference      = [ 0.0, 2.0, 0.0, 2.0, 2.0, 0.0 ],
+   )
+   shutil.copyfile('old_root.db', 'root.db')
+   set_meas_value('root.db', 0, 2.5)
+   refit_list = at_cascade.delta_cascade(
+      'all_node.db', 'old_root.db', fit_goal_set, dry_run = True
+   )
+   assert refit_list == [ 'n1', 'n3', 'n4' ]
+#
+if __name__ == '__main__' :
+   main()
+   print('delta_cascade: OK')
@@ -0,0 +1,170 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+Check cascade_hash, input_hash, get, put, and LRU eviction for fit_cache_class.
+'''
+import os
+import sys
+#
+# import at_cascade with a preference current directory version
+current_directory = os.getcwd()
+if os.path.isfile( current_directory + '/at_cascade/__init__.py' ) :
+   sys.path.insert(0, current_directory)
+import at_cascade
+import dismod_at
+# -----------------------------------------------------------------------------
+# create_database
+def create_database(file_name, table_dict) :
+   connection = dismod_at.create_connection(
+      file_name, new = True, readonly = False
+   )
+   for table_name in table_dict :
+      (col_name, col_type, row_list) = table_dict[table_name]
+      dismod_at.create_table(
+         connection, table_name, col_name, col_type, row_list
+      )
+   connection.close()
+# -----------------------------------------------------------------------------
+def main() :
+   #
+   # work_dir
+   work_dir = 'build/test'
+   at_cascade.empty_directory(work_dir)
+   os.chdir(work_dir)
+   #
+   # root.db
+   # only data_id 0 and 1 are in the data_subset table
+   create_database( 'root.db', {
+      'data' : (
+         [ 'integrand_id', 'meas_value' ],
+         [ 'integer',      'real'       ],
+         [ [ 0, 1.0 ], [ 0, 2.0 ], [ 0, 3.0 ] ],
+      )
+   } )
+   #
+   # all_node.db
+   create_database( 'all_node.db', {
+      'option_all' : (
+         [ 'option_name', 'option_value' ],
+         [ 'text',        'text'         ],
+         [ [ 'root_database', 'root.db' ], [ 'max_number_cpu', '4' ] ],
+      )
+   } )
+   #
+   # fit.db
+   fit_table = {
+      'prior' : (
+         [ 'prior_name', 'mean' ], [ 'text', 'real' ], [ [ 'p0', 0.5 ] ]
+      ),
+      'data_subset' : (
+         [ 'data_id', 'hold_out' ], [ 'integer', 'integer' ],
+         [ [ 0, 0 ], [ 1, 0 ] ],
+      ),
+      'fit_var' : (
+         [ 'fit_var_value' ], [ 'real' ], [ [ 0.75 ] ]
+      ),
+   }
+   create_database( 'fit.db', fit_table )
+   #
+   # job_table
+   job_table = [ {
+      'job_name'           : 'n0' ,
+      'start_child_job_id' : 1 ,
+      'end_child_job_id'   : 1 ,
+   } ]
+   #
+   # cascade_hash
+   cascade_hash = at_cascade.fit_cache_class.cascade_hash('all_node.db')
+   #
+   # input_hash
+   def input_hash(fit_type = 'both') :
+      return at_cascade.fit_cache_class.input_hash(
+         at_cascade.fit_cache_class.cascade_hash('all_node.db'),
+         'root.db',
+         'fit.db',
+         job_table,
+         0,
+         fit_type,
+      )
+   hash_0 = input_hash()
+   assert hash_0 == input_hash()
+   assert hash_0 != input_hash('fixed')
+   #
+   # the cascade_hash argument is part of the hash
+   other_hash = at_cascade.fit_cache_class.input_hash(
+      cascade_hash + '0', 'root.db', 'fit.db', job_table, 0, 'both'
+   )
+   assert hash_0 != other_hash
+   #
+   # options that only change monitoring do not change the hash
+   connection = dismod_at.create_connection(
+      'all_node.db', new = False, readonly = False
+   )
+   command  = 'INSERT INTO option_all (option_name, option_value) VALUES '
+   command += "('status_port', '8080'), ('profile_job', 'all')"
+   dismod_at.sql_command(connection, command)
+   connection.close()
+   assert cascade_hash == \
+      at_cascade.fit_cache_class.cascade_hash('all_node.db')
+   assert hash_0 == input_hash()
+   #
+   # a data row that is not in data_subset does not change the hash
+   connection = dismod_at.create_connection(
+      'root.db', new = False, readonly = False
+   )
+   command = 'UPDATE data SET meas_value = 4.0 WHERE data_id = 2'
+   dismod_at.sql_command(connection, command)
+   assert cascade_hash == \
+      at_cascade.fit_cache_class.cascade_hash('all_node.db')
+   assert hash_0 == input_hash()
+   command = 'UPDATE data SET meas_value = 4.0 WHERE data_id = 1'
+   dismod_at.sql_command(connection, command)
+   hash_1 = input_hash()
+   assert hash_0 != hash_1
+   connection.close()
+   #
+   # put, get
+   fit_cache = at_cascade.fit_cache_class('cache', 0)
+   assert not fit_cache.get(hash_0, 'fit.db')
+   fit_cache.put(hash_0, 'fit.db')
+   create_database( 'other.db', { 'prior' : fit_table['prior'] } )
+   assert fit_cache.get(hash_0, 'other.db')
+   connection = dismod_at.create_connection(
+      'other.db', new = False, readonly = True
+   )
+   fit_var = dismod_at.get_table_dict(connection, 'fit_var')
+   connection.close()
+   assert fit_var == [ { 'fit_var_value' : 0.75 } ]
+   n_bytes = fit_cache.n_bytes()
+   fit_cache.close()
+   #
+   # LRU eviction: room for two results
+   fit_cache = at_cascade.fit_cache_class('cache', 2 * n_bytes)
+   fit_cache.put(hash_1, 'fit.db')
+   assert fit_cache.get(hash_0, 'other.db')
+   hash_2 = input_hash('fixed')
+   fit_cache.put(hash_2, 'fit.db')
+   assert fit_cache.get(hash_0, 'other.db')
+   assert not fit_cache.get(hash_1, 'other.db')
+   assert fit_cache.get(hash_2, 'other.db')
+   assert not os.path.exists( f'cache/{hash_1}.db' )
+   assert fit_cache.n_bytes() == 2 * n_bytes
+   fit_cache.close()
+   #
+   # an option that changes the fit changes the cascade hash
+   connection = dismod_at.create_connection(
+      'all_node.db', new = False, readonly = False
+   )
+   command  = 'INSERT INTO option_all (option_name, option_value) VALUES '
+   command += "('max_fit', '10')"
+   dismod_at.sql_command(connection, command)
+   connection.close()
+   assert cascade_hash != \
+      at_cascade.fit_cache_class.cascade_hash('all_node.db')
+   assert hash_1 != input_hash()
+#
+if __name__ == '__main__' :
+   main()
+   print('fit_cache_class: OK')
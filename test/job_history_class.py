@@ -0,0 +1,215 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+Node tree:  n0 -> n1, n2.
+The history has records for n0 and n1 but not for n2.
+
+Node tree: m0 -> m1, m2 and m1 -> m3, m4.
+The history has records for m0, m3, and m4 but not for m1 and m2.
+The number of data rows for m1 and m2 is the same, but m1 has more
+variables because it has children.
+
+The input_hash does not depend on the options that do not change a fit.
+'''
+import os
+import sys
+import math
+#
+# import at_cascade with a preference current directory version
+current_directory = os.getcwd()
+if os.path.isfile( current_directory + '/at_cascade/__init__.py' ) :
+   sys.path.insert(0, current_directory)
+import at_cascade
+import dismod_at
+# -----------------------------------------------------------------------------
+def main() :
+   #
+   # work_dir
+   work_dir = 'build/test'
+   at_cascade.empty_directory(work_dir)
+   os.chdir(work_dir)
+   #
+   # node_table
+   node_table = [
+      { 'node_name' : 'n0', 'parent' : None },
+      { 'node_name' : 'n1', 'parent' : 0    },
+      { 'node_name' : 'n2', 'parent' : 0    },
+   ]
+   #
+   # root.db
+   # n0 has 10 data rows, n1 has 10 data rows, n2 has 90 data rows
+   root_database = 'root.db'
+   connection    = dismod_at.create_connection(
+      root_database, new = True, readonly = False
+   )
+   row_list = 10 * [ [0] ] + 10 * [ [1] ] + 90 * [ [2] ]
+   dismod_at.create_table(
+      connection, 'data', [ 'node_id' ], [ 'integer' ], row_list
+   )
+   connection.close()
+   #
+   # job_table
+   job_table = list()
+   for (node_id, row) in enumerate(node_table) :
+      job_table.append( {
+         'job_name'      : row['node_name'] ,
+         'prior_only'    : False ,
+         'fit_node_id'   : node_id ,
+         'parent_job_id' : row['parent'] ,
+      } )
+   #
+   # job_history
+   job_history = at_cascade.job_history_class('history.db')
+   #
+   # empty history
+   job_seconds = job_history.predict(
+      job_table, node_table, root_database, 'both', 'new'
+   )
+   assert job_seconds == None
+   #
+   # job_history
+   # n_data for n0 (n1) is 110 (10)
+   for (job_name, input_hash, n_data, seconds, memory) in [
+      ( 'n0', 'old', 110, 11.0, 100.0 ),
+      ( 'n0', 'new', 110, 12.0, 200.0 ),
+      ( 'n1', 'old',  10,  2.0,  50.0 ),
+      ( 'n1', 'old',  10,  4.0,  70.0 ),
+   ] :
+      job_history.add_row( {
+         'job_name'      : job_name ,
+         'input_hash'    : input_hash ,
+         'fit_type'      : 'both' ,
+         'n_data'        : n_data ,
+         'n_var'         : 10 ,
+         'total_seconds' : seconds ,
+         'peak_rss_mb'   : memory ,
+      } )
+   #
+   # job_seconds
+   job_seconds = job_history.predict(
+      job_table, node_table, root_database, 'both', 'new'
+   )
+   #
+   # n0: same input_hash
+   assert job_seconds[0] == 12.0
+   #
+   # n1: average of most recent records
+   assert job_seconds[1] == 3.0
+   #
+   # n2: regression; n2 has more data than n1 and less than n0
+   assert job_seconds[1] < job_seconds[2] < job_seconds[0]
+   #
+   # job_memory
+   job_memory = job_history.predict_memory(
+      job_table, node_table, root_database, 'both', 'new'
+   )
+   #
+   # n0: same input_hash, n1: maximum of most recent records
+   assert job_memory[0] == 200.0
+   assert job_memory[1] == 70.0
+   assert job_memory[1] < job_memory[2] < job_memory[0]
+   #
+   # cold_start
+   # the warm start record for n1 is not included in the average
+   assert job_history.cold_start('n1', 'both') == None
+   for (iterations, seconds, warm_start) in [
+      ( 40, 4.0, 0 ), ( 60, 8.0, 0 ), ( 10, 1.0, 1 )
+   ] :
+      job_history.add_row( {
+         'job_name'       : 'n1' ,
+         'input_hash'     : 'new' ,
+         'fit_type'       : 'both' ,
+         'fit_iterations' : iterations ,
+         'fit_seconds'    : seconds ,
+         'warm_start'     : warm_start ,
+      } )
+   assert job_history.cold_start('n1', 'both') == (50.0, 6.0)
+   assert job_history.cold_start('n1', 'fixed') == None
+   #
+   job_history.close()
+   #
+   # node_table
+   node_table = [
+      { 'node_name' : 'm0', 'parent' : None },
+      { 'node_name' : 'm1', 'parent' : 0    },
+      { 'node_name' : 'm2', 'parent' : 0    },
+      { 'node_name' : 'm3', 'parent' : 1    },
+      { 'node_name' : 'm4', 'parent' : 1    },
+   ]
+   #
+   # root.db
+   # m0, m1, m2, m3, m4 have 10, 0, 30, 10, 20 data rows
+   connection = dismod_at.create_connection(
+      root_database, new = True, readonly = False
+   )
+   row_list = 10 * [ [0] ] + 30 * [ [2] ] + 10 * [ [3] ] + 20 * [ [4] ]
+   dismod_at.create_table(
+      connection, 'data', [ 'node_id' ], [ 'integer' ], row_list
+   )
+   connection.close()
+   #
+   # job_table
+   job_table = list()
+   for (node_id, row) in enumerate(node_table) :
+      job_table.append( {
+         'job_name'      : row['node_name'] ,
+         'prior_only'    : False ,
+         'fit_node_id'   : node_id ,
+         'parent_job_id' : row['parent'] ,
+      } )
+   #
+   # job_history
+   # n_var is 10 plus 10 times the number of children
+   job_history = at_cascade.job_history_class('history.db')
+   for (job_name, n_data, n_var, seconds) in [
+      ( 'm0', 70, 30, 40.0 ),
+      ( 'm3', 10, 10,  2.0 ),
+      ( 'm4', 20, 10,  3.0 ),
+      ( 'm4', 20, 10,  3.5 ),
+   ] :
+      job_history.add_row( {
+         'job_name'      : job_name ,
+         'input_hash'    : 'old' ,
+         'fit_type'      : 'fixed' ,
+         'n_data'        : n_data ,
+         'n_var'         : n_var ,
+         'total_seconds' : seconds ,
+      } )
+   job_seconds = job_history.predict(
+      job_table, node_table, root_database, 'fixed', 'new'
+   )
+   job_history.close()
+   #
+   # m1, m2: regression
+   assert job_seconds[2] < job_seconds[1] < job_seconds[0]
+   #
+   # input_hash
+   input_hash = list()
+   for max_number_cpu in [ '1', '2' ] :
+      for max_fit in [ '100', '200' ] :
+         connection = dismod_at.create_connection(
+            'all_node.db', new = True, readonly = False
+         )
+         dismod_at.create_table(
+            connection,
+            'option_all',
+            [ 'option_name', 'option_value' ],
+            [ 'text', 'text' ],
+            [
+               [ 'root_database',  root_database ] ,
+               [ 'max_number_cpu', max_number_cpu ] ,
+               [ 'max_fit',        max_fit ] ,
+            ],
+         )
+         connection.close()
+         input_hash.append(
+            at_cascade.job_history_class.input_hash('all_node.db')
+         )
+   assert input_hash[0] == input_hash[2]
+   assert input_hash[0] != input_hash[1]
+#
+if __name__ == '__main__' :
+   main()
+   print('job_history_class: OK')
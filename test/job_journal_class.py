@@ -0,0 +1,118 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+Check that job_journal_class keeps the most recent status for each job
+and that it is still there after the journal is closed and re-opened.
+Also check the progress in the status file, the status writer,
+and the status server.
+'''
+import os
+import sys
+import json
+import time
+import socket
+import urllib.request
+#
+# import at_cascade with a preference current directory version
+current_directory = os.getcwd()
+if os.path.isfile( current_directory + '/at_cascade/__init__.py' ) :
+   sys.path.insert(0, current_directory)
+import at_cascade
+import dismod_at
+# -----------------------------------------------------------------------------
+def main() :
+   #
+   # work_dir
+   work_dir = 'build/test'
+   at_cascade.empty_directory(work_dir)
+   os.chdir(work_dir)
+   #
+   # all_node.db
+   all_node_database = 'all_node.db'
+   connection        = dismod_at.create_connection(
+      all_node_database, new = True, readonly = False
+   )
+   row_list = [ [ 'result_dir', '.' ] ]
+   dismod_at.create_table(
+      connection,
+      'option_all',
+      [ 'option_name', 'option_value' ],
+      [ 'text', 'text' ],
+      row_list,
+   )
+   connection.close()
+   #
+   # job_journal
+   job_journal = at_cascade.job_journal_class(all_node_database)
+   job_journal.set_status( [ 'n0', 'n1', 'n2' ], 'wait' )
+   job_journal.set_status( [ 'n0' ], 'run' )
+   job_journal.set_status( [ 'n0' ], 'done' )
+   job_journal.set_status( [ 'n1' ], 'run' )
+   job_journal.close()
+   #
+   # status_dict
+   job_journal = at_cascade.job_journal_class(all_node_database)
+   status_dict = job_journal.get_status()
+   job_journal.close()
+   assert status_dict == { 'n0' : 'done', 'n1' : 'run', 'n2' : 'wait' }
+   #
+   # progress
+   # n3 is done without running so it is not in the averages
+   job_journal = at_cascade.job_journal_class(
+      all_node_database, max_number_cpu = 2
+   )
+   job_journal.set_status( [ 'n3' ], 'done' )
+   time.sleep(0.1)
+   progress = job_journal.progress()
+   assert progress['status_count'] == { 'done' : 2, 'run' : 1, 'wait' : 1 }
+   assert [ row[0] for row in progress['running'] ] == [ 'n1' ]
+   assert progress['running'][0][1] >= 0.1
+   mean_job_seconds = progress['mean_job_seconds']
+   assert 0.0 <= mean_job_seconds < 0.1
+   assert progress['jobs_per_hour'] > 0.0
+   assert progress['eta_seconds'] == mean_job_seconds / 2.0
+   #
+   # status file
+   # set_status does not write the status file
+   assert not os.path.exists('job_journal.json')
+   job_journal.write_status()
+   with open('job_journal.json', 'r') as file_obj :
+      status = json.load(file_obj)
+   assert status['status_count'] == progress['status_count']
+   #
+   # status_writer
+   status_writer = at_cascade.status_writer_class(
+      all_node_database, 'job_journal', 2, 0.1
+   )
+   job_journal.set_status( [ 'n1' ], 'done' )
+   time.sleep(0.5)
+   with open('job_journal.json', 'r') as file_obj :
+      status = json.load(file_obj)
+   assert status['status_count'] == { 'done' : 3, 'wait' : 1 }
+   job_journal.set_status( [ 'n2' ], 'run' )
+   status_writer.close()
+   with open('job_journal.json', 'r') as file_obj :
+      status = json.load(file_obj)
+   assert status['status_count'] == { 'done' : 3, 'run' : 1 }
+   #
+   # port
+   with socket.socket() as sock :
+      sock.bind( ('localhost', 0) )
+      port = sock.getsockname()[1]
+   #
+   # status_server
+   status_server = at_cascade.status_server_class('job_journal.json', port)
+   with urllib.request.urlopen( f'http://localhost:{port}' ) as response :
+      assert json.loads( response.read() ) == status
+   status_server.close()
+   #
+   # clear
+   job_journal.clear()
+   assert job_journal.get_status() == dict()
+   job_journal.close()
+#
+if __name__ == '__main__' :
+   main()
+   print('job_journal_class: OK')
@@ -0,0 +1,93 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+               j0
+       j1              j2
+   j3      j4          j5
+Check claim, finish, and lease reclaim for job_lease_class.
+'''
+import os
+import sys
+import time
+#
+# import at_cascade with a preference current directory version
+current_directory = os.getcwd()
+if os.path.isfile( current_directory + '/at_cascade/__init__.py' ) :
+   sys.path.insert(0, current_directory)
+import at_cascade
+# -----------------------------------------------------------------------------
+def main() :
+   #
+   # work_dir
+   work_dir = 'build/test'
+   at_cascade.empty_directory(work_dir)
+   os.chdir(work_dir)
+   #
+   # job_table
+   parent_list     = [ None, 0, 0, 1, 1, 2 ]
+   child_range     = [ (1, 3), (3, 5), (5, 6), (6, 6), (6, 6), (6, 6) ]
+   preorder_id     = [ 0, 1, 4, 2, 3, 5 ]
+   end_preorder_id = [ 6, 4, 6, 3, 4, 6 ]
+   job_table       = list()
+   for job_id in range(6) :
+      job_table.append( {
+         'job_name'           : f'j{job_id}' ,
+         'prior_only'         : False ,
+         'fit_node_id'        : job_id ,
+         'split_reference_id' : None ,
+         'parent_job_id'      : parent_list[job_id] ,
+         'start_child_job_id' : child_range[job_id][0] ,
+         'end_child_job_id'   : child_range[job_id][1] ,
+         'job_depth'          : [ 0, 1, 1, 2, 2, 2 ][job_id] ,
+         'preorder_id'        : preorder_id[job_id] ,
+         'end_preorder_id'    : end_preorder_id[job_id] ,
+      } )
+   #
+   # job_lease
+   lease_database = 'job_lease.db'
+   status_list    = [ 'ready' ] + 5 * [ 'wait' ]
+   priority       = [ 0.0, 0.0, 1.0, 0.0, 0.0, 0.0 ]
+   option_dict    = {
+      'all_node_database' : 'all_node.db' ,
+      'fit_integrand'     : '' ,
+      'fit_type_list'     : 'both' ,
+      'lease_seconds'     : '1' ,
+   }
+   at_cascade.job_lease_class.create(
+      lease_database, job_table, status_list, priority, option_dict
+   )
+   job_lease = at_cascade.job_lease_class(lease_database)
+   assert job_lease.get_job_table() == job_table
+   #
+   # j0 done: j1 and j2 become ready and j2 has higher priority
+   assert job_lease.claim('w0') == 0
+   assert job_lease.claim('w1') == None
+   assert job_lease.finish(0, 'w0', True)
+   assert job_lease.claim('w0') == 2
+   assert job_lease.claim('w1') == 1
+   #
+   # j1 error: j3 and j4 are aborted
+   assert job_lease.finish(1, 'w1', False)
+   status_count = job_lease.status_count()
+   assert status_count['abort'] == 2
+   assert status_count['run']   == 1
+   #
+   # w0 stops sending heartbeats and loses its lease on j2
+   time.sleep(1.5)
+   assert job_lease.claim('w1') == 2
+   assert not job_lease.heartbeat(2, 'w0')
+   assert not job_lease.finish(2, 'w0', True)
+   assert job_lease.finish(2, 'w1', True)
+   assert job_lease.claim('w1') == 5
+   assert job_lease.finish(5, 'w1', True)
+   #
+   # get_status
+   status_list = job_lease.get_status()
+   assert status_list == [ 'done', 'error', 'done', 'abort', 'abort', 'done' ]
+   job_lease.close()
+#
+if __name__ == '__main__' :
+   main()
+   print('job_lease_class: OK')
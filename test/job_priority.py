@@ -0,0 +1,58 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+               j0
+       j1              j2
+   j3  j4  j5          j6
+           j7          j8
+                       j9
+j5 is prior_only and has no children
+'''
+import os
+import sys
+#
+# import at_cascade with a preference current directory version
+current_directory = os.getcwd()
+if os.path.isfile( current_directory + '/at_cascade/__init__.py' ) :
+   sys.path.insert(0, current_directory)
+import at_cascade
+# -----------------------------------------------------------------------------
+def main() :
+   #
+   # parent_list
+   parent_list = [ None, 0, 0, 1, 1, 1, 2, 4, 6, 8 ]
+   #
+   # job_table
+   job_table = list()
+   for (job_id, parent_job_id) in enumerate( parent_list ) :
+      row = {
+         'job_name'      : f'n{job_id}',
+         'prior_only'    : job_id == 5,
+         'parent_job_id' : parent_job_id,
+      }
+      job_table.append(row)
+   #
+   # job_id
+   priority = at_cascade.job_priority(job_table, 'job_id')
+   assert priority == len(job_table) * [ 0.0 ]
+   #
+   # descendant
+   priority = at_cascade.job_priority(job_table, 'descendant')
+   check    = [ 8, 3, 3, 0, 1, 0, 2, 0, 1, 0 ]
+   assert priority == check
+   #
+   # critical_path
+   priority = at_cascade.job_priority(job_table, 'critical_path')
+   check    = [ 5, 3, 4, 1, 2, 0, 3, 1, 2, 1 ]
+   assert priority == check
+   #
+   # goal
+   priority = at_cascade.job_priority(job_table, 'goal n6')
+   check    = [ 1, 0, 1, 0, 0, 0, 1, 0, 1, 1 ]
+   assert priority == check
+#
+if __name__ == '__main__' :
+   main()
+   print('job_priority: OK')
@@ -0,0 +1,102 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+Check the job selection by job_profiler_class and the report
+created by merge_profile.
+'''
+import os
+import sys
+#
+# import at_cascade with a preference current directory version
+current_directory = os.getcwd()
+if os.path.isfile( current_directory + '/at_cascade/__init__.py' ) :
+   sys.path.insert(0, current_directory)
+import at_cascade
+import dismod_at
+# -----------------------------------------------------------------------------
+# create_all_node_db
+def create_all_node_db(row_list) :
+   if os.path.exists('all_node.db') :
+      os.remove('all_node.db')
+   connection = dismod_at.create_connection(
+      'all_node.db', new = True, readonly = False
+   )
+   dismod_at.create_table(
+      connection,
+      'option_all',
+      [ 'option_name', 'option_value' ],
+      [ 'text', 'text' ],
+      row_list,
+   )
+   connection.close()
+# -----------------------------------------------------------------------------
+# slow_function
+def slow_function() :
+   return sum( i * i for i in range(10**5) )
+# -----------------------------------------------------------------------------
+def main() :
+   #
+   # work_dir
+   work_dir = 'build/test'
+   at_cascade.empty_directory(work_dir)
+   os.chdir(work_dir)
+   #
+   # job_name_list
+   job_name_list = [ f'n{i}' for i in range(100) ]
+   #
+   # selected
+   def selected(job_name) :
+      job_profiler = at_cascade.job_profiler_class(
+         'all_node.db', job_name, f'{job_name}/profile.prof'
+      )
+      return job_profiler.selected
+   #
+   # no profile_job option
+   if 'AT_CASCADE_PROFILE_JOB' in os.environ :
+      del os.environ['AT_CASCADE_PROFILE_JOB']
+   create_all_node_db( [] )
+   assert not any( selected(job_name) for job_name in job_name_list )
+   #
+   # environment variable
+   os.environ['AT_CASCADE_PROFILE_JOB'] = 'all'
+   assert all( selected(job_name) for job_name in job_name_list )
+   del os.environ['AT_CASCADE_PROFILE_JOB']
+   #
+   # fraction
+   create_all_node_db( [ [ 'profile_job', '0.5' ] ] )
+   n_selected = sum( selected(job_name) for job_name in job_name_list )
+   assert 30 < n_selected < 70
+   #
+   # job names
+   create_all_node_db( [ [ 'profile_job', 'n1 n2' ] ] )
+   selected_list = [
+      job_name for job_name in job_name_list if selected(job_name)
+   ]
+   assert selected_list == [ 'n1', 'n2' ]
+   #
+   # profile.prof
+   for job_name in job_name_list[0 : 3] :
+      os.makedirs(job_name)
+      job_profiler = at_cascade.job_profiler_class(
+         'all_node.db', job_name, f'{job_name}/profile.prof'
+      )
+      job_profiler.start()
+      slow_function()
+      job_profiler.stop()
+   assert not os.path.exists('n0/profile.prof')
+   assert os.path.exists('n1/profile.prof')
+   assert os.path.exists('n2/profile.prof')
+   #
+   # merge_profile
+   report = at_cascade.merge_profile('.', n_function = 10)
+   assert report.startswith('merge_profile: 2 profiles')
+   assert 'slow_function' in report
+   with open('profile_report.txt', 'r') as file_obj :
+      assert file_obj.read() == report
+   assert at_cascade.merge_profile('.', 'pre_profile.prof') == None
+#
+if __name__ == '__main__' :
+   main()
+   print('job_profiler_class: OK')
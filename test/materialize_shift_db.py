@@ -0,0 +1,175 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+          n0
+    n1          n2
+Check that materialize_shift_db creates the n1 and n2 databases from the
+template and the c_shift_summary table in the n0 database, that it
+removes the template after the last one is created, and that it does nothing
+for n0 (which has no parent).
+'''
+import os
+import sys
+#
+# import at_cascade with a preference current directory version
+current_directory = os.getcwd()
+if os.path.isfile( current_directory + '/at_cascade/__init__.py' ) :
+   sys.path.insert(0, current_directory)
+import at_cascade
+import dismod_at
+# -----------------------------------------------------------------------------
+# create_database
+def create_database(file_name, table_dict) :
+   connection = dismod_at.create_connection(
+      file_name, new = True, readonly = False
+   )
+   for table_name in table_dict :
+      (col_name, col_type, row_list) = table_dict[table_name]
+      dismod_at.create_table(
+         connection, table_name, col_name, col_type, row_list
+      )
+   connection.close()
+# -----------------------------------------------------------------------------
+def main() :
+   #
+   # work_dir
+   work_dir = 'build/test'
+   at_cascade.empty_directory(work_dir)
+   os.chdir(work_dir)
+   #
+   # all_node.db
+   table_dict = {
+      'option_all' : (
+         [ 'option_name', 'option_value' ],
+         [ 'text',        'text'         ],
+         [
+            [ 'root_database',  'root.db' ] ,
+            [ 'result_dir',     '.' ] ,
+            [ 'root_node_name', 'n0' ] ,
+            [ 'lazy_shift_db',  'true' ] ,
+         ],
+      ),
+      'split_reference' : (
+         [ 'split_reference_name', 'split_reference_value' ],
+         [ 'text', 'real' ],
+         [],
+      ),
+      'node_split' : ( [ 'node_id' ], [ 'integer' ], [] ),
+   }
+   for name in [
+      'omega_all', 'omega_index', 'omega_age_grid', 'omega_time_grid'
+   ] :
+      table_dict[name] = ( [ 'omega' ], [ 'real' ], [] )
+   create_database( 'all_node.db', table_dict )
+   #
+   # node_table, job_table
+   node_table = [
+      { 'node_name' : 'n0', 'parent' : None },
+      { 'node_name' : 'n1', 'parent' : 0 },
+      { 'node_name' : 'n2', 'parent' : 0 },
+   ]
+   job_table = list()
+   for node_id in range(3) :
+      job_table.append( {
+         'fit_node_id'        : node_id ,
+         'split_reference_id' : None ,
+         'parent_job_id'      : None if node_id == 0 else 0 ,
+      } )
+   for node_name in [ 'n0', 'n0/n1', 'n0/n2' ] :
+      os.makedirs(node_name)
+   #
+   # n0/shift_template.db
+   create_database( 'n0/shift_template.db', {
+      'option' : (
+         [ 'option_name', 'option_value' ],
+         [ 'text',        'text'         ],
+         [ [ 'parent_node_name', 'n0' ] ],
+      ),
+      'covariate' : (
+         [ 'covariate_name', 'reference', 'max_difference' ],
+         [ 'text',           'real',      'real'           ],
+         [ [ 'x', 0.0, None ] ],
+      ),
+      'prior' : (
+         [ 'prior_name', 'density_id', 'mean', 'std' ],
+         [ 'text',       'integer',    'real', 'real' ],
+         [ [ 'p0', 1, 0.0, 1.0 ], [ 'p1', 1, 0.0, 1.0 ] ],
+      ),
+   } )
+   #
+   # n0/dismod.db
+   summary_list = [
+      [ 'n0/n1/dismod.db', 'option',    0, 'option_value', 'n1' ],
+      [ 'n0/n1/dismod.db', 'covariate', 0, 'reference',    0.5  ],
+      [ 'n0/n1/dismod.db', 'prior',     1, 'mean',         2.0  ],
+      [ 'n0/n1/dismod.db', 'prior',     1, 'std',          3.0  ],
+      [ 'n0/n2/dismod.db', 'option',    0, 'option_value', 'n2' ],
+   ]
+   connection = dismod_at.create_connection(
+      'n0/dismod.db', new = True, readonly = False
+   )
+   command  = 'CREATE TABLE c_shift_summary ('
+   command += 'c_shift_summary_id integer primary key, '
+   command += 'shift_database text, table_name text, row_id integer, '
+   command += 'col_name text, value)'
+   dismod_at.sql_command(connection, command)
+   command  = 'INSERT INTO c_shift_summary '
+   command += '(shift_database, table_name, row_id, col_name, value) '
+   command += 'VALUES (?, ?, ?, ?, ?)'
+   connection.cursor().executemany(command, summary_list)
+   connection.commit()
+   connection.close()
+   #
+   # n0
+   shift_database = at_cascade.materialize_shift_db(
+      'all_node.db', node_table, job_table, 0
+   )
+   assert shift_database == None
+   #
+   # n1
+   shift_database = at_cascade.materialize_shift_db(
+      'all_node.db', node_table, job_table, 1
+   )
+   assert shift_database == './n0/n1/dismod.db'
+   assert os.listdir('n0/n1') == [ 'dismod.db' ]
+   assert os.path.exists('n0/shift_template.db')
+   connection = dismod_at.create_connection(
+      shift_database, new = False, readonly = True
+   )
+   option_table    = dismod_at.get_table_dict(connection, 'option')
+   covariate_table = dismod_at.get_table_dict(connection, 'covariate')
+   prior_table     = dismod_at.get_table_dict(connection, 'prior')
+   connection.close()
+   assert option_table[0]['option_value'] == 'n1'
+   assert covariate_table[0]['reference'] == 0.5
+   assert prior_table[0]['mean'] == 0.0
+   assert prior_table[0]['std'] == 1.0
+   assert prior_table[1]['mean'] == 2.0
+   assert prior_table[1]['std'] == 3.0
+   #
+   # n1 a second time: its rows were removed
+   shift_database = at_cascade.materialize_shift_db(
+      'all_node.db', node_table, job_table, 1
+   )
+   assert shift_database == None
+   #
+   # n2: the template is removed after the last shift database is created
+   shift_database = at_cascade.materialize_shift_db(
+      'all_node.db', node_table, job_table, 2
+   )
+   assert shift_database == './n0/n2/dismod.db'
+   assert not os.path.exists('n0/shift_template.db')
+   connection = dismod_at.create_connection(
+      shift_database, new = False, readonly = True
+   )
+   option_table = dismod_at.get_table_dict(connection, 'option')
+   prior_table  = dismod_at.get_table_dict(connection, 'prior')
+   connection.close()
+   assert option_table[0]['option_value'] == 'n2'
+   assert prior_table[1]['mean'] == 0.0
+#
+if __name__ == '__main__' :
+   main()
+   print('materialize_shift_db: OK')
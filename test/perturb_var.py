@@ -0,0 +1,145 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+Check that perturb_var respects the bounds for each variable,
+gives the same result for the same random_seed,
+and gives the same result as dismod_at.perturb_command.
+'''
+import os
+import sys
+#
+# import at_cascade with a preference current directory version
+current_directory = os.getcwd()
+if os.path.isfile( current_directory + '/at_cascade/__init__.py' ) :
+   sys.path.insert(0, current_directory)
+import at_cascade
+import dismod_at
+# -----------------------------------------------------------------------------
+# create_fit_database
+def create_fit_database(fit_database) :
+   connection = dismod_at.create_connection(
+      fit_database, new = True, readonly = False
+   )
+   #
+   # option
+   dismod_at.create_table(
+      connection,
+      'option',
+      [ 'option_name', 'option_value' ],
+      [ 'text', 'text' ],
+      [ [ 'random_seed', '123' ] ],
+   )
+   #
+   # prior
+   # prior_id 0: [0.5, 2], prior_id 1: [1, 1], prior_id 2: [-10, 10]
+   dismod_at.create_table(
+      connection,
+      'prior',
+      [ 'prior_name', 'lower', 'upper' ],
+      [ 'text',       'real',  'real'  ],
+      [ [ 'p0', 0.5, 2.0 ], [ 'p1', 1.0, 1.0 ], [ 'p2', -10.0, 10.0 ] ],
+   )
+   #
+   # smooth
+   dismod_at.create_table(
+      connection,
+      'smooth',
+      [ 'smooth_name', 'mulstd_value_prior_id' ],
+      [ 'text',        'integer'               ],
+      [ [ 's0', 1 ] ],
+   )
+   #
+   # smooth_grid
+   # age_id 0: prior p0, age_id 1: constant 3, age_id 2: prior p2
+   dismod_at.create_table(
+      connection,
+      'smooth_grid',
+      [ 'smooth_id', 'age_id', 'time_id', 'value_prior_id', 'const_value' ],
+      [ 'integer',   'integer', 'integer', 'integer',       'real'        ],
+      [ [ 0, 0, 0, 0, None ], [ 0, 1, 0, None, 3.0 ], [ 0, 2, 0, 2, None ] ],
+   )
+   #
+   # var
+   dismod_at.create_table(
+      connection,
+      'var',
+      [ 'var_type', 'smooth_id', 'age_id', 'time_id', 'mulcov_id' ],
+      [ 'text',     'integer',   'integer', 'integer', 'integer'  ],
+      [
+         [ 'rate',              0, 0,    0,    None ],
+         [ 'rate',              0, 1,    0,    None ],
+         [ 'mulstd_value',      0, None, None, None ],
+         [ 'mulcov_rate_value', 0, 2,    0,    0    ],
+      ],
+   )
+   #
+   # bnd_mulcov
+   dismod_at.create_table(
+      connection,
+      'bnd_mulcov',
+      [ 'max_cov_diff', 'max_mulcov' ],
+      [ 'real',         'real'       ],
+      [ [ 1.0, 0.1 ] ],
+   )
+   #
+   # start_var, scale_var
+   for table_name in [ 'start_var', 'scale_var' ] :
+      dismod_at.create_table(
+         connection,
+         table_name,
+         [ f'{table_name}_value' ],
+         [ 'real' ],
+         [ [ 1.0 ], [ 1.0 ], [ 2.0 ], [ 1.0 ] ],
+      )
+   connection.close()
+# -----------------------------------------------------------------------------
+# get_start_value
+def get_start_value(fit_database) :
+   connection = dismod_at.create_connection(
+      fit_database, new = False, readonly = True
+   )
+   table = dismod_at.get_table_dict(connection, 'start_var')
+   connection.close()
+   return [ row['start_var_value'] for row in table ]
+# -----------------------------------------------------------------------------
+def main() :
+   #
+   # work_dir
+   work_dir = 'build/test'
+   at_cascade.empty_directory(work_dir)
+   os.chdir(work_dir)
+   #
+   # start_value
+   start_value = list()
+   for fit_database in [ 'fit_1.db', 'fit_2.db' ] :
+      create_fit_database(fit_database)
+      at_cascade.perturb_var(fit_database, 'start_var', 5.0)
+      start_value.append( get_start_value(fit_database) )
+   #
+   # same random_seed gives the same result
+   assert start_value[0] == start_value[1]
+   #
+   # bounds
+   value = start_value[0]
+   assert 0.5 <= value[0] <= 2.0
+   assert value[1] == 3.0
+   assert value[2] == 1.0
+   assert -0.1 <= value[3] <= 0.1
+   #
+   # dismod_at.perturb_command
+   for sigma in [ 0.0, 5.0 ] :
+      create_fit_database('fit_1.db')
+      at_cascade.perturb_var('fit_1.db', 'start_var', sigma)
+      create_fit_database('fit_2.db')
+      dismod_at.perturb_command('fit_2.db', 'start_var', str(sigma) )
+      value           = get_start_value('fit_1.db')
+      dismod_at_value = get_start_value('fit_2.db')
+      #
+      # same result as dismodat.py fit_2.db perturb start_var sigma
+      assert value == dismod_at_value
+#
+if __name__ == '__main__' :
+   main()
+   print('perturb_var: OK')
@@ -0,0 +1,147 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+Check the shared_job_class ready queue and status counts.
+'''
+import os
+import sys
+import random
+#
+# import at_cascade with a preference current directory version
+current_directory = os.getcwd()
+if os.path.isfile( current_directory + '/at_cascade/__init__.py' ) :
+   sys.path.insert(0, current_directory)
+import at_cascade
+# -----------------------------------------------------------------------------
+def main() :
+   #
+   # job_status_name
+   job_status_name = [
+      'skip', 'wait', 'ready', 'run', 'done', 'error', 'abort'
+   ]
+   job_status_wait  = job_status_name.index( 'wait' )
+   job_status_ready = job_status_name.index( 'ready' )
+   job_status_run   = job_status_name.index( 'run' )
+   job_status_done  = job_status_name.index( 'done' )
+   #
+   # job_table, priority
+   n_job     = 50
+   job_table = n_job * [ dict() ]
+   random.seed(1234)
+   priority  = [ float( random.randint(0, 5) ) for job_id in range(n_job) ]
+   #
+   # shared_job
+   shared_memory_prefix_plus = 'test_shared_job_class'
+   shared_job = at_cascade.shared_job_class(
+      shared_memory_prefix_plus,
+      job_table,
+      job_status_name,
+      priority,
+      create = True,
+   )
+   assert shared_job.count(job_status_wait) == n_job
+   #
+   # other
+   # a second attachment to the same shared memory
+   other = at_cascade.shared_job_class(
+      shared_memory_prefix_plus, job_table, job_status_name, priority
+   )
+   #
+   # make all the jobs ready, then make some of them wait again
+   for job_id in range(n_job) :
+      shared_job.set_status(job_id, job_status_ready)
+   for job_id in range(0, n_job, 3) :
+      shared_job.set_status(job_id, job_status_wait)
+   n_wait  = len( range(0, n_job, 3) )
+   n_ready = n_job - n_wait
+   assert other.count(job_status_ready) == n_ready
+   assert other.count(job_status_wait)  == n_wait
+   #
+   # check
+   # order that ready jobs should come out of the queue
+   check = [ job_id for job_id in range(n_job) if job_id % 3 != 0 ]
+   check.sort( key = lambda job_id : ( - priority[job_id], job_id ) )
+   #
+   # pop_ready
+   for job_id in check :
+      assert other.pop_ready() == job_id
+      assert shared_job.status(job_id) == job_status_run
+      other.set_status(job_id, job_status_done)
+   assert other.pop_ready() == None
+   #
+   # status_count
+   status_count = shared_job.status_count()
+   assert status_count['done']  == n_ready
+   assert status_count['wait']  == n_wait
+   assert status_count['ready'] == 0
+   assert status_count['run']   == 0
+   #
+   other.close()
+   shared_job.close()
+   shared_job.unlink()
+   #
+   # shared_job
+   # jobs 0, 1, 2, 3 have memory 60, 50, 30, 20 and the limit is 100
+   n_job      = 4
+   job_table  = n_job * [ dict() ]
+   shared_job = at_cascade.shared_job_class(
+      shared_memory_prefix_plus,
+      job_table,
+      job_status_name,
+      priority   = None,
+      create     = True,
+      job_memory = [ 60.0, 50.0, 30.0, 20.0 ],
+      max_memory = 100.0,
+   )
+   for job_id in range(n_job) :
+      shared_job.set_status(job_id, job_status_ready)
+   #
+   # job 1 does not fit with job 0 so job 2 is next, then nothing fits
+   assert shared_job.pop_ready() == 0
+   assert shared_job.pop_ready() == 2
+   assert shared_job.memory_inuse() == 90
+   assert shared_job.pop_ready() == None
+   #
+   # when job 0 is done, job 1 and job 3 fit
+   shared_job.set_status(0, job_status_done)
+   assert shared_job.pop_ready() == 1
+   assert shared_job.pop_ready() == 3
+   assert shared_job.memory_inuse() == 100
+   for job_id in [ 1, 2, 3 ] :
+      shared_job.set_status(job_id, job_status_done)
+   assert shared_job.memory_inuse() == 0
+   #
+   shared_job.close()
+   shared_job.unlink()
+   #
+   # shared_job
+   # job 0 has no memory prediction, job 1 is larger than the limit
+   n_job      = 2
+   job_table  = n_job * [ dict() ]
+   shared_job = at_cascade.shared_job_class(
+      shared_memory_prefix_plus,
+      job_table,
+      job_status_name,
+      priority   = None,
+      create     = True,
+      job_memory = [ 0.0, 150.0 ],
+      max_memory = 100.0,
+   )
+   for job_id in range(n_job) :
+      shared_job.set_status(job_id, job_status_ready)
+   #
+   # job 1 is only run by itself, even though job 0 uses no memory
+   assert shared_job.pop_ready() == 0
+   assert shared_job.memory_inuse() == 0
+   assert shared_job.pop_ready() == None
+   shared_job.set_status(0, job_status_done)
+   assert shared_job.pop_ready() == 1
+   #
+   shared_job.close()
+   shared_job.unlink()
+#
+if __name__ == '__main__' :
+   main()
+   print('shared_job_class: OK')
@@ -0,0 +1,80 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# SPDX-FileCopyrightText: University of Washington <https://www.washington.edu>
+# SPDX-FileContributor: 2021-25 Bradley M. Bell
+# ----------------------------------------------------------------------------
+'''
+Check the at_cascade_timing rows written by stage_timer_class.
+'''
+import os
+import sys
+import time
+import subprocess
+#
+# import at_cascade with a preference current directory version
+current_directory = os.getcwd()
+if os.path.isfile( current_directory + '/at_cascade/__init__.py' ) :
+   sys.path.insert(0, current_directory)
+import at_cascade
+import dismod_at
+# -----------------------------------------------------------------------------
+def main() :
+   #
+   # work_dir
+   work_dir = 'build/test'
+   at_cascade.empty_directory(work_dir)
+   os.chdir(work_dir)
+   #
+   # fit.db
+   connection = dismod_at.create_connection(
+      'fit.db', new = True, readonly = False
+   )
+   connection.close()
+   #
+   # stage_timer
+   stage_timer = at_cascade.stage_timer_class('fit.db', 'both')
+   #
+   # wait: uses wall time but not cpu time
+   time.sleep(0.2)
+   stage_timer.stop('wait')
+   #
+   # child: uses cpu time in a child process
+   command = [ sys.executable, '-c', 'sum( range(10**7) )' ]
+   subprocess.run(command, check = True)
+   stage_timer.stop('child')
+   #
+   # skip: not included in any stage
+   time.sleep(0.2)
+   stage_timer.start()
+   stage_timer.stop('empty')
+   #
+   # timing_table
+   connection = dismod_at.create_connection(
+      'fit.db', new = False, readonly = True
+   )
+   timing_table = dismod_at.get_table_dict(connection, 'at_cascade_timing')
+   connection.close()
+   #
+   assert [ row['stage'] for row in timing_table ] == \
+      [ 'wait', 'child', 'empty' ]
+   for row in timing_table :
+      assert row['fit_type'] == 'both'
+      assert row['peak_rss_mb'] > 0.0
+   #
+   # wait
+   row = timing_table[0]
+   assert row['wall_seconds'] >= 0.2
+   assert row['cpu_seconds'] < 0.1
+   assert row['child_cpu_seconds'] == 0.0
+   #
+   # child
+   row = timing_table[1]
+   assert row['child_cpu_seconds'] > 0.0
+   assert row['child_peak_rss_mb'] > 0.0
+   #
+   # empty
+   row = timing_table[2]
+   assert row['wall_seconds'] < 0.1
+#
+if __name__ == '__main__' :
+   main()
+   print('stage_timer_class: OK')